@@ -0,0 +1,82 @@
+"""Admin profiling endpoints (mounted only when ADMIN_TOKEN is set)"""
+import asyncio
+import threading
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from app.core.logger import logger
+from app.core.profiling import is_admin, sample_stacks, tracemalloc_tracker
+
+
+def require_admin(request: Request) -> None:
+    """Reject requests without the X-URLens-Admin-Token header"""
+    if not is_admin(request.headers):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+_sampling = threading.Lock()
+
+
+@router.get("/profile/sample", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval: float = Query(0.005, ge=0.001, le=1.0),
+):
+    """
+    Sample every thread's stack (event loop, extraction workers, ...)
+
+    - **seconds**: Capture duration (max 60)
+    - **interval**: Seconds between samples
+
+    Returns collapsed stacks for flamegraph.pl or speedscope.
+    """
+    if not _sampling.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A sampling profile is already running")
+    try:
+        logger.info(f"Sampling stacks for {seconds}s every {interval * 1000:.0f} ms")
+        loop = asyncio.get_running_loop()
+        # Default executor, so sampling never takes an extraction worker
+        return await loop.run_in_executor(None, sample_stacks, seconds, interval)
+    finally:
+        _sampling.release()
+
+
+@router.post("/tracemalloc/start")
+async def start_tracemalloc(frames: int = Query(1, ge=1, le=50)):
+    """
+    Start tracing allocations and take the baseline snapshot
+
+    Tracing slows the worker and uses memory; stop it when done.
+    """
+    tracemalloc_tracker.start(frames)
+    logger.info(f"tracemalloc started ({frames} frames)")
+    return {"tracing": True, "frames": frames}
+
+
+@router.get("/tracemalloc/snapshot")
+async def tracemalloc_snapshot(
+    limit: int = Query(25, ge=1, le=500),
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    reset: bool = False,
+):
+    """
+    Top allocation growth since the baseline
+
+    - **limit**: Number of entries
+    - **key_type**: Group by lineno, filename or traceback
+    - **reset**: Use this snapshot as the next baseline
+    """
+    try:
+        return tracemalloc_tracker.diff(limit, key_type, reset)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/tracemalloc/stop")
+async def stop_tracemalloc():
+    """Stop tracing allocations"""
+    tracemalloc_tracker.stop()
+    logger.info("tracemalloc stopped")
+    return {"tracing": False}
@@ -1,7 +1,8 @@
 """Analyze endpoint"""
-from fastapi import APIRouter, HTTPException
-from app.models.requests import URLRequest
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.models.requests import URLRequest, validated_url
 from app.models.responses import AnalyzeResponse
+from app.core.http_cache import cached_json_response
 from app.services.media_service import media_service
 from app.core.logger import logger
 
@@ -17,6 +18,8 @@ async def analyze_url(request: URLRequest):
     title, and thumbnail without downloading the actual media.
     
     - **url**: The URL to analyze (required)
+    - **retry_with_cookies**: Ignore a cached failure and retry with the
+      browser's cookies (after signing in)
     
     Returns metadata including:
     - platform: Source platform (e.g., youtube, instagram)
@@ -26,10 +29,31 @@ async def analyze_url(request: URLRequest):
     logger.info(f"Received analyze request for: {request.url}")
     
     try:
-        result = await media_service.analyze_url(request.url)
+        result = await media_service.analyze_url(request.url, request.retry_with_cookies)
         logger.info(f"Successfully analyzed: {request.url}")
         return result
         
     except Exception as e:
         logger.error(f"Failed to analyze URL: {str(e)}")
         raise
+
+
+@router.get("/analyze", response_model=AnalyzeResponse, tags=["media"])
+async def analyze_url_cached(
+    request: Request,
+    url: str = Query(..., description="The media URL"),
+    retry_with_cookies: bool = Query(False, description="Retry with browser cookies"),
+):
+    """
+    Cacheable GET variant of POST /analyze
+    
+    Same response body, plus a strong ETag and a Cache-Control max-age
+    bounded by the expiry of the signed URLs in the result. Send the ETag
+    back in If-None-Match to get an empty 304 when nothing changed.
+    
+    - **url**: The URL to analyze (required)
+    """
+    url = validated_url(url)
+    logger.info(f"Received cacheable analyze request for: {url}")
+    rendered = await media_service.render_analyze(url, retry_with_cookies)
+    return cached_json_response(request, rendered, private=retry_with_cookies)
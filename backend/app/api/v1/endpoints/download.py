@@ -1,7 +1,8 @@
 """Download endpoint"""
-from fastapi import APIRouter
-from app.models.requests import URLRequest
+from fastapi import APIRouter, Query, Request
+from app.models.requests import URLRequest, validated_url
 from app.models.responses import DownloadInfoResponse
+from app.core.http_cache import cached_json_response
 from app.services.media_service import media_service
 from app.core.logger import logger
 
@@ -17,6 +18,8 @@ async def get_download_info(request: URLRequest):
     with direct download URLs for each option.
     
     - **url**: The URL to get download options for (required)
+    - **retry_with_cookies**: Ignore a cached failure and retry with the
+      browser's cookies (after signing in)
     
     Returns:
     - download_options: List of available formats with:
@@ -28,10 +31,32 @@ async def get_download_info(request: URLRequest):
     logger.info(f"Received download-info request for: {request.url}")
     
     try:
-        result = await media_service.get_download_info(request.url)
+        result = await media_service.get_download_info(request.url, request.retry_with_cookies)
         logger.info(f"Successfully retrieved download info for: {request.url}")
         return result
         
     except Exception as e:
         logger.error(f"Failed to get download info: {str(e)}")
         raise
+
+
+@router.get("/download-info", response_model=DownloadInfoResponse, tags=["media"])
+async def get_download_info_cached(
+    request: Request,
+    url: str = Query(..., description="The media URL"),
+    retry_with_cookies: bool = Query(False, description="Retry with browser cookies"),
+):
+    """
+    Cacheable GET variant of POST /download-info
+    
+    Same response body, plus a strong ETag and a Cache-Control max-age
+    bounded by the earliest format URL expiry. Repeat requests for the same
+    extraction reuse the same download tokens; send the ETag back in
+    If-None-Match to get an empty 304 when nothing changed.
+    
+    - **url**: The URL to get download options for (required)
+    """
+    url = validated_url(url)
+    logger.info(f"Received cacheable download-info request for: {url}")
+    rendered = await media_service.render_download_info(url, retry_with_cookies)
+    return cached_json_response(request, rendered, private=retry_with_cookies)
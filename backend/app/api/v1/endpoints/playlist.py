@@ -0,0 +1,35 @@
+"""Playlist endpoint"""
+from fastapi import APIRouter, HTTPException
+from app.models.requests import PlaylistRequest
+from app.models.responses import PlaylistPageResponse
+from app.services.media_service import media_service
+from app.core.logger import logger
+
+router = APIRouter()
+
+
+@router.post("/playlist", response_model=PlaylistPageResponse, tags=["media"])
+async def get_playlist_page(request: PlaylistRequest):
+    """
+    List a playlist or channel one page at a time
+    
+    Entries are listed without being resolved, so a page returns quickly
+    even for large channels. Pass an entry's url to /download-info to get
+    its formats.
+    
+    - **url**: Playlist, channel or video URL (required)
+    - **cursor**: next_cursor from the previous page (omit for the first page)
+    - **limit**: Entries per page
+    
+    Returns:
+    - entries: id, title, url, thumbnail_url and duration of each entry
+    - next_cursor: Cursor of the next page, or null on the last page
+    """
+    logger.info(f"Received playlist request for: {request.url}")
+    
+    try:
+        return await media_service.get_playlist_page(
+            request.url, request.cursor, request.limit, request.retry_with_cookies
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -2,11 +2,25 @@
 
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 import httpx
-import yt_dlp
 import tempfile
 import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from app.config import settings
+from app.core.exceptions import UnsupportedURLException, URLensException
+from app.core.http_client import get_http_client
+from app.core.lifecycle import lifecycle
 from app.core.logger import logger
+from app.models.requests import validated_url
+from app.services.extraction_scheduler import DOWNLOAD
+from app.services.media_service import default_filename
+from app.services.segment_service import SegmentStream, is_segmented, open_segments
+from app.services.stream_service import FormatSource, UpstreamStream, open_upstream
+from app.services.token_service import FormatRecord, token_service
+from app.services.transcode_service import AUDIO_CODECS, BITRATES, transcode_service
+from app.services.ytdlp_service import ytdlp_service
 
 router = APIRouter()
 
@@ -18,38 +32,31 @@ async def proxy_content(
     """
     Generic proxy endpoint for images/content
     """
-    # Use distinct client for this simple proxy
-    client = httpx.AsyncClient(timeout=30.0, follow_redirects=True)
+    client = get_http_client()
     try:
-        req = client.build_request("GET", url)
+        req = client.build_request("GET", url, timeout=30.0)
         response = await client.send(req, stream=True)
-
-        if response.status_code != 200:
-            await response.aclose()
-            await client.aclose()
-            raise HTTPException(status_code=response.status_code)
-
-        content_type = response.headers.get("content-type", "application/octet-stream")
-
-        async def cleanup():
-            await response.aclose()
-            await client.aclose()
-
-        return StreamingResponse(
-            response.aiter_bytes(chunk_size=8192),
-            media_type=content_type,
-            background=cleanup,
-        )
     except Exception as e:
-        await client.aclose()
         logger.error(f"Proxy failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if response.status_code != 200:
+        await response.aclose()
+        raise HTTPException(status_code=response.status_code)
+
+    content_type = response.headers.get("content-type", "application/octet-stream")
+
+    return _stream_response(
+        response.aiter_bytes(chunk_size=8192), response.aclose, media_type=content_type
+    )
+
 
 @router.get("/proxy-download", tags=["media"])
 async def proxy_download(
-    url: str = Query(..., description="The URL to download from or format selector"),
-    filename: str = Query(..., description="The filename for the download"),
+    url: Optional[str] = Query(None, description="The URL to download from or format selector"),
+    filename: Optional[str] = Query(None, description="The filename for the download"),
+    token: Optional[str] = Query(None, description="Download token from /download-info"),
+    remux: bool = Query(False, description="Remux HLS/DASH downloads to MP4"),
 ):
     """
     Proxy endpoint to stream downloads from external sources
@@ -57,11 +64,23 @@ async def proxy_download(
     This endpoint acts as a proxy to bypass CORS restrictions when downloading
     media files from external sources. Supports both direct URLs and merged formats.
 
+    - **token**: Download token issued by /download-info (preferred)
     - **url**: The direct download URL or MERGE:format_id+format_id for merged streams
     - **filename**: The desired filename for the download
+    - **remux**: Rewrap HLS/DASH segments as MP4 with ffmpeg (otherwise
+      plain HLS is served as the concatenated MPEG-TS)
+
+    HLS and DASH formats are fetched segment by segment, several segments
+    in parallel, and streamed in order.
 
     Returns: Streaming file response
     """
+    if token:
+        record = await run_in_threadpool(token_service.resolve, token)
+        logger.info(f"Proxying download for: {filename or record.filename}")
+        return await _stream_record(record, filename, remux)
+
+    url, filename = _require_raw(url=url, filename=filename)
     logger.info(f"Proxying download for: {filename}")
 
     # Check if this is a merged format request
@@ -70,68 +89,31 @@ async def proxy_download(
         format_selector = url.replace("MERGE:", "")
         logger.info(f"Merging formats: {format_selector}")
 
-        # We need the original URL to download with yt-dlp
-        # For now, return an error asking for the original URL
-        # The frontend should send the original URL in this case
+        # Raw MERGE markers carry no source URL; tokens or /download-merged do
         raise HTTPException(
             status_code=400,
-            detail="Merged format downloads require using yt-dlp directly. Please use the original video URL.",
+            detail="Merged format downloads require a download token or the original video URL.",
         )
 
-    # Regular direct URL download
-    client = httpx.AsyncClient(timeout=300.0, follow_redirects=True)
-    try:
-        req = client.build_request("GET", url)
-        response = await client.send(req, stream=True)
-
-        if response.status_code != 200:
-            await response.aclose()
-            await client.aclose()
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to download from source: {response.status_code}",
+    if urlsplit(url).path.endswith(".m3u8"):
+        try:
+            stream = await _open_segments_or_raise(
+                {"url": url, "protocol": "m3u8_native"}, filename
             )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot download playlist: {e}")
+        return await _segmented_response(stream, filename, remux)
 
-        # Get content type and length
-        content_type = response.headers.get("content-type", "application/octet-stream")
-        content_length = response.headers.get("content-length")
-
-        # Create headers
-        headers = {
-            "Content-Disposition": f'attachment; filename="{filename}"',
-        }
-
-        if content_length:
-            headers["Content-Length"] = content_length
-
-        async def cleanup():
-            await response.aclose()
-            await client.aclose()
-            logger.info(f"Finished proxy download for: {filename}")
-
-        return StreamingResponse(
-            response.aiter_bytes(chunk_size=8192),
-            media_type=content_type,
-            headers=headers,
-            background=cleanup,
-        )
-
-    except httpx.TimeoutException:
-        await client.aclose()
-        logger.error(f"Timeout while downloading: {filename}")
-        raise HTTPException(status_code=504, detail="Download timeout")
-
-    except Exception as e:
-        await client.aclose()
-        logger.error(f"Failed to proxy download: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
+    # Regular direct URL download
+    return await _stream_upstream(url, filename)
 
 
 @router.get("/download-merged", tags=["media"])
 async def download_merged(
-    original_url: str = Query(..., description="The original video URL"),
-    format_id: str = Query(..., description="Format selector (e.g., '123+456')"),
-    filename: str = Query(..., description="The filename for the download"),
+    original_url: Optional[str] = Query(None, description="The original video URL"),
+    format_id: Optional[str] = Query(None, description="Format selector (e.g., '123+456')"),
+    filename: Optional[str] = Query(None, description="The filename for the download"),
+    token: Optional[str] = Query(None, description="Download token from /download-info"),
 ):
     """
     Download and merge video+audio streams using yt-dlp
@@ -139,58 +121,410 @@ async def download_merged(
     This endpoint uses yt-dlp to download and merge separate video and audio streams
     into a single file, which is common for Instagram, Twitter, etc.
 
+    - **token**: Download token issued by /download-info (preferred)
     - **original_url**: The original video URL (not the stream URL)
     - **format_id**: The format selector (e.g., "123+456" for video+audio merge)
     - **filename**: The desired filename
 
     Returns: Streaming merged file
     """
+    if token:
+        record = await run_in_threadpool(token_service.resolve, token)
+        return await _stream_record(record, filename, remux=False)
+
+    original_url, format_id, filename = _require_raw(
+        original_url=original_url, format_id=format_id, filename=filename
+    )
     logger.info(f"Downloading merged format {format_id} from: {original_url}")
+    return await _stream_source(original_url, format_id, filename)
+
+
+@router.get("/download-preset", tags=["media"])
+async def download_preset(
+    url: str = Query(..., description="The original video URL"),
+    preset: str = Query(
+        "best", description="Quality preset: best, 1080p, 720p-h264, audio, audio-m4a, ..."
+    ),
+    filename: str = Query(None, description="The filename for the download"),
+    remux: bool = Query(False, description="Remux HLS/DASH downloads to MP4"),
+):
+    """
+    Download a quality preset in a single call
+
+    The preset is resolved against the cached format table of the URL. A
+    pre-merged or audio-only format is proxied directly; otherwise the best
+    matching video and audio are merged from the cached extraction, so no
+    second yt-dlp extraction is needed.
+
+    - **url**: The original video URL
+    - **preset**: Quality preset (see `available_presets` in /download-info)
+    - **filename**: The desired filename (defaults to the media title)
+    - **remux**: Rewrap HLS/DASH segments as MP4 with ffmpeg
+
+    Returns: Streaming file response
+    """
+    url = await _source_url(url)
+    cached = await ytdlp_service.run(ytdlp_service.get_info, url)
+
+    try:
+        selection = cached.table.resolve_preset(preset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if selection is None:
+        raise HTTPException(
+            status_code=404, detail=f"No format matches preset '{preset}' for this URL"
+        )
+
+    if not filename:
+        filename = default_filename(cached.info, selection.ext)
+
+    logger.info(f"Preset {preset} resolved to {selection.format_selector} for: {url}")
+
+    if selection.direct is not None and is_segmented(selection.direct.protocol):
+        return await _stream_segmented(url, selection.direct.format_id, filename, remux)
+    if selection.direct is not None:
+        return await _stream_upstream(
+            selection.direct.url,
+            filename,
+            source=FormatSource(url, selection.direct.format_id),
+        )
+    return await _stream_merged(cached.info, selection.format_selector, filename)
+
+
+@router.get("/download-audio", tags=["media"])
+async def download_audio(
+    url: str = Query(..., description="The original video URL"),
+    codec: str = Query("mp3", description="Output codec: mp3 or aac"),
+    bitrate: int = Query(192, description="Output bitrate in kbit/s"),
+    filename: Optional[str] = Query(None, description="The filename for the download"),
+):
+    """
+    Stream the audio of a URL converted to MP3 or AAC
+
+    The best audio format from the cached extraction is piped through ffmpeg
+    and the encoded output streamed straight to the client; nothing is
+    written to disk. Concurrent conversions are capped (one per CPU by
+    default) and ffmpeg is killed if the client disconnects.
+
+    - **url**: The original video URL
+    - **codec**: `mp3` or `aac`
+    - **bitrate**: One of 64, 96, 128, 160, 192, 256, 320
+    - **filename**: The desired filename (defaults to the media title)
+
+    Returns: Streaming audio response
+    """
+    if codec not in AUDIO_CODECS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported codec '{codec}', expected one of: {', '.join(AUDIO_CODECS)}",
+        )
+    if bitrate not in BITRATES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported bitrate {bitrate}, expected one of: {', '.join(map(str, BITRATES))}",
+        )
+
+    url = await _source_url(url)
+    cached = await ytdlp_service.run(ytdlp_service.get_info, url)
+    entry = cached.table.best_audio
+    if entry is None and cached.table.best_muxed:
+        # No separate audio stream: take the smallest muxed one, ffmpeg drops the video
+        entry = min(cached.table.best_muxed.values(), key=lambda e: (e.height, e.rank))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No audio stream available for this URL")
+
+    target = AUDIO_CODECS[codec]
+    filename = filename or default_filename(cached.info, target.ext)
+    upstream: Union[UpstreamStream, SegmentStream]
+    if is_segmented(entry.protocol):
+        fmt = await ytdlp_service.run(ytdlp_service.get_format, url, entry.format_id)
+        try:
+            upstream = await _open_segments_or_raise(fmt, filename)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot convert this audio stream: {e}")
+        chunks = upstream.iter_bytes()
+    else:
+        upstream = await _open_or_raise(
+            entry.url, filename, source=FormatSource(url, entry.format_id)
+        )
+        chunks = upstream.iter_bytes(chunk_size=64 * 1024)
+
+    async def audio_source():
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await upstream.aclose()
 
+    try:
+        transcoder = await transcode_service.open(audio_source(), codec, bitrate)
+    except URLensException:
+        await upstream.aclose()
+        raise
+
+    async def close():
+        # The feeder closes the upstream, unless it was cancelled before it started
+        await transcoder.aclose()
+        await upstream.aclose()
+
+    logger.info(f"Transcoding format {entry.format_id} to {codec}@{bitrate}k for: {url}")
+    return _stream_response(
+        transcoder.iter_bytes(),
+        close,
+        media_type=target.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _require_raw(**params: Optional[str]) -> Tuple[str, ...]:
+    """Validate the raw (token-less) query parameters of a download endpoint"""
+    if not settings.ALLOW_RAW_PROXY_URLS:
+        raise HTTPException(status_code=403, detail="A download token is required")
+    missing = [name for name, value in params.items() if not value]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing query parameters: {', '.join(missing)} (or pass a token)",
+        )
+    return tuple(params.values())  # type: ignore[arg-type]
+
+
+def _stream_response(
+    body: AsyncIterator[bytes], close: Callable[[], Awaitable[None]], **kwargs: Any
+) -> StreamingResponse:
+    """
+    StreamingResponse that releases the resources behind its body however it ends
+
+    Cleanup in the body's ``finally`` only runs once the body is iterated,
+    and a body paused at a yield is left open when the client disconnects.
+    ``close`` therefore also runs as the background task, which Starlette
+    awaits after the response is done, including after a disconnect.
+
+    Args:
+        body: Response body
+        close: Idempotent coroutine function freeing what the body holds
+            (ffmpeg, segment fetches, upstream connections, temp dirs)
+        **kwargs: Passed to StreamingResponse
+    """
+    tracked = lifecycle.track(body)
+
+    async def cleanup():
+        try:
+            await tracked.aclose()
+            aclose = getattr(body, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        finally:
+            await close()
+
+    return StreamingResponse(tracked, background=cleanup, **kwargs)
+
+
+async def _source_url(url: str) -> str:
+    """
+    Validate the original media URL of a download endpoint like /analyze
+
+    Unless raw proxy URLs are allowed, only sites with a dedicated yt-dlp
+    extractor are accepted, so these endpoints cannot be used to relay
+    arbitrary pages and files through the generic extractor.
+    """
+    url = validated_url(url)
+    if not settings.ALLOW_RAW_PROXY_URLS and not await run_in_threadpool(
+        ytdlp_service.is_supported, url
+    ):
+        raise UnsupportedURLException(f"No supported extractor for {url}")
+    return url
+
+
+async def _stream_record(
+    record: FormatRecord, filename: Optional[str], remux: bool
+) -> StreamingResponse:
+    """Stream the download a token record refers to"""
+    filename = filename or record.filename
+    if record.direct_url is not None and is_segmented(record.protocol):
+        return await _stream_segmented(record.source_url, record.format_id, filename, remux)
+    if record.direct_url is not None:
+        return await _stream_upstream(
+            record.direct_url,
+            filename,
+            source=FormatSource(record.source_url, record.format_id),
+        )
+    return await _stream_source(record.source_url, record.format_id, filename)
+
+
+async def _stream_source(source_url: str, format_selector: str, filename: str) -> StreamingResponse:
+    """Merge formats of a source URL, reusing its cached extraction"""
+    try:
+        info = (await ytdlp_service.run(ytdlp_service.get_info, source_url)).info
+    except URLensException as e:
+        logger.error(f"Failed to download merged format: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Merge download failed: {str(e)}")
+
+    return await _stream_merged(info, format_selector, filename)
+
+
+async def _stream_segmented(
+    source_url: str, format_id: str, filename: str, remux: bool
+) -> StreamingResponse:
+    """
+    Stream an HLS/DASH format of a source URL segment by segment
+
+    Formats the segment path cannot handle (encrypted or live playlists)
+    are downloaded through yt-dlp instead.
+    """
+    fmt = await ytdlp_service.run(ytdlp_service.get_format, source_url, format_id)
+    try:
+        stream = await _open_segments_or_raise(fmt, filename)
+    except ValueError as e:
+        logger.info(f"Format {format_id} falls back to yt-dlp download: {e}")
+        return await _stream_source(source_url, format_id, filename)
+    return await _segmented_response(stream, filename, remux)
+
+
+async def _open_segments_or_raise(fmt: Dict[str, Any], filename: str) -> SegmentStream:
+    """Open a segmented format, mapping playlist fetch failures to HTTP errors"""
+    try:
+        return await open_segments(fmt)
+    except httpx.TimeoutException:
+        logger.error(f"Timeout while fetching playlist: {filename}")
+        raise HTTPException(status_code=504, detail="Download timeout")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Failed to download from source: {e.response.status_code}",
+        )
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to fetch playlist: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
+
+
+async def _segmented_response(
+    stream: SegmentStream, filename: str, remux: bool
+) -> StreamingResponse:
+    """Serve segments as-is (MPEG-TS or fragmented MP4), or remuxed to MP4"""
+    if remux:
+        try:
+            transcoder = await transcode_service.remux(stream.iter_bytes())
+        except URLensException:
+            await stream.aclose()
+            raise
+        body = transcoder.iter_bytes()
+        media_type = "video/mp4"
+        filename = _with_ext(filename, "mp4")
+
+        async def close():
+            await transcoder.aclose()
+            await stream.aclose()
+    else:
+        body = stream.iter_bytes()
+        close = stream.aclose
+        media_type = stream.plan.media_type
+        if not stream.plan.fragmented:
+            filename = _with_ext(filename, "ts")
+
+    logger.info(
+        f"Streaming {len(stream.plan.segments)} {stream.plan.kind} segments for: {filename}"
+    )
+    return _stream_response(
+        body,
+        close,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _with_ext(filename: str, ext: str) -> str:
+    return f"{os.path.splitext(filename)[0]}.{ext}"
+
+
+async def _stream_upstream(
+    url: str, filename: str, source: Optional[FormatSource] = None
+) -> StreamingResponse:
+    """
+    Relay a direct media URL to the client as an attachment
+
+    When ``source`` is given, an expiring or rejected URL is re-resolved and
+    the stream resumes transparently.
+    """
+    upstream = await _open_or_raise(url, filename, source)
+
+    # Get content type and length
+    content_type = upstream.headers.get("content-type", "application/octet-stream")
+    content_length = upstream.headers.get("content-length")
+
+    # Create headers
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+
+    if content_length:
+        headers["Content-Length"] = content_length
+
+    async def cleanup():
+        await upstream.aclose()
+        logger.info(f"Finished proxy download for: {filename}")
+
+    return _stream_response(
+        upstream.iter_bytes(chunk_size=8192),
+        cleanup,
+        media_type=content_type,
+        headers=headers,
+    )
+
+
+async def _open_or_raise(
+    url: str, filename: str, source: Optional[FormatSource] = None
+) -> UpstreamStream:
+    """Open an upstream media URL, mapping failures to HTTP errors"""
+    try:
+        upstream = await open_upstream(url, source=source)
+    except httpx.TimeoutException:
+        logger.error(f"Timeout while downloading: {filename}")
+        raise HTTPException(status_code=504, detail="Download timeout")
+    except Exception as e:
+        logger.error(f"Failed to proxy download: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
+
+    if upstream.status_code != 200:
+        await upstream.aclose()
+        raise HTTPException(
+            status_code=upstream.status_code,
+            detail=f"Failed to download from source: {upstream.status_code}",
+        )
+    return upstream
+
+
+async def _stream_merged(
+    info: Dict[str, Any], format_selector: str, filename: str
+) -> StreamingResponse:
+    """Merge formats of an extracted info dict and stream the result"""
     # Create temporary directory for download
     temp_dir = tempfile.mkdtemp()
-    temp_output = os.path.join(temp_dir, "download")
+    lifecycle.add_temp_dir(temp_dir)
 
     try:
-        # Configure yt-dlp to download and merge
-        ydl_opts = {
-            "format": format_id,
-            "outtmpl": temp_output,
-            "merge_output_format": "mp4",
-            "quiet": True,
-            "no_warnings": True,
-        }
-
-        # Download and merge using yt-dlp
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([original_url])
-
-        # Find the output file (it might have extension added)
-        output_file = None
-        for file in os.listdir(temp_dir):
-            if file.startswith("download"):
-                output_file = os.path.join(temp_dir, file)
-                break
-
-        if not output_file or not os.path.exists(output_file):
-            raise HTTPException(status_code=500, detail="Failed to create merged file")
+        async with lifecycle.busy():
+            output_file = await ytdlp_service.run(
+                ytdlp_service.download_formats, info, format_selector, temp_dir,
+                priority=DOWNLOAD,
+            )
 
         # Stream the file
         def iterfile():
             with open(output_file, "rb") as f:
                 while chunk := f.read(8192):
                     yield chunk
+
+        async def cleanup():
             # Cleanup after streaming
-            try:
-                os.remove(output_file)
-                os.rmdir(temp_dir)
-            except:
-                pass
+            lifecycle.remove_temp_dir(temp_dir)
 
         file_size = os.path.getsize(output_file)
 
-        return StreamingResponse(
-            iterfile(),
+        return _stream_response(
+            iterate_in_threadpool(iterfile()),
+            cleanup,
             media_type="video/mp4",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"',
@@ -200,12 +534,6 @@ async def download_merged(
 
     except Exception as e:
         # Cleanup on error
-        try:
-            if os.path.exists(temp_dir):
-                import shutil
-
-                shutil.rmtree(temp_dir)
-        except:
-            pass
+        lifecycle.remove_temp_dir(temp_dir)
         logger.error(f"Failed to download merged format: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Merge download failed: {str(e)}")
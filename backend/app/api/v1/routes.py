@@ -1,11 +1,17 @@
 """Main API v1 router"""
 
 from fastapi import APIRouter
-from app.api.v1.endpoints import analyze, download, proxy
+from app.config import settings
+from app.api.v1.endpoints import admin, analyze, download, playlist, proxy
 
 router = APIRouter()
 
 # Include endpoint routers
 router.include_router(analyze.router)
 router.include_router(download.router)
+router.include_router(playlist.router)
 router.include_router(proxy.router)
+
+# Admin tools are only mounted when an admin token is configured
+if settings.ADMIN_TOKEN:
+    router.include_router(admin.router)
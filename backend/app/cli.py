@@ -0,0 +1,147 @@
+"""Headless bulk downloader
+
+Downloads every URL of a list file with the service layer directly, without
+the HTTP API, and appends one JSON line per item to a manifest. Run it again
+with the same output directory to resume.
+
+Run from the backend directory:
+
+    python -m app.cli urls.txt --output-dir downloads --preset 720p \\
+        --extract-workers 4 --download-workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import List
+
+
+def read_urls(path: str) -> List[str]:
+    """URLs of a list file (``-`` for stdin), skipping blank lines and # comments"""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def configure(args: argparse.Namespace) -> None:
+    """
+    Size the extraction executor for this run
+
+    Must run before the app modules are imported, since settings are read
+    at import time. The API's reservations for /analyze do not apply here;
+    merges are capped at the download workers so extraction always has
+    ``--extract-workers`` threads.
+    """
+    os.environ["EXTRACTION_WORKERS"] = str(args.extract_workers + args.download_workers)
+    os.environ["EXTRACTION_RESERVED_INTERACTIVE"] = "0"
+    os.environ["EXTRACTION_RESERVED_FORMATS"] = "0"
+    os.environ["EXTRACTION_MAX_DOWNLOADS"] = str(args.download_workers)
+
+
+async def report_progress(downloader, interval: float) -> None:
+    """Print counts and aggregate throughput to stderr until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        s = downloader.summary()
+        finished = s["done"] + s["failed"] + s["skipped"]
+        print(
+            f"[{finished}/{s['total']}] done {s['done']}, failed {s['failed']}, "
+            f"skipped {s['skipped']}, {format_bytes(s['bytes'])} "
+            f"at {format_bytes(s['bytes_per_second'])}/s",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+async def run(args: argparse.Namespace, urls: List[str]) -> dict:
+    from app.core.http_client import close_http_client
+    from app.services.bulk_download import BulkDownloader
+    from app.services.ytdlp_service import ytdlp_service
+
+    try:
+        downloader = BulkDownloader(
+            output_dir=args.output_dir,
+            manifest_path=args.manifest or os.path.join(args.output_dir, "manifest.jsonl"),
+            preset=args.preset,
+            extract_workers=args.extract_workers,
+            download_workers=args.download_workers,
+            resume=not args.no_resume,
+        )
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+
+    progress = (
+        asyncio.create_task(report_progress(downloader, args.progress_interval))
+        if args.progress_interval > 0
+        else None
+    )
+    try:
+        return await downloader.run(urls)
+    finally:
+        if progress is not None:
+            progress.cancel()
+        ytdlp_service.shutdown()
+        await close_http_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("input", help="File with one URL per line ('-' for stdin)")
+    parser.add_argument("--output-dir", "-o", default="downloads")
+    parser.add_argument(
+        "--manifest", default=None, help="JSONL manifest (default: <output-dir>/manifest.jsonl)"
+    )
+    parser.add_argument(
+        "--preset", default="best", help="Quality preset: best, 1080p, 720p-h264, audio, audio-m4a, ..."
+    )
+    parser.add_argument("--extract-workers", type=int, default=4)
+    parser.add_argument("--download-workers", type=int, default=4)
+    parser.add_argument(
+        "--no-resume", action="store_true", help="Download everything again from scratch"
+    )
+    parser.add_argument(
+        "--progress-interval", type=float, default=2.0, help="Seconds between progress lines (0 = off)"
+    )
+    parser.add_argument("--verbose", "-v", action="store_true", help="Log every item")
+    args = parser.parse_args()
+    if args.extract_workers < 1 or args.download_workers < 1:
+        parser.error("worker counts must be at least 1")
+
+    configure(args)
+    from app.core.logger import logger
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    urls = read_urls(args.input)
+    started = time.monotonic()
+    try:
+        summary = asyncio.run(run(args, urls))
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume", file=sys.stderr)
+        sys.exit(130)
+
+    summary["wall_seconds"] = round(time.monotonic() - started, 2)
+    print(json.dumps(summary, indent=2))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
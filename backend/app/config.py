@@ -10,6 +10,9 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     ENVIRONMENT: str = "development"
+    # Proxies whose X-Forwarded-For/-Proto are trusted for the client address
+    # (comma-separated IPs/CIDRs, "*" when only a load balancer can reach the app)
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
     
     # CORS Settings
     ALLOWED_ORIGINS: str = "*"
@@ -23,6 +26,80 @@ class Settings(BaseSettings):
     MAX_DOWNLOAD_SIZE: int = 500000000  # 500MB
     TIMEOUT: int = 30
     
+    # Extraction cache (seconds / entries)
+    INFO_CACHE_TTL: int = 600
+    INFO_CACHE_MAX_ENTRIES: int = 256
+    
+    # Cache-Control max-age upper bound for GET /analyze and /download-info
+    HTTP_CACHE_MAX_AGE: int = 300
+    
+    # Playlist / channel paging
+    PLAYLIST_PAGE_SIZE: int = 50
+    PLAYLIST_MAX_PAGE_SIZE: int = 200
+    
+    # Failed extraction cache, seconds per error class (0 disables a class)
+    NEGATIVE_CACHE_MAX_ENTRIES: int = 1024
+    NEGATIVE_CACHE_TTL_UNSUPPORTED: int = 86400
+    NEGATIVE_CACHE_TTL_DRM: int = 86400
+    NEGATIVE_CACHE_TTL_PRIVATE: int = 1800  # private, unavailable, geo-restricted
+    NEGATIVE_CACHE_TTL_EXTRACTION: int = 300
+    NEGATIVE_CACHE_TTL_AUTH: int = 60  # bot detection / sign-in required
+    NEGATIVE_CACHE_TTL_NETWORK: int = 15
+    
+    # /analyze fast path (oEmbed/OpenGraph before a full yt-dlp extraction)
+    FAST_METADATA_ENABLED: bool = True
+    FAST_METADATA_TIMEOUT: float = 3.0
+    INSTAGRAM_OEMBED_TOKEN: str = ""  # Facebook app token ("app-id|client-token")
+    
+    # Shared SQLite extraction store (empty path = system temp dir)
+    METADATA_STORE_ENABLED: bool = True
+    METADATA_STORE_PATH: str = ""
+    METADATA_STORE_TTL: int = 1800
+    METADATA_STORE_COMPACT_INTERVAL: int = 300
+    
+    # Download tokens (secret must be shared by all workers)
+    DOWNLOAD_TOKEN_SECRET: str = ""
+    DOWNLOAD_TOKEN_TTL: int = 21600  # 6 hours, capped by upstream URL expiry
+    ALLOW_RAW_PROXY_URLS: bool = False
+    
+    # Upstream URL refresh
+    URL_EXPIRY_MARGIN: int = 120  # re-resolve URLs expiring within this many seconds
+    MAX_URL_REFRESHES: int = 2  # per proxied download
+    
+    # Worker pools
+    EXTRACTION_WORKERS: int = 4
+    EXTRACTION_RESERVED_INTERACTIVE: int = 1  # workers only /analyze metadata may use
+    EXTRACTION_RESERVED_FORMATS: int = 1  # workers only format listing may use
+    EXTRACTION_MAX_DOWNLOADS: int = 2  # concurrent yt-dlp downloads/merges, 0 = no cap
+    EXTRACTION_AGING_SECONDS: float = 5.0  # queue time that raises a job one priority
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    
+    # Egress bandwidth (thumbnails are served before downloads, clients share fairly)
+    EGRESS_LIMIT_BPS: int = 0  # bytes per second for proxied media, 0 = unlimited
+    EGRESS_BURST_BYTES: int = 262144
+    
+    # HLS/DASH segment downloads
+    SEGMENT_FETCH_WINDOW: int = 4  # segments fetched ahead of the one being sent
+    SEGMENT_MAX_RETRIES: int = 3
+    SEGMENT_TIMEOUT: float = 30.0
+    
+    # Audio transcoding
+    FFMPEG_PATH: str = "ffmpeg"
+    MAX_TRANSCODERS: int = 0  # concurrent ffmpeg processes, 0 = CPU count
+    TRANSCODE_QUEUE_TIMEOUT: float = 10.0  # seconds to wait for a free transcoder
+    
+    # Event loop lag monitor (stacks of stalls are logged when DEBUG is on)
+    LOOP_MONITOR_INTERVAL: float = 0.5  # seconds between samples, 0 = off
+    LOOP_LAG_THRESHOLD: float = 0.1  # lag in seconds reported as a stall
+    
+    # Admin profiling endpoints and X-URLens-Profile header (disabled when empty)
+    ADMIN_TOKEN: str = ""
+    
+    # Graceful shutdown (seconds)
+    SHUTDOWN_READINESS_DELAY: float = 5.0  # time for the load balancer to route away
+    SHUTDOWN_DRAIN_TIMEOUT: float = 25.0  # max wait for in-flight streams
+    
     @property
     def cors_origins(self) -> List[str]:
         """Parse ALLOWED_ORIGINS into a list"""
@@ -0,0 +1,208 @@
+"""Egress bandwidth scheduler
+
+Proxied downloads otherwise compete freely for the worker's uplink, so one
+client pulling several large files starves everyone else's thumbnails. The
+scheduler is a single token bucket refilled at EGRESS_LIMIT_BPS that every
+throttled response body draws from before each chunk is sent:
+
+- Traffic classes have strict priority: thumbnail chunks are granted before
+  any waiting download chunk.
+- Within a class, waiting clients are served round-robin one slice at a
+  time, so each active client gets an equal share whatever the number of
+  streams it opens.
+- Waiting is an ``await`` on a future resolved by a dispatcher task, so no
+  thread ever sleeps and an idle bucket adds no latency.
+
+With EGRESS_LIMIT_BPS=0 nothing is throttled; bytes are still counted per
+class for the throughput metrics.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.metrics import THROUGHPUT_BUCKETS, metrics
+
+# Traffic class -> priority (lower is served first)
+TRAFFIC_CLASSES: Dict[str, int] = {"thumbnail": 0, "download": 1}
+
+# Throttled paths and their traffic class
+ROUTE_CLASSES: Dict[str, str] = {
+    "/api/v1/proxy": "thumbnail",
+    "/api/v1/proxy-download": "download",
+    "/api/v1/download-merged": "download",
+    "/api/v1/download-preset": "download",
+    "/api/v1/download-audio": "download",
+}
+
+# Largest grant; bigger body chunks are split so round-robin stays fair in bytes
+SLICE_BYTES = 64 * 1024
+
+
+@dataclass
+class _Waiter:
+    size: int
+    future: "asyncio.Future[None]"
+
+
+class BandwidthScheduler:
+    """Token bucket shared by all throttled streams of the worker"""
+
+    def __init__(self, rate: int, burst: int):
+        """
+        Args:
+            rate: Egress cap in bytes per second (0 = unlimited)
+            burst: Bucket size in bytes
+        """
+        self.rate = rate
+        self.burst = max(burst, SLICE_BYTES)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {
+            priority: OrderedDict() for priority in sorted(set(TRAFFIC_CLASSES.values()))
+        }
+        self._waiting = 0
+        self._dispatcher: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def limited(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self, traffic_class: str, client: str, size: int) -> None:
+        """
+        Wait until ``size`` bytes may be sent for a client
+
+        Args:
+            traffic_class: Key of TRAFFIC_CLASSES
+            client: Client identity to share bandwidth fairly between
+            size: Bytes about to be sent (at most SLICE_BYTES)
+        """
+        self._refill()
+        if not self._waiting and self._tokens >= size:
+            self._tokens -= size
+            return
+
+        waiter = _Waiter(size, asyncio.get_running_loop().create_future())
+        queue = self._queues[TRAFFIC_CLASSES[traffic_class]]
+        queue.setdefault(client, deque()).append(waiter)
+        self._waiting += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        started = time.monotonic()
+        await waiter.future
+        metrics.observe(
+            "egress_throttle_wait_seconds", time.monotonic() - started, traffic_class=traffic_class
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _head(self) -> Optional[Tuple["OrderedDict[str, Deque[_Waiter]]", str]]:
+        """Queue and client whose chunk goes next: highest priority, then round-robin"""
+        for queue in self._queues.values():
+            while queue:
+                client, waiters = next(iter(queue.items()))
+                while waiters and waiters[0].future.done():
+                    # Stream went away (client disconnected) while waiting
+                    waiters.popleft()
+                    self._waiting -= 1
+                if waiters:
+                    return queue, client
+                del queue[client]
+        return None
+
+    async def _dispatch(self) -> None:
+        """Hand out tokens to waiters in priority and round-robin order"""
+        while True:
+            head = self._head()
+            if head is None:
+                return
+            queue, client = head
+            waiters = queue[client]
+            self._refill()
+            deficit = waiters[0].size - self._tokens
+            if deficit > 0:
+                # Re-pick after the wait: a higher priority chunk may have queued
+                await asyncio.sleep(deficit / self.rate)
+                continue
+
+            waiter = waiters.popleft()
+            self._waiting -= 1
+            self._tokens -= waiter.size
+            waiter.future.set_result(None)
+            if waiters:
+                queue.move_to_end(client)
+            else:
+                del queue[client]
+
+
+class BandwidthMiddleware:
+    """Pace the response bodies of throttled routes through the scheduler"""
+
+    def __init__(self, app: ASGIApp, scheduler: BandwidthScheduler):
+        self.app = app
+        self.scheduler = scheduler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        traffic_class = ROUTE_CLASSES.get(scope["path"]) if scope["type"] == "http" else None
+        if traffic_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        # The real client behind trusted proxies (uvicorn applies X-Forwarded-For)
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        scheduler = self.scheduler
+        started = time.monotonic()
+        sent = 0
+
+        async def paced_send(message: Message) -> None:
+            nonlocal sent
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if scheduler.limited and len(body) > SLICE_BYTES:
+                view = memoryview(body)
+                for offset in range(0, len(body), SLICE_BYTES):
+                    piece = view[offset:offset + SLICE_BYTES]
+                    await scheduler.acquire(traffic_class, client, len(piece))
+                    last = offset + SLICE_BYTES >= len(body)
+                    await send({
+                        "type": "http.response.body",
+                        "body": bytes(piece),
+                        "more_body": more_body or not last,
+                    })
+            else:
+                if scheduler.limited and body:
+                    await scheduler.acquire(traffic_class, client, len(body))
+                await send(message)
+            sent += len(body)
+            metrics.inc("egress_bytes_total", len(body), traffic_class=traffic_class)
+
+        try:
+            await self.app(scope, receive, paced_send)
+        finally:
+            elapsed = time.monotonic() - started
+            if sent and elapsed > 0:
+                metrics.observe(
+                    "egress_stream_bytes_per_second",
+                    sent / elapsed,
+                    THROUGHPUT_BUCKETS,
+                    traffic_class=traffic_class,
+                )
+
+
+# Global instance
+bandwidth_scheduler = BandwidthScheduler(
+    rate=settings.EGRESS_LIMIT_BPS,
+    burst=settings.EGRESS_BURST_BYTES,
+)
@@ -25,6 +25,12 @@ class ExtractionException(URLensException):
     pass
 
 
+class AuthenticationRequiredException(ExtractionException):
+    """Raised when the site demands a signed-in session (e.g. YouTube bot checks)"""
+
+    pass
+
+
 class DRMProtectedException(URLensException):
     """Raised when content is protected by DRM"""
 
@@ -35,3 +41,33 @@ class NetworkException(URLensException):
     """Raised when network error occurs"""
 
     pass
+
+
+class InvalidTokenException(URLensException):
+    """Raised when a download token is malformed, forged or unknown"""
+
+    pass
+
+
+class TokenExpiredException(URLensException):
+    """Raised when a download token has expired"""
+
+    pass
+
+
+class TranscodeException(URLensException):
+    """Raised when ffmpeg cannot be started or fails"""
+
+    pass
+
+
+class TranscoderBusyException(URLensException):
+    """Raised when every transcoder slot stays busy past the queue timeout"""
+
+    pass
+
+
+class ServiceShuttingDownException(URLensException):
+    """Raised when queued or new work is rejected because the worker is shutting down"""
+
+    pass
@@ -0,0 +1,88 @@
+"""HTTP caching helpers for GET endpoints
+
+Responses are serialized once per extraction result and served with a
+strong ETag (a hash of the exact body bytes) and a ``max-age`` that never
+outlives the signed media URLs inside them. A matching ``If-None-Match``
+gets an empty 304.
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request, Response, status
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class RenderedBody:
+    """A serialized JSON body, its ETag and when its contents go stale"""
+
+    body: bytes
+    etag: str
+    expires_at: Optional[float] = None
+
+    @classmethod
+    def render(cls, content: Any, expires_at: Optional[float] = None) -> "RenderedBody":
+        """Serialize ``content`` with orjson and hash it into a strong ETag"""
+        body = orjson.dumps(content)
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        return cls(body=body, etag=etag, expires_at=expires_at)
+
+    def max_age(self, now: Optional[float] = None) -> int:
+        """Seconds a cache may reuse the body: capped by HTTP_CACHE_MAX_AGE and expiry"""
+        max_age = settings.HTTP_CACHE_MAX_AGE
+        if self.expires_at is not None:
+            remaining = self.expires_at - settings.URL_EXPIRY_MARGIN - (now or time.time())
+            max_age = min(max_age, int(remaining))
+        return max(max_age, 0)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against an ETag
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    ``W/"x"`` matches ``"x"``.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cached_json_response(
+    request: Request, rendered: RenderedBody, private: bool = False
+) -> Response:
+    """
+    Serve a rendered body with validators, or 304 if the client has it
+
+    Args:
+        request: The incoming request (for If-None-Match)
+        rendered: The body to serve
+        private: The body is specific to this client (e.g. extracted with
+            its browser cookies) and must not be stored by any cache
+    """
+    max_age = rendered.max_age()
+    if private:
+        cache_control = "private, no-store"
+    elif max_age:
+        cache_control = f"public, max-age={max_age}"
+    else:
+        cache_control = "no-cache"
+    headers = {
+        "ETag": rendered.etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), rendered.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=rendered.body, media_type="application/json", headers=headers)
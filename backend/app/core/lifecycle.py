@@ -0,0 +1,134 @@
+"""Process lifecycle: readiness, admission control and stream draining
+
+On shutdown the worker first stops reporting ready and stops admitting new
+API work, then lets in-flight streams finish up to a deadline before pooled
+resources are closed.
+"""
+
+import asyncio
+import shutil
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Set
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.logger import logger
+
+# Paths that keep answering while draining (liveness, readiness, metrics)
+_ALWAYS_ADMITTED = ("/health", "/ready", "/metrics")
+
+
+class Lifecycle:
+    """Readiness flag, in-flight stream accounting and temp dir tracking"""
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.active_streams = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._temp_dirs: Set[str] = set()
+
+    def start(self) -> None:
+        """Mark the worker ready to receive traffic (no-op once draining)"""
+        if not self.draining:
+            self.ready = True
+
+    def begin_shutdown(self) -> None:
+        """Stop reporting ready and stop admitting new work"""
+        if not self.draining:
+            logger.info(f"Draining: {self.active_streams} active stream(s)")
+        self.ready = False
+        self.draining = True
+
+    @asynccontextmanager
+    async def busy(self) -> AsyncIterator[None]:
+        """Count a block of download work (e.g. a merge) as in flight"""
+        self.active_streams += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.active_streams -= 1
+            if self.active_streams == 0:
+                self._idle.set()
+
+    async def track(self, iterator: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Wrap a response body so shutdown can wait for it to finish"""
+        async with self.busy():
+            async for chunk in iterator:
+                yield chunk
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait for in-flight streams to finish
+
+        Args:
+            timeout: Deadline in seconds
+
+        Returns:
+            True if all streams finished before the deadline
+        """
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Drain deadline reached with {self.active_streams} active stream(s)"
+            )
+            return False
+        logger.info(f"Drained in {time.monotonic() - started:.1f}s")
+        return True
+
+    def add_temp_dir(self, path: str) -> None:
+        """Register a temp dir to remove if the process stops before its stream does"""
+        self._temp_dirs.add(path)
+
+    def remove_temp_dir(self, path: str) -> None:
+        """Delete a temp dir and stop tracking it"""
+        self._temp_dirs.discard(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def cleanup_temp_dirs(self) -> None:
+        """Delete every temp dir still registered"""
+        for path in list(self._temp_dirs):
+            self.remove_temp_dir(path)
+
+
+class AdmissionMiddleware:
+    """Reject new API requests with 503 while the worker is draining"""
+
+    def __init__(self, app: ASGIApp, lifecycle: "Lifecycle"):
+        self.app = app
+        self.lifecycle = lifecycle
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and self.lifecycle.draining
+            and not scope["path"].startswith(_ALWAYS_ADMITTED)
+        ):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"retry-after", b"5"),
+                        (b"connection", b"close"),
+                    ],
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": b'{"detail":"Server is shutting down"}',
+                }
+            )
+            return
+        await self.app(scope, receive, send)
+
+
+# Global instance
+lifecycle = Lifecycle()
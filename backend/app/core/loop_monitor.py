@@ -0,0 +1,94 @@
+"""Event loop lag monitor
+
+A blocking call on the event loop (a sync yt-dlp call, a file read, a CPU
+heavy loop) stalls every request and stream on the worker. The monitor
+sleeps for a fixed interval and measures how late it wakes up; the excess
+is the scheduling delay every other coroutine saw too. It costs one timer
+per interval, so it stays on in production.
+
+In debug mode a watchdog thread also notices when the loop has not ticked
+for longer than the threshold and logs the loop thread's current stack,
+i.e. the code that is holding the loop.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+# Lag bounds in seconds: sub-millisecond is healthy, above 100 ms is felt by clients
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LoopMonitor:
+    """Samples event loop scheduling delay and reports stalls"""
+
+    def __init__(self, interval: float, threshold: float, dump_stacks: bool):
+        """
+        Args:
+            interval: Seconds between samples (0 disables the monitor)
+            threshold: Lag in seconds counted as a stall
+            dump_stacks: Log the loop thread's stack while it is stalled
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.dump_stacks = dump_stacks
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+
+    async def run(self) -> None:
+        """Sample until cancelled"""
+        if self.interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        stop = threading.Event()
+        if self.dump_stacks:
+            threading.Thread(
+                target=self._watch, args=(stop,), name="loop-watchdog", daemon=True
+            ).start()
+
+        try:
+            while True:
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - expected)
+                self._last_tick = time.monotonic()
+                metrics.observe("event_loop_lag_seconds", lag, LAG_BUCKETS)
+                if lag >= self.threshold:
+                    metrics.inc("event_loop_stalls_total")
+                    logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+        finally:
+            stop.set()
+
+    def _watch(self, stop: threading.Event) -> None:
+        """Watchdog thread: dump the loop thread's stack once per stall"""
+        reported = 0.0
+        while not stop.wait(self.threshold / 2):
+            tick = self._last_tick
+            stalled = time.monotonic() - tick - self.interval
+            if stalled < self.threshold or tick == reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)  # type: ignore[arg-type]
+            if frame is None:
+                continue
+            reported = tick
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                f"Event loop blocked for {stalled * 1000:.0f} ms so far, loop thread stack:\n{stack}"
+            )
+
+
+# Global instance
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_LAG_THRESHOLD,
+    dump_stacks=settings.DEBUG,
+)
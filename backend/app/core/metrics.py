@@ -0,0 +1,97 @@
+"""In-process metrics registry
+
+Counters and histograms are kept per worker process and exposed as JSON on
+``/metrics``. Labels are passed as keyword arguments and flattened into a
+``key=value,...`` string so snapshots stay plain JSON.
+"""
+
+import bisect
+import threading
+from typing import Dict, Sequence, Tuple
+
+# Upper bounds in seconds, suitable for request and queue latencies
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Transfer rates in bytes per second, from slow mobile links to local networks
+THROUGHPUT_BUCKETS: Tuple[float, ...] = (
+    1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8,
+)
+
+
+def _label_key(labels: Dict[str, object]) -> str:
+    return ",".join(f"{k}={labels[k]}" for k in sorted(labels))
+
+
+class Histogram:
+    """Cumulative-bucket histogram"""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, object]:
+        buckets: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            buckets[str(bound)] = running
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: object) -> None:
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        **labels: object,
+    ) -> None:
+        """Record a value in a histogram"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Return all metrics as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "histograms": {
+                    name: {key: h.snapshot() for key, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+
+# Global instance
+metrics = Metrics()
@@ -4,7 +4,10 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
+from app.core.bandwidth import BandwidthMiddleware, bandwidth_scheduler
+from app.core.lifecycle import AdmissionMiddleware, lifecycle
 from app.core.logger import logger
+from app.core.profiling import ProfileMiddleware
 from app.core.exceptions import (
     URLensException,
     UnsupportedURLException,
@@ -12,6 +15,11 @@ from app.core.exceptions import (
     DRMProtectedException,
     ExtractionException,
     NetworkException,
+    InvalidTokenException,
+    TokenExpiredException,
+    TranscodeException,
+    TranscoderBusyException,
+    ServiceShuttingDownException,
 )
 
 
@@ -27,6 +35,22 @@ def setup_cors(app: FastAPI) -> None:
     )
 
 
+def setup_admission(app: FastAPI) -> None:
+    """Reject new API work with 503 while the worker drains for shutdown"""
+    app.add_middleware(AdmissionMiddleware, lifecycle=lifecycle)
+
+
+def setup_bandwidth(app: FastAPI) -> None:
+    """Share egress between proxied streams (capped by EGRESS_LIMIT_BPS)"""
+    app.add_middleware(BandwidthMiddleware, scheduler=bandwidth_scheduler)
+
+
+def setup_profiling(app: FastAPI) -> None:
+    """Profile admin requests sent with X-URLens-Profile (only if ADMIN_TOKEN is set)"""
+    if settings.ADMIN_TOKEN:
+        app.add_middleware(ProfileMiddleware)
+
+
 def setup_exception_handlers(app: FastAPI) -> None:
     """Configure exception handlers"""
 
@@ -76,6 +100,50 @@ def setup_exception_handlers(app: FastAPI) -> None:
             content={"detail": f"Network error: {str(exc)}"},
         )
 
+    @app.exception_handler(InvalidTokenException)
+    async def invalid_token_handler(request: Request, exc: InvalidTokenException):
+        logger.warning(f"Invalid download token: {str(exc)}")
+        return JSONResponse(
+            status_code=status.HTTP_403_FORBIDDEN,
+            content={"detail": f"Invalid download token: {str(exc)}"},
+        )
+
+    @app.exception_handler(TokenExpiredException)
+    async def token_expired_handler(request: Request, exc: TokenExpiredException):
+        logger.info(f"Expired download token: {str(exc)}")
+        return JSONResponse(
+            status_code=status.HTTP_410_GONE,
+            content={
+                "detail": "Download link has expired. Please request download info again."
+            },
+        )
+
+    @app.exception_handler(TranscodeException)
+    async def transcode_handler(request: Request, exc: TranscodeException):
+        logger.error(f"Transcode error: {str(exc)}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": str(exc)},
+        )
+
+    @app.exception_handler(TranscoderBusyException)
+    async def transcoder_busy_handler(request: Request, exc: TranscoderBusyException):
+        logger.warning(f"Transcoder busy: {str(exc)}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "5"},
+        )
+
+    @app.exception_handler(ServiceShuttingDownException)
+    async def shutting_down_handler(request: Request, exc: ServiceShuttingDownException):
+        logger.warning(f"Rejected during shutdown: {str(exc)}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "5"},
+        )
+
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
         logger.error(f"Unexpected error: {str(exc)}", exc_info=True)
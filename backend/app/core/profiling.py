@@ -0,0 +1,284 @@
+"""Admin-only profiling of a live worker
+
+Three tools, all inactive unless ADMIN_TOKEN is set and an admin asks:
+
+- ``X-URLens-Profile`` request header: the request runs under cProfile
+  (event loop thread plus any extraction executor work it triggers) and the
+  response body is replaced with the pstats report.
+- ``sample_stacks``: samples every thread's stack for a few seconds and
+  returns collapsed stacks (flamegraph / speedscope input).
+- ``TracemallocTracker``: start tracing, then diff snapshots to find growth.
+
+With ADMIN_TOKEN unset the middleware and admin routes are not registered;
+the only remaining hook is one ContextVar lookup in ``YTDLPService.run``.
+"""
+
+import contextvars
+import cProfile
+import functools
+import hmac
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.core.logger import logger
+
+T = TypeVar("T")
+
+PROFILE_HEADER = "x-urlens-profile"
+ADMIN_TOKEN_HEADER = "x-urlens-admin-token"
+_SORT_KEYS = {"cumulative", "tottime", "calls", "ncalls", "time"}
+_REPORT_LINES = 80
+
+
+def is_admin(headers: Headers) -> bool:
+    """Whether the request carries the configured admin token"""
+    token = headers.get(ADMIN_TOKEN_HEADER, "")
+    return bool(settings.ADMIN_TOKEN) and hmac.compare_digest(
+        token.encode("utf-8"), settings.ADMIN_TOKEN.encode("utf-8")
+    )
+
+
+class RequestProfile:
+    """cProfile data collected for one request across threads"""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Enable a profiler for the calling thread, or None if one is already active"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles all threads with a single active profiler
+            return None
+        with self._lock:
+            self.profiles.append(profile)
+        return profile
+
+    def report(self, sort: str) -> str:
+        """Merged pstats report of every thread's profile"""
+        out = io.StringIO()
+        with self._lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return "No profile data collected\n"
+        stats = pstats.Stats(profiles[0], stream=out)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.strip_dirs().sort_stats(sort).print_stats(_REPORT_LINES)
+        return out.getvalue()
+
+
+# Profile of the request being handled in the current context, if any
+_active_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "urlens_profile", default=None
+)
+
+
+def bind_profile(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Make ``func`` profile itself when it runs on another thread
+
+    Returns ``func`` unchanged unless the calling request is being profiled.
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        return func
+
+    @functools.wraps(func)
+    def profiled(*args: Any, **kwargs: Any) -> T:
+        thread_profile = profile.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if thread_profile is not None:
+                thread_profile.disable()
+
+    return profiled
+
+
+class ProfileMiddleware:
+    """Replace the response of an admin request sent with X-URLens-Profile by its profile"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # cProfile on the loop thread sees every coroutine it runs, so
+        # profiled requests are serialized to keep reports readable
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER not in headers or not is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await _send_text(send, 409, "Another request is being profiled\n")
+            return
+
+        try:
+            sort = headers[PROFILE_HEADER].strip().lower()
+            sort = sort if sort in _SORT_KEYS else "cumulative"
+            status = 0
+            body_bytes = 0
+
+            async def capture(message: Message) -> None:
+                nonlocal status, body_bytes
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                elif message["type"] == "http.response.body":
+                    body_bytes += len(message.get("body", b""))
+
+            profile = RequestProfile()
+            token = _active_profile.set(profile)
+            loop_profile = profile.start()
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                elapsed = time.perf_counter() - started
+                if loop_profile is not None:
+                    loop_profile.disable()
+                _active_profile.reset(token)
+
+            logger.info(f"Profiled {scope['path']} ({elapsed * 1000:.1f} ms)")
+            report = (
+                f"{scope['method']} {scope['path']} -> {status}, "
+                f"{body_bytes} body bytes, {elapsed * 1000:.1f} ms wall\n\n"
+                + profile.report(sort)
+            )
+            await _send_text(send, 200, report, {"x-urlens-profiled-status": str(status)})
+        finally:
+            self._busy.release()
+
+
+async def _send_text(
+    send: Send, status: int, text: str, extra_headers: Optional[Dict[str, str]] = None
+) -> None:
+    body = text.encode("utf-8")
+    headers = [
+        (b"content-type", b"text/plain; charset=utf-8"),
+        (b"content-length", str(len(body)).encode("ascii")),
+        (b"cache-control", b"no-store"),
+    ]
+    headers.extend((k.encode("latin-1"), v.encode("latin-1")) for k, v in (extra_headers or {}).items())
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def sample_stacks(seconds: float, interval: float) -> str:
+    """
+    Sample the stacks of all threads (except this one) for a while
+
+    Blocking; run it off the event loop.
+
+    Args:
+        seconds: Capture duration
+        interval: Seconds between samples
+
+    Returns:
+        Collapsed stacks, one ``thread;outer;...;inner count`` line each,
+        most frequent first (input for flamegraph.pl or speedscope)
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+
+    lines = [f"# {samples} samples over {seconds:.1f}s at {interval * 1000:.0f} ms"]
+    lines.extend(f"{stack} {count}" for stack, count in counts.most_common())
+    return "\n".join(lines) + "\n"
+
+
+class TracemallocTracker:
+    """Start/stop tracemalloc and diff snapshots against a baseline"""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int) -> None:
+        """Start tracing and take the baseline snapshot"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        """Stop tracing and drop the baseline (tracing costs memory and CPU)"""
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+
+    def diff(self, limit: int, key_type: str, reset: bool) -> Dict[str, Any]:
+        """
+        Compare a new snapshot with the baseline
+
+        Args:
+            limit: Number of top differences to return
+            key_type: ``lineno``, ``filename`` or ``traceback``
+            reset: Make the new snapshot the baseline for the next diff
+
+        Raises:
+            RuntimeError: If tracing is not started
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._baseline is None:
+                raise RuntimeError("tracemalloc is not started")
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+            stats = snapshot.compare_to(self._baseline, key_type)
+            if reset:
+                self._baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": [
+                {
+                    "location": str(stat.traceback) if key_type != "traceback"
+                    else stat.traceback.format(),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+# Global instance
+tracemalloc_tracker = TracemallocTracker()
@@ -1,10 +1,13 @@
 """Request models"""
-from pydantic import BaseModel, HttpUrl, field_validator
+from typing import Optional
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, HttpUrl, ValidationError, field_validator
 
 
 class URLRequest(BaseModel):
     """Request model for URL-based endpoints"""
     url: str
+    retry_with_cookies: bool = False  # signed in since the last failure: retry with browser cookies
     
     @field_validator('url')
     @classmethod
@@ -29,3 +32,37 @@ class URLRequest(BaseModel):
             ]
         }
     }
+
+
+def validated_url(url: str) -> str:
+    """Apply URLRequest's URL validation to a query parameter"""
+    try:
+        return URLRequest(url=url).url
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+class PlaylistRequest(URLRequest):
+    """Request model for one page of a playlist or channel"""
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    
+    @field_validator('limit')
+    @classmethod
+    def validate_limit(cls, v: Optional[int]) -> Optional[int]:
+        """Validate page size"""
+        if v is not None and v < 1:
+            raise ValueError('limit must be at least 1')
+        return v
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "url": "https://www.youtube.com/@YouTube/videos",
+                    "cursor": None,
+                    "limit": 50
+                }
+            ]
+        }
+    }
@@ -28,6 +28,7 @@ class DownloadOption(BaseModel):
     extension: str
     file_size_approx: Optional[int] = None
     download_url: str
+    download_token: Optional[str] = None
     
     model_config = {
         "json_schema_extra": {
@@ -36,7 +37,8 @@ class DownloadOption(BaseModel):
                     "quality_label": "1080p",
                     "extension": "mp4",
                     "file_size_approx": 45582999,
-                    "download_url": "https://direct-expiring-link..."
+                    "download_url": "https://direct-expiring-link...",
+                    "download_token": "q3x9Vb0aJt4lWm2fZk1hNGE5.3nq0X8h1p0Zr2Kx6c9a8Vw"
                 }
             ]
         }
@@ -46,6 +48,7 @@ class DownloadOption(BaseModel):
 class DownloadInfoResponse(BaseModel):
     """Response model for download information"""
     download_options: List[DownloadOption]
+    available_presets: List[str] = []
     
     model_config = {
         "json_schema_extra": {
@@ -64,7 +67,50 @@ class DownloadInfoResponse(BaseModel):
                             "file_size_approx": 25165824,
                             "download_url": "https://direct-expiring-link-to-720p-video..."
                         }
-                    ]
+                    ],
+                    "available_presets": ["best", "1080p", "1080p-h264", "720p", "audio", "audio-m4a"]
+                }
+            ]
+        }
+    }
+
+
+class PlaylistEntry(BaseModel):
+    """Lightweight playlist entry; pass its url to /download-info for formats"""
+    id: Optional[str] = None
+    title: str
+    url: str
+    thumbnail_url: Optional[str] = None
+    duration: Optional[float] = None
+
+
+class PlaylistPageResponse(BaseModel):
+    """Response model for one page of a playlist or channel"""
+    id: Optional[str] = None
+    title: str
+    uploader: Optional[str] = None
+    entry_count: Optional[int] = None
+    entries: List[PlaylistEntry]
+    next_cursor: Optional[str] = None
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "id": "PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI",
+                    "title": "Popular Music Videos",
+                    "uploader": "YouTube",
+                    "entry_count": 200,
+                    "entries": [
+                        {
+                            "id": "dQw4w9WgXcQ",
+                            "title": "Rick Astley - Never Gonna Give You Up (Official Music Video)",
+                            "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+                            "thumbnail_url": "https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg",
+                            "duration": 212
+                        }
+                    ],
+                    "next_cursor": "NTE"
                 }
             ]
         }
@@ -0,0 +1,372 @@
+"""Bulk downloads straight through the service layer
+
+Batch jobs that drive the HTTP API pay for a JSON round-trip, a token and a
+proxy hop per file. ``BulkDownloader`` runs the same steps in-process:
+
+- extraction workers call ``get_info`` (shared caches and metadata store
+  included) and resolve the quality preset with the format table, exactly
+  as ``/download-preset`` does
+- download workers write the chosen format to disk: direct formats through
+  ``UpstreamStream`` (URL refresh and Range resume), HLS/DASH through the
+  segment fetcher, and video+audio pairs through ``download_formats``
+
+A bounded queue sits between the two pools, so extraction stays only a few
+items ahead of the downloads and signed URLs are not left to expire.
+
+Every finished item is appended to a JSONL manifest. A later run with the
+same manifest skips items already recorded as done, continues the partial
+file of a direct download with a Range request, and lets yt-dlp continue
+the partial files of a merge. Partial files live in a work directory per
+URL under ``.partial``.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.exceptions import ExtractionException, NetworkException
+from app.core.logger import logger
+from app.services.extraction_scheduler import DOWNLOAD
+from app.services.format_table import FormatTable, PresetSelection
+from app.services.info_cache import CachedInfo, normalize_url
+from app.services.media_service import default_filename
+from app.services.segment_service import is_segmented, open_segments
+from app.services.stream_service import FormatSource, open_upstream
+from app.services.ytdlp_service import ytdlp_service
+
+# Body chunk size for direct downloads
+CHUNK_SIZE = 256 * 1024
+
+# Per-URL work directories of unfinished downloads, under the output directory
+PARTIAL_DIR = ".partial"
+
+
+@dataclass
+class BulkResult:
+    """One manifest line"""
+
+    url: str
+    status: str  # "done" or "failed"
+    file: Optional[str] = None
+    bytes: int = 0
+    preset: Optional[str] = None
+    format: Optional[str] = None
+    method: Optional[str] = None  # "direct", "segments" or "merge"
+    resumed_from: int = 0
+    extract_seconds: float = 0.0
+    download_seconds: float = 0.0
+    bytes_per_second: float = 0.0
+    error: Optional[str] = None
+    finished_at: float = 0.0
+
+
+@dataclass
+class _Job:
+    url: str
+    cached: CachedInfo
+    selection: PresetSelection
+    extract_seconds: float
+
+
+class BulkDownloader:
+    """Downloads a list of URLs with separate extraction and download pools"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        manifest_path: str,
+        preset: str = "best",
+        extract_workers: int = 4,
+        download_workers: int = 4,
+        resume: bool = True,
+    ):
+        """
+        Args:
+            output_dir: Directory the files are written to
+            manifest_path: JSONL manifest to append results to
+            preset: Quality preset for every URL (``best``, ``720p``, ``audio``, ...)
+            extract_workers: Concurrent extractions
+            download_workers: Concurrent downloads
+            resume: Skip URLs the manifest records as done and continue partial files
+
+        Raises:
+            ValueError: If the preset is malformed
+        """
+        # Validates the preset syntax up front rather than once per URL
+        FormatTable().resolve_preset(preset)
+
+        self.output_dir = output_dir
+        self.manifest_path = manifest_path
+        self.preset = preset
+        self.extract_workers = max(1, extract_workers)
+        self.download_workers = max(1, download_workers)
+        self.resume = resume
+        self.ytdlp = ytdlp_service
+
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    async def run(self, urls: List[str]) -> Dict[str, Any]:
+        """
+        Download every URL, appending a manifest line per item
+
+        Args:
+            urls: Media page URLs (duplicates are downloaded once)
+
+        Returns:
+            Summary with item counts, bytes and aggregate throughput
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.resume:
+            completed = self._completed()
+        else:
+            completed = set()
+            shutil.rmtree(os.path.join(self.output_dir, PARTIAL_DIR), ignore_errors=True)
+
+        pending: "asyncio.Queue[str]" = asyncio.Queue()
+        seen: Set[str] = set()
+        for url in urls:
+            key = normalize_url(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            self.total += 1
+            if key in completed:
+                self.skipped += 1
+            else:
+                pending.put_nowait(url)
+
+        if self.skipped:
+            logger.info(f"Skipping {self.skipped} URLs already downloaded")
+
+        self.started = time.monotonic()
+        jobs: "asyncio.Queue[Optional[_Job]]" = asyncio.Queue(maxsize=self.download_workers)
+        extractors = [
+            asyncio.create_task(self._extract_worker(pending, jobs))
+            for _ in range(self.extract_workers)
+        ]
+        downloaders = [
+            asyncio.create_task(self._download_worker(jobs))
+            for _ in range(self.download_workers)
+        ]
+        try:
+            await asyncio.gather(*extractors)
+            for _ in downloaders:
+                await jobs.put(None)
+            await asyncio.gather(*downloaders)
+        finally:
+            # Interrupted: partial files stay behind for the next run
+            for task in extractors + downloaders:
+                task.cancel()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts so far, bytes transferred by this run and its throughput"""
+        elapsed = time.monotonic() - self.started
+        return {
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(elapsed, 2),
+            "bytes_per_second": round(self.bytes / elapsed) if elapsed > 0 else 0,
+        }
+
+    def _completed(self) -> Set[str]:
+        """Normalized URLs the manifest records as done whose file still exists"""
+        completed: Set[str] = set()
+        if not os.path.exists(self.manifest_path):
+            return completed
+        with open(self.manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # line cut short by an interrupted run
+                key = normalize_url(record.get("url") or "")
+                if record.get("status") == "done" and record.get("file") and os.path.exists(record["file"]):
+                    completed.add(key)
+                else:
+                    completed.discard(key)
+        return completed
+
+    async def _extract_worker(
+        self, pending: "asyncio.Queue[str]", jobs: "asyncio.Queue[Optional[_Job]]"
+    ) -> None:
+        while True:
+            try:
+                url = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            started = time.monotonic()
+            try:
+                cached = await self.ytdlp.run(self.ytdlp.get_info, url)
+                selection = cached.table.resolve_preset(self.preset)
+                if selection is None:
+                    raise ExtractionException(f"No format matches preset '{self.preset}'")
+            except Exception as e:
+                self._record(
+                    BulkResult(
+                        url=url,
+                        status="failed",
+                        preset=self.preset,
+                        extract_seconds=time.monotonic() - started,
+                        error=str(e) or type(e).__name__,
+                    )
+                )
+                continue
+            await jobs.put(_Job(url, cached, selection, time.monotonic() - started))
+
+    async def _download_worker(self, jobs: "asyncio.Queue[Optional[_Job]]") -> None:
+        while True:
+            job = await jobs.get()
+            if job is None:
+                return
+
+            result = BulkResult(
+                url=job.url,
+                status="failed",
+                preset=self.preset,
+                format=job.selection.format_selector,
+                extract_seconds=job.extract_seconds,
+            )
+            started = time.monotonic()
+            try:
+                direct = job.selection.direct
+                if direct is not None and is_segmented(direct.protocol):
+                    await self._download_segments(job, result)
+                elif direct is not None:
+                    await self._download_direct(job, result)
+                else:
+                    await self._download_merge(job, job.selection.format_selector, result)
+                result.status = "done"
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+            result.download_seconds = time.monotonic() - started
+            transferred = result.bytes - result.resumed_from
+            if result.status == "done" and result.download_seconds > 0:
+                result.bytes_per_second = transferred / result.download_seconds
+            self._record(result)
+
+    async def _download_direct(self, job: _Job, result: BulkResult) -> None:
+        """Stream a plain HTTP format to disk, continuing a previous .part file"""
+        entry = job.selection.direct
+        assert entry is not None
+        path = self._output_path(job, entry.ext)
+        part = os.path.join(self._work_dir(job.url), "download.part")
+        start = os.path.getsize(part) if self.resume and os.path.exists(part) else 0
+
+        upstream = await open_upstream(
+            entry.url, source=FormatSource(job.url, entry.format_id), start=start
+        )
+        try:
+            if upstream.status_code == 416 and start:
+                # The previous run got every byte but stopped before renaming
+                pass
+            elif upstream.status_code in (200, 206):
+                if upstream.status_code == 200:
+                    start = 0  # origin ignored the Range; start over
+                with open(part, "ab" if start else "wb") as f:
+                    async for chunk in upstream.iter_bytes(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        self.bytes += len(chunk)
+            else:
+                raise NetworkException(f"Upstream returned status {upstream.status_code}")
+        finally:
+            await upstream.aclose()
+
+        os.replace(part, path)
+        shutil.rmtree(self._work_dir(job.url), ignore_errors=True)
+        result.method = "direct"
+        result.resumed_from = start
+        self._finish(result, path)
+
+    async def _download_segments(self, job: _Job, result: BulkResult) -> None:
+        """Fetch an HLS/DASH format segment by segment (restarted, not resumed)"""
+        entry = job.selection.direct
+        assert entry is not None
+        fmt = await self.ytdlp.run(self.ytdlp.get_format, job.url, entry.format_id)
+        try:
+            stream = await open_segments(fmt)
+        except ValueError as e:
+            logger.info(f"Format {entry.format_id} falls back to yt-dlp download: {e}")
+            await self._download_merge(job, entry.format_id, result)
+            return
+
+        path = self._output_path(job, entry.ext if stream.plan.fragmented else "ts")
+        part = os.path.join(self._work_dir(job.url), "download.part")
+        with open(part, "wb") as f:
+            async for chunk in stream.iter_bytes():
+                f.write(chunk)
+                self.bytes += len(chunk)
+
+        os.replace(part, path)
+        shutil.rmtree(self._work_dir(job.url), ignore_errors=True)
+        result.method = "segments"
+        self._finish(result, path)
+
+    async def _download_merge(self, job: _Job, format_selector: str, result: BulkResult) -> None:
+        """Download through yt-dlp in a work directory it can resume from"""
+        work_dir = self._work_dir(job.url)
+        output_file = await self.ytdlp.run(
+            self.ytdlp.download_formats, job.cached.info, format_selector, work_dir,
+            priority=DOWNLOAD,
+        )
+        ext = os.path.splitext(output_file)[1].lstrip(".") or "mp4"
+        path = self._output_path(job, ext)
+        os.replace(output_file, path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+        result.method = "merge"
+        result.format = format_selector
+        self.bytes += os.path.getsize(path)
+        self._finish(result, path)
+
+    def _work_dir(self, url: str) -> str:
+        """Per-URL directory for partial files, so duplicates never share one"""
+        work_dir = os.path.join(self.output_dir, PARTIAL_DIR, _url_key(url))
+        os.makedirs(work_dir, exist_ok=True)
+        return work_dir
+
+    def _output_path(self, job: _Job, ext: str) -> str:
+        """``<title> [<id>].<ext>`` in the output directory, unique per media item"""
+        stem = os.path.splitext(default_filename(job.cached.info, ext))[0]
+        media_id = "".join(
+            c for c in str(job.cached.info.get("id") or "") if c.isascii() and (c.isalnum() or c in "-_")
+        ) or _url_key(job.url)
+        return os.path.join(self.output_dir, f"{stem} [{media_id}].{ext}")
+
+    def _finish(self, result: BulkResult, path: str) -> None:
+        result.file = path
+        result.bytes = os.path.getsize(path)
+
+    def _record(self, result: BulkResult) -> None:
+        """Count a finished item and append it to the manifest"""
+        result.finished_at = time.time()
+        for name in ("extract_seconds", "download_seconds", "bytes_per_second"):
+            setattr(result, name, round(getattr(result, name), 3))
+        if result.status == "done":
+            self.done += 1
+            logger.info(f"Downloaded {result.url} -> {result.file}")
+        else:
+            self.failed += 1
+            logger.warning(f"Failed {result.url}: {result.error}")
+
+        # One short line per item; flushed so an interrupted run loses nothing
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(normalize_url(url).encode()).hexdigest()[:16]
@@ -0,0 +1,203 @@
+"""Priority scheduling of blocking yt-dlp work
+
+Everything yt-dlp does runs on a small thread pool. Without scheduling, a
+burst of multi-minute merges occupies every thread and an ``/analyze``
+call (a user watching a spinner) queues behind them. Jobs are therefore
+admitted to the pool by priority class:
+
+- ``interactive``: metadata for /analyze
+- ``formats``: format listing, playlist pages, URL re-resolution
+- ``download``: yt-dlp downloads and merges
+
+Each class can have threads reserved for it that no other class may use;
+the remaining threads are shared and go to the best waiting job. Waiting
+ages a job: every ``aging`` seconds in the queue raises it one class, so a
+download queued behind a steady stream of metadata calls still runs. A
+class can also be capped so it never takes every shared thread.
+
+The scheduler never admits more jobs than the pool has threads, so jobs
+never queue inside the executor where they could not be reordered (or
+cancelled by the executor's shutdown): ``shutdown()`` fails the queued jobs
+itself.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, TypeVar
+
+from app.core.exceptions import ServiceShuttingDownException
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+INTERACTIVE = "interactive"
+FORMATS = "formats"
+DOWNLOAD = "download"
+
+# Class -> base rank (lower runs first)
+PRIORITIES: Dict[str, int] = {INTERACTIVE: 0, FORMATS: 1, DOWNLOAD: 2}
+
+
+@dataclass
+class _Job:
+    priority: str
+    enqueued: float
+    future: "asyncio.Future[None]" = field(repr=False)
+
+
+class ExtractionScheduler:
+    """Admits jobs to a thread pool by class, reservation and age"""
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        workers: int,
+        reserved: Dict[str, int],
+        limits: Dict[str, int],
+        aging: float,
+    ):
+        """
+        Args:
+            executor: Pool the jobs run on (at least ``workers`` threads)
+            workers: Jobs allowed to run at once
+            reserved: Threads only a class may use, per class
+            limits: Max concurrent jobs per class (0 or missing = no cap)
+            aging: Seconds of waiting that raise a job one class (0 = no aging)
+        """
+        self.executor = executor
+        self.workers = workers
+        self.reserved = {name: reserved.get(name, 0) for name in PRIORITIES}
+        self.limits = {name: limits.get(name) or workers for name in PRIORITIES}
+        self.aging = aging
+        self.shared = workers - sum(self.reserved.values())
+        if self.shared < 0:
+            logger.warning(
+                f"Extraction reservations ({sum(self.reserved.values())}) exceed "
+                f"the {workers} workers; unreserved work can only use free reserved slots"
+            )
+        self.running = {name: 0 for name in PRIORITIES}
+        self.closed = False
+        self._queues: Dict[str, Deque[_Job]] = {name: deque() for name in PRIORITIES}
+
+    async def submit(self, priority: str, func: Callable[[], T]) -> T:
+        """
+        Run ``func`` on the pool once its class may start a job
+
+        Args:
+            priority: INTERACTIVE, FORMATS or DOWNLOAD
+            func: Blocking callable without arguments
+
+        Returns:
+            The callable's result
+
+        Raises:
+            ServiceShuttingDownException: If the scheduler was shut down
+                before the job started
+        """
+        if self.closed:
+            raise ServiceShuttingDownException("Server is shutting down")
+        loop = asyncio.get_running_loop()
+        enqueued = time.monotonic()
+        if not self._waiting() and self._can_start(priority):
+            self.running[priority] += 1
+        else:
+            job = _Job(priority, enqueued, loop.create_future())
+            self._queues[priority].append(job)
+            self._dispatch()
+            try:
+                await job.future
+            except asyncio.CancelledError:
+                if (
+                    job.future.done()
+                    and not job.future.cancelled()
+                    and job.future.exception() is None
+                ):
+                    # Admitted just as the caller went away: hand the slot on
+                    self._release(priority)
+                raise
+        metrics.observe(
+            "extraction_queue_wait_seconds", time.monotonic() - enqueued, priority=priority
+        )
+        metrics.inc("extraction_jobs_total", priority=priority)
+
+        # The slot is freed when the thread finishes, even if the caller is cancelled
+        try:
+            future = self.executor.submit(func)
+        except RuntimeError as e:
+            # Executor shut down
+            self._release(priority)
+            raise ServiceShuttingDownException("Server is shutting down") from e
+        future.add_done_callback(lambda _: self._release_threadsafe(loop, priority))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Reject new jobs and fail every queued one; running jobs finish normally"""
+        self.closed = True
+        for queue in self._queues.values():
+            while queue:
+                job = queue.popleft()
+                if not job.future.done():
+                    job.future.set_exception(
+                        ServiceShuttingDownException("Server is shutting down")
+                    )
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, priority: str) -> None:
+        """Done callback of an executor job (runs on the worker thread)"""
+        try:
+            loop.call_soon_threadsafe(self._release, priority)
+        except RuntimeError:
+            pass  # the event loop already closed; nothing is waiting for the slot
+
+    def _waiting(self) -> bool:
+        return any(self._queues.values())
+
+    def _can_start(self, priority: str) -> bool:
+        """Whether a job of this class fits a reserved or shared slot right now"""
+        running = self.running[priority]
+        if running >= self.limits[priority] or sum(self.running.values()) >= self.workers:
+            return False
+        if running < self.reserved[priority]:
+            return True
+        shared_in_use = sum(
+            max(0, count - self.reserved[name]) for name, count in self.running.items()
+        )
+        return shared_in_use < self.shared
+
+    def _rank(self, job: _Job, now: float) -> float:
+        rank = float(PRIORITIES[job.priority])
+        if self.aging > 0:
+            rank -= (now - job.enqueued) / self.aging
+        return rank
+
+    def _release(self, priority: str) -> None:
+        self.running[priority] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start waiting jobs, best (aged) rank first, while slots allow"""
+        while True:
+            now = time.monotonic()
+            heads = []
+            for name, queue in self._queues.items():
+                while queue and queue[0].future.done():
+                    queue.popleft()  # caller cancelled while waiting
+                if queue:
+                    heads.append(queue[0])
+            heads.sort(key=lambda job: (self._rank(job, now), job.enqueued))
+            job = next((job for job in heads if self._can_start(job.priority)), None)
+            if job is None:
+                return
+            self._queues[job.priority].popleft()
+            self.running[job.priority] += 1
+            job.future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Running and queued jobs per class"""
+        return {
+            name: {"running": self.running[name], "queued": len(self._queues[name])}
+            for name in PRIORITIES
+        }
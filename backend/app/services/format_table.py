@@ -0,0 +1,388 @@
+"""Typed format table built from yt-dlp format lists
+
+yt-dlp returns every format of a media item as a loose dict. The download,
+merge and proxy paths all need the same questions answered about that list
+(best audio, best video per height, a format by id), so the list is indexed
+once into a ``FormatTable`` and reused instead of being re-walked.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Audio-only containers offered to clients
+AUDIO_EXTENSIONS = frozenset({"mp3", "m4a", "webm", "opus"})
+
+# Protocols that can be relayed byte-for-byte without yt-dlp
+DIRECT_PROTOCOLS = frozenset({"http", "https"})
+
+# best | audio | audio-<ext> | <height>p | <height>p-<codec>
+_PRESET_RE = re.compile(r"^(?:(?P<best>best)|(?P<audio>audio)(?:-(?P<aext>\w+))?|(?P<height>\d+)p(?:-(?P<codec>\w+))?)$")
+
+# Expiry query parameters of signed media URLs
+_EXPIRY_PARAMS = ("expire=", "oe=", "Expires=")
+_EXPIRY_VALUE_RE = re.compile(r"[0-9A-Za-z]+")
+
+# (height, codec, container, has_audio)
+BucketKey = Tuple[int, str, str, bool]
+
+_VIDEO_CODEC_PREFIXES = (
+    ("avc", "h264"),
+    ("h264", "h264"),
+    ("hev", "h265"),
+    ("hvc", "h265"),
+    ("h265", "h265"),
+    ("vp09", "vp9"),
+    ("vp9", "vp9"),
+    ("vp8", "vp8"),
+    ("av01", "av1"),
+    ("av1", "av1"),
+)
+
+_AUDIO_CODEC_PREFIXES = (
+    ("mp4a", "aac"),
+    ("aac", "aac"),
+    ("opus", "opus"),
+    ("vorbis", "vorbis"),
+    ("mp3", "mp3"),
+    ("ac-3", "ac3"),
+    ("ec-3", "eac3"),
+    ("flac", "flac"),
+)
+
+
+@lru_cache(maxsize=256)
+def codec_family(codec: Optional[str], prefixes: Tuple[Tuple[str, str], ...]) -> str:
+    """Map a codec string such as ``avc1.640028`` to its family (``h264``)"""
+    if not codec or codec == "none":
+        return "none"
+    codec = codec.lower()
+    for prefix, family in prefixes:
+        if codec.startswith(prefix):
+            return family
+    return codec.split(".", 1)[0]
+
+
+@lru_cache(maxsize=256)
+def _video_codec(codec: Optional[str]) -> str:
+    # Cached on the codec alone; hashing the prefix table per call is not free
+    return codec_family(codec, _VIDEO_CODEC_PREFIXES)
+
+
+@lru_cache(maxsize=256)
+def _audio_codec(codec: Optional[str]) -> str:
+    return codec_family(codec, _AUDIO_CODEC_PREFIXES)
+
+
+def url_expiry(url: str) -> Optional[int]:
+    """
+    Unix time at which a signed media URL stops working, if it says so
+
+    Understands googlevideo ``expire=``, Meta CDN ``oe=`` (hex), CloudFront
+    ``Expires=`` and S3 ``X-Amz-Date`` + ``X-Amz-Expires``.
+    """
+    # str.find instead of one alternation regex: media URLs run to ~1 KB
+    # and this runs for every format of every extraction
+    for param in _EXPIRY_PARAMS:
+        index = url.find(param)
+        while index > 0 and url[index - 1] not in "?&":
+            index = url.find(param, index + 1)
+        if index <= 0:
+            continue
+        match = _EXPIRY_VALUE_RE.match(url, index + len(param))
+        if match is None:
+            return None
+        try:
+            return int(match.group(), 16) if param == "oe=" else int(match.group())
+        except ValueError:
+            return None
+
+    if "X-Amz-Expires=" in url:
+        params = parse_qs(urlsplit(url).query)
+        try:
+            signed = datetime.strptime(params["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ")
+            return int(signed.replace(tzinfo=timezone.utc).timestamp()) + int(params["X-Amz-Expires"][0])
+        except (KeyError, ValueError):
+            return None
+    return None
+
+
+@dataclass(slots=True, eq=False)
+class FormatEntry:
+    """
+    A single downloadable format, normalized from a yt-dlp format dict
+
+    Not frozen: frozen dataclasses construct through ``object.__setattr__``,
+    which dominated table builds. Entries are treated as immutable anyway.
+    ``rank`` and ``bucket`` are computed once in ``from_ytdlp`` because every
+    sort and filter reads them.
+    """
+
+    format_id: str
+    url: str
+    ext: str
+    height: int
+    vcodec: str
+    acodec: str
+    tbr: float
+    abr: float
+    filesize: Optional[int]
+    protocol: str
+    expires_at: Optional[int]
+    has_video: bool
+    has_audio: bool
+    # Sort key: higher bitrate first, then larger file
+    rank: Tuple[float, int]
+    bucket: BucketKey
+
+    @property
+    def is_muxed(self) -> bool:
+        return self.has_video and self.has_audio
+
+    def expires_within(self, seconds: float, now: Optional[float] = None) -> bool:
+        """Whether the signed URL expires within ``seconds`` from now"""
+        if self.expires_at is None:
+            return False
+        if now is None:
+            now = time.time()
+        return self.expires_at - now <= seconds
+
+    @classmethod
+    def from_ytdlp(cls, fmt: Dict[str, Any]) -> Optional["FormatEntry"]:
+        """Build an entry from a yt-dlp format dict, or None if it has no URL"""
+        url = fmt.get("url")
+        if not url:
+            return None
+        get = fmt.get
+        abr = float(get("abr") or 0.0)
+        tbr = float(get("tbr") or ((get("vbr") or 0.0) + abr))
+        ext = get("ext") or "mp4"
+        height = int(get("height") or 0)
+        vcodec = _video_codec(get("vcodec", "none"))
+        acodec = _audio_codec(get("acodec", "none"))
+        filesize = get("filesize") or get("filesize_approx")
+        has_video = vcodec != "none"
+        has_audio = acodec != "none"
+        return cls(
+            str(get("format_id", "")),
+            url,
+            ext,
+            height,
+            vcodec,
+            acodec,
+            tbr,
+            abr,
+            filesize,
+            get("protocol") or "https",
+            url_expiry(url),
+            has_video,
+            has_audio,
+            (tbr or abr, filesize or 0),
+            (height, vcodec if has_video else acodec, ext, has_audio),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PresetSelection:
+    """Formats chosen for a quality preset: one direct stream or a merge pair"""
+
+    video: Optional[FormatEntry]
+    audio: Optional[FormatEntry]
+
+    @property
+    def is_merge(self) -> bool:
+        return self.video is not None and self.audio is not None
+
+    @property
+    def direct(self) -> Optional[FormatEntry]:
+        """The single format to relay, or None for merges"""
+        if self.is_merge:
+            return None
+        return self.video or self.audio
+
+    @property
+    def format_selector(self) -> str:
+        """yt-dlp format selector for this selection"""
+        return "+".join(e.format_id for e in (self.video, self.audio) if e is not None)
+
+    @property
+    def ext(self) -> str:
+        if self.is_merge:
+            return "mp4"
+        return self.direct.ext  # type: ignore[union-attr]
+
+
+@dataclass(slots=True)
+class FormatTable:
+    """Formats of one media item, bucketed and ranked for selection"""
+
+    entries: List[FormatEntry] = field(default_factory=list)
+    by_id: Dict[str, FormatEntry] = field(default_factory=dict)
+    buckets: Dict[BucketKey, List[FormatEntry]] = field(default_factory=dict)
+    best_muxed: Dict[Tuple[int, str], FormatEntry] = field(default_factory=dict)
+    best_video: Dict[int, FormatEntry] = field(default_factory=dict)
+    best_audio_by_ext: Dict[str, FormatEntry] = field(default_factory=dict)
+    best_audio: Optional[FormatEntry] = None
+
+    @classmethod
+    def build(cls, formats: Iterable[Dict[str, Any]]) -> "FormatTable":
+        """
+        Index a yt-dlp format list in a single pass
+
+        Args:
+            formats: The ``formats`` list of a yt-dlp info dict
+
+        Returns:
+            FormatTable with per-bucket rankings and best-of indexes
+        """
+        table = cls()
+        video_only: Dict[int, FormatEntry] = {}
+        video_any: Dict[int, FormatEntry] = {}
+
+        for fmt in formats:
+            entry = FormatEntry.from_ytdlp(fmt)
+            if entry is None:
+                continue
+
+            table.entries.append(entry)
+            table.by_id[entry.format_id] = entry
+            table.buckets.setdefault(entry.bucket, []).append(entry)
+            rank = entry.rank
+
+            if entry.has_video and entry.height:
+                current = video_any.get(entry.height)
+                if current is None or rank > current.rank:
+                    video_any[entry.height] = entry
+                if entry.has_audio:
+                    key = (entry.height, entry.ext)
+                    current = table.best_muxed.get(key)
+                    if current is None or rank > current.rank:
+                        table.best_muxed[key] = entry
+                else:
+                    current = video_only.get(entry.height)
+                    if current is None or rank > current.rank:
+                        video_only[entry.height] = entry
+
+            elif entry.has_audio and not entry.has_video:
+                if table.best_audio is None or rank > table.best_audio.rank:
+                    table.best_audio = entry
+                if entry.ext in AUDIO_EXTENSIONS:
+                    current = table.best_audio_by_ext.get(entry.ext)
+                    if current is None or rank > current.rank:
+                        table.best_audio_by_ext[entry.ext] = entry
+
+        for bucket in table.buckets.values():
+            bucket.sort(key=_rank_key, reverse=True)
+
+        # Prefer true video-only streams for merging, fall back to muxed ones
+        table.best_video = {**video_any, **video_only}
+        return table
+
+    def get(self, format_id: str) -> Optional[FormatEntry]:
+        """Look up a format by its yt-dlp format_id"""
+        return self.by_id.get(format_id)
+
+    @property
+    def heights(self) -> List[int]:
+        """Available video heights, highest first"""
+        return sorted(self.best_video, reverse=True)
+
+    @property
+    def earliest_expiry(self) -> Optional[int]:
+        """Earliest expiry (unix time) among the signed format URLs, if any"""
+        return min((e.expires_at for e in self.entries if e.expires_at), default=None)
+
+    def merge_pair(self, height: int) -> Optional[Tuple[FormatEntry, FormatEntry]]:
+        """Best (video, audio) pair for a merged download at ``height``"""
+        video = self.best_video.get(height)
+        if video is None or self.best_audio is None:
+            return None
+        return video, self.best_audio
+
+    def presets(self) -> List[str]:
+        """Quality presets this table can satisfy, best first"""
+        presets = ["best"] if self.best_video or self.best_muxed else []
+        # Video-less buckets with a height (storyboards) cannot satisfy a height preset
+        heights = {key[0] for key in self.buckets if key[0] and key[1] != "none"}
+        for height in sorted(heights, reverse=True):
+            presets.append(f"{height}p")
+            codecs = sorted({key[1] for key in self.buckets if key[0] == height and key[1] != "none"})
+            presets.extend(f"{height}p-{codec}" for codec in codecs)
+        if self.best_audio is not None:
+            presets.append("audio")
+            presets.extend(f"audio-{ext}" for ext in sorted(self.best_audio_by_ext))
+        return presets
+
+    def resolve_preset(self, preset: str) -> Optional[PresetSelection]:
+        """
+        Resolve a quality preset against the indexed formats
+
+        Heights act as an upper bound (``720p`` picks the best format at or
+        below 720p). A pre-merged stream is used when it is at least as tall
+        as the best video-only stream; otherwise the best video is paired
+        with the best audio for a merge.
+
+        Args:
+            preset: ``best``, ``<height>p``, ``<height>p-<codec>``, ``audio``
+                or ``audio-<ext>``
+
+        Returns:
+            PresetSelection, or None if no format satisfies the preset
+
+        Raises:
+            ValueError: If the preset is malformed
+        """
+        match = _PRESET_RE.match(preset.strip().lower())
+        if match is None:
+            raise ValueError(f"Unknown quality preset: {preset}")
+
+        if match.group("audio"):
+            ext = match.group("aext")
+            audio = self.best_audio_by_ext.get(ext) if ext else self.best_audio
+            return PresetSelection(video=None, audio=audio) if audio else None
+
+        max_height = int(match.group("height")) if match.group("height") else None
+        codec = match.group("codec")
+        muxed = self._best_video(max_height, codec, with_audio=True)
+        video = self._best_video(max_height, codec, with_audio=False)
+
+        if muxed is not None and (video is None or muxed.height >= video.height):
+            return PresetSelection(video=muxed, audio=None)
+        if video is not None and self.best_audio is not None:
+            audio = self.best_audio
+            # Keep mp4 merges in their native audio codec when one is offered
+            if video.ext == "mp4" and "m4a" in self.best_audio_by_ext:
+                audio = self.best_audio_by_ext["m4a"]
+            return PresetSelection(video=video, audio=audio)
+        if video is not None:
+            return PresetSelection(video=video, audio=None)
+        return None
+
+    def _best_video(
+        self, max_height: Optional[int], codec: Optional[str], with_audio: bool
+    ) -> Optional[FormatEntry]:
+        """Tallest, then highest ranked, video format matching the filters"""
+        best: Optional[FormatEntry] = None
+        for (height, bucket_codec, _, has_audio), entries in self.buckets.items():
+            if not height or bucket_codec == "none" or has_audio != with_audio:
+                continue
+            if max_height is not None and height > max_height:
+                continue
+            if codec is not None and bucket_codec != codec:
+                continue
+            for entry in entries:
+                # Pre-merged streams are relayed directly, so they must be plain HTTP
+                if with_audio and entry.protocol not in DIRECT_PROTOCOLS:
+                    continue
+                if best is None or (entry.height, entry.rank) > (best.height, best.rank):
+                    best = entry
+                break
+        return best
+
+
+def _rank_key(entry: FormatEntry) -> Tuple[float, int]:
+    return entry.rank
@@ -0,0 +1,148 @@
+"""In-process cache of extraction results
+
+``/analyze``, ``/download-info`` and the download endpoints are usually hit
+in sequence for the same URL. Caching the info dict together with its
+``FormatTable`` lets the later calls skip yt-dlp entirely. Failed
+extractions are cached too (``NegativeCache``), so retrying a private or
+DRM-protected URL doesn't run yt-dlp again.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Type
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.core.exceptions import URLensException
+from app.services.format_table import FormatTable
+
+# Query parameters that never change what gets extracted
+_TRACKING_PARAMS = frozenset(
+    {"si", "feature", "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "igsh", "fbclid", "gclid"}
+)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key
+
+    Lowercases scheme and host, drops the fragment and tracking parameters,
+    and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in _TRACKING_PARAMS
+    )
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower(), host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedInfo:
+    """An extraction result and its indexed formats"""
+
+    info: Dict[str, Any]
+    table: FormatTable
+    fetched_at: float
+    # Serialized API responses derived from this result, by view name
+    rendered: Dict[str, Any] = field(default_factory=dict)
+
+
+class InfoCache:
+    """Thread-safe LRU cache of extraction results with a fixed TTL"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedInfo]:
+        """Return the cached result for a URL, or None if missing or stale"""
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.fetched_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, url: str, info: Dict[str, Any]) -> CachedInfo:
+        """Index and cache an extraction result"""
+        entry = CachedInfo(
+            info=info,
+            table=FormatTable.build(info.get("formats") or []),
+            fetched_at=time.time(),
+        )
+        key = normalize_url(url)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, url: str) -> None:
+        """Drop the cached result for a URL"""
+        with self._lock:
+            self._entries.pop(normalize_url(url), None)
+
+
+class NegativeCache:
+    """Thread-safe LRU cache of extraction failures with per-error-class TTLs"""
+
+    def __init__(self, ttls: Dict[Type[URLensException], float], max_entries: int):
+        """
+        Args:
+            ttls: Seconds to remember each exception class; subclasses use
+                the entry of their nearest listed base, unlisted ones aren't cached
+            max_entries: LRU bound
+        """
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Type[URLensException], str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl_for(self, exc: URLensException) -> float:
+        """TTL for an exception, by its class hierarchy (0 = don't cache)"""
+        for cls in type(exc).__mro__:
+            if cls in self.ttls:
+                return self.ttls[cls]
+        return 0
+
+    def get(self, url: str) -> Optional[URLensException]:
+        """Return a fresh copy of the cached failure for a URL, or None"""
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cls, message, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return cls(message)
+
+    def put(self, url: str, exc: URLensException) -> None:
+        """Remember a failure for its class's TTL"""
+        ttl = self.ttl_for(exc)
+        if ttl <= 0:
+            return
+        key = normalize_url(url)
+        with self._lock:
+            self._entries[key] = (type(exc), str(exc), time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        """Forget the cached failure for a URL"""
+        with self._lock:
+            self._entries.pop(normalize_url(url), None)
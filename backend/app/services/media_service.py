@@ -1,7 +1,22 @@
 """Media service for business logic"""
-from typing import Dict, List, Any
+import base64
+import binascii
+from typing import Dict, List, Any, Optional
+from app.config import settings
+from app.core.http_cache import RenderedBody
+from app.services.extraction_scheduler import INTERACTIVE
+from app.services.format_table import FormatTable, url_expiry
+from app.services.info_cache import CachedInfo
+from app.services.metadata_resolver import metadata_resolver
+from app.services.token_service import token_service
 from app.services.ytdlp_service import ytdlp_service
-from app.models.responses import AnalyzeResponse, DownloadOption, DownloadInfoResponse
+from app.models.responses import (
+    AnalyzeResponse,
+    DownloadOption,
+    DownloadInfoResponse,
+    PlaylistEntry,
+    PlaylistPageResponse,
+)
 from app.core.logger import logger
 
 
@@ -11,19 +26,26 @@ class MediaService:
     def __init__(self):
         """Initialize media service"""
         self.ytdlp = ytdlp_service
+        self.tokens = token_service
+        self.metadata = metadata_resolver
     
-    async def analyze_url(self, url: str) -> AnalyzeResponse:
+    async def analyze_url(self, url: str, authenticated: bool = False) -> AnalyzeResponse:
         """
         Analyze URL and return metadata
         
         Args:
             url: The URL to analyze
+            authenticated: Retry with browser cookies, ignoring a cached failure
             
         Returns:
             AnalyzeResponse with platform, title, and thumbnail
         """
         logger.info(f"Analyzing URL: {url}")
-        metadata = self.ytdlp.get_metadata(url)
+        metadata = await self._fast_metadata(url, authenticated)
+        if metadata is None:
+            metadata = await self.ytdlp.run(
+                self.ytdlp.get_metadata, url, authenticated, priority=INTERACTIVE
+            )
         
         return AnalyzeResponse(
             platform=metadata['platform'],
@@ -31,30 +53,197 @@ class MediaService:
             thumbnail_url=metadata.get('thumbnail_url')
         )
     
-    async def get_download_info(self, url: str) -> DownloadInfoResponse:
+    async def get_download_info(
+        self, url: str, authenticated: bool = False
+    ) -> DownloadInfoResponse:
         """
         Get download options for URL
         
         Args:
             url: The URL to get download info for
+            authenticated: Retry with browser cookies, ignoring a cached failure
             
         Returns:
             DownloadInfoResponse with list of download options
         """
         logger.info(f"Getting download info for: {url}")
-        options = self.ytdlp.get_download_options(url)
+        return await self.ytdlp.run(self._build_download_info, url, authenticated)
+
+    async def get_playlist_page(
+        self,
+        url: str,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        authenticated: bool = False,
+    ) -> PlaylistPageResponse:
+        """
+        Get one page of lightweight entries of a playlist or channel
+
+        Args:
+            url: Playlist, channel or video URL
+            cursor: next_cursor of the previous page (None for the first page)
+            limit: Page size (defaults to PLAYLIST_PAGE_SIZE)
+            authenticated: List with browser cookies
+
+        Returns:
+            PlaylistPageResponse with the entries and the cursor of the next page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        start = decode_cursor(cursor) if cursor else 1
+        count = min(limit or settings.PLAYLIST_PAGE_SIZE, settings.PLAYLIST_MAX_PAGE_SIZE)
+        logger.info(f"Listing entries {start}-{start + count - 1} of: {url}")
+        page = await self.ytdlp.run(
+            self.ytdlp.get_playlist_page, url, start, count, authenticated
+        )
+
+        return PlaylistPageResponse(
+            id=page['id'],
+            title=page['title'],
+            uploader=page['uploader'],
+            entry_count=page['entry_count'],
+            entries=[PlaylistEntry(**entry) for entry in page['entries']],
+            next_cursor=encode_cursor(start + count) if page['has_more'] else None,
+        )
+
+    async def render_analyze(self, url: str, authenticated: bool = False) -> RenderedBody:
+        """
+        Analyze response serialized for the cacheable GET endpoint
+
+        Rendered once per extraction result, so repeat requests for the same
+        (normalized) URL return identical bytes and the same ETag.
+        """
+        metadata = await self._fast_metadata(url, authenticated)
+        if metadata is not None:
+            thumbnail = metadata.get("thumbnail_url")
+            return RenderedBody.render(
+                AnalyzeResponse(**metadata).model_dump(),
+                expires_at=url_expiry(thumbnail) if thumbnail else None,
+            )
+        return await self.ytdlp.run(
+            self._render, url, "analyze", authenticated, priority=INTERACTIVE
+        )
+
+    async def _fast_metadata(self, url: str, authenticated: bool) -> Optional[Dict[str, Any]]:
+        """
+        Analyze metadata from oEmbed/OpenGraph, or None to use yt-dlp
+
+        Skipped for cookie retries and when yt-dlp already has a cached
+        result or failure for the URL (the failure must be replayed).
+        """
+        if (
+            not settings.FAST_METADATA_ENABLED
+            or authenticated
+            or self.ytdlp.has_cached_result(url)
+        ):
+            return None
+        return await self.metadata.resolve(url)
+
+    async def render_download_info(self, url: str, authenticated: bool = False) -> RenderedBody:
+        """
+        Download info serialized for the cacheable GET endpoint
+
+        Rendered once per extraction result: repeat requests reuse the
+        tokens issued for the first one instead of issuing new ones.
+        """
+        return await self.ytdlp.run(self._render, url, "download-info", authenticated)
+
+    def _render(self, url: str, view: str, authenticated: bool) -> RenderedBody:
+        """Blocking part of the render_* methods"""
+        cached = self.ytdlp.get_info(url, authenticated=authenticated)
+        rendered = cached.rendered.get(view)
+        if rendered is None:
+            if view == "analyze":
+                response = AnalyzeResponse(**self.ytdlp.get_metadata(url))
+            else:
+                response = self._download_info_response(url, cached)
+            rendered = RenderedBody.render(response.model_dump(), expires_at=_content_expiry(cached))
+            cached.rendered[view] = rendered
+        return rendered
+
+    def _build_download_info(self, url: str, authenticated: bool) -> DownloadInfoResponse:
+        """Blocking part of get_download_info: extraction and token issuing"""
+        cached = self.ytdlp.get_info(url, authenticated=authenticated)
+        return self._download_info_response(url, cached)
+
+    def _download_info_response(self, url: str, cached: CachedInfo) -> DownloadInfoResponse:
+        """Build download options, with a token each, for an extraction result"""
+        options = self.ytdlp.build_download_options(cached.info, cached.table)
         
         download_options = [
             DownloadOption(
                 quality_label=opt['quality_label'],
                 extension=opt['extension'],
                 file_size_approx=opt.get('file_size_approx'),
-                download_url=opt['download_url']
+                download_url=opt['download_url'],
+                download_token=self._issue_token(url, cached.info, cached.table, opt),
             )
             for opt in options
         ]
         
-        return DownloadInfoResponse(download_options=download_options)
+        return DownloadInfoResponse(
+            download_options=download_options,
+            available_presets=cached.table.presets(),
+        )
+
+    def _issue_token(
+        self, url: str, info: Dict[str, Any], table: FormatTable, opt: Dict[str, Any]
+    ) -> Optional[str]:
+        """Issue a download token for a single option"""
+        format_id = opt.get('format_id')
+        if not format_id or not opt.get('download_url'):
+            return None
+
+        filename = default_filename(info, opt['extension'])
+        if opt['download_url'].startswith("MERGE:"):
+            # Merged downloads expire with the earliest component URL
+            expiries = [
+                url_expiry(entry.url)
+                for entry in map(table.get, format_id.split("+"))
+                if entry is not None
+            ]
+            expiries = [e for e in expiries if e]
+            return self.tokens.issue(
+                url, format_id, filename,
+                upstream_expiry=min(expiries) if expiries else None,
+            )
+
+        entry = table.get(format_id)
+        return self.tokens.issue(
+            url, format_id, filename,
+            direct_url=opt['download_url'],
+            protocol=entry.protocol if entry is not None else "https",
+        )
+
+
+def _content_expiry(cached: CachedInfo) -> Optional[float]:
+    """Earliest expiry of the signed URLs (formats and thumbnail) in a result"""
+    expiries = [cached.table.earliest_expiry, url_expiry(cached.info.get("thumbnail") or "")]
+    return min((e for e in expiries if e), default=None)
+
+
+def encode_cursor(start: int) -> str:
+    """Opaque page cursor for a 1-based playlist index"""
+    return base64.urlsafe_b64encode(str(start).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        start = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor")
+    if start < 1:
+        raise ValueError("Invalid cursor")
+    return start
+
+
+def default_filename(info: Dict[str, Any], ext: str) -> str:
+    """Build a header-safe filename from the media title"""
+    title = info.get("title") or "download"
+    safe = "".join(c for c in title if c.isascii() and (c.isalnum() or c in " -_.")).strip()
+    return f"{safe or 'download'}.{ext}"
 
 
 # Global instance
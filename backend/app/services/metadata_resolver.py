@@ -0,0 +1,231 @@
+"""Fast metadata for /analyze without a yt-dlp extraction
+
+``/analyze`` only needs a platform, title and thumbnail, but a yt-dlp
+extraction also resolves every format (and on YouTube the player JS), which
+takes seconds. For the big platforms the same three fields come from one
+small HTTP request over the pooled client:
+
+- oEmbed: YouTube, TikTok, Twitter/X, and Instagram when an app token is
+  configured (Instagram's oEmbed requires one)
+- OpenGraph ``og:title`` / ``og:image`` from the page head otherwise, and
+  when the oEmbed payload has no thumbnail (Twitter/X)
+
+Only hosts yt-dlp handles are resolved this way, so unsupported and DRM
+sites still get their error from the full extraction. Any failure (private
+or removed media, an unexpected page, a timeout) returns None and the
+caller falls back to yt-dlp. The full extraction is then deferred until
+formats are requested.
+"""
+
+import html
+import re
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from app.config import settings
+from app.core.http_client import get_http_client
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.services.info_cache import normalize_url
+
+# Host (or parent domain) -> platform name used in AnalyzeResponse
+PLATFORM_HOSTS: Dict[str, str] = {
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+    "tiktok.com": "tiktok",
+    "twitter.com": "twitter",
+    "x.com": "twitter",
+    "instagram.com": "instagram",
+    "facebook.com": "facebook",
+    "fb.watch": "facebook",
+}
+
+# Platform -> oEmbed endpoint (the media URL is appended, quoted)
+OEMBED_ENDPOINTS: Dict[str, str] = {
+    "youtube": "https://www.youtube.com/oembed?format=json&url=",
+    "tiktok": "https://www.tiktok.com/oembed?url=",
+    "twitter": "https://publish.twitter.com/oembed?omit_script=1&url=",
+    "instagram": "https://graph.facebook.com/v18.0/instagram_oembed?fields=title,thumbnail_url,author_name&url=",
+}
+
+# Stop reading a page after this much without reaching </head>
+_MAX_HEAD_BYTES = 512 * 1024
+_TAG_RE = re.compile(r"<[^>]+>")
+
+Metadata = Dict[str, Optional[str]]
+
+
+def platform_for(url: str) -> Optional[str]:
+    """Platform of a URL by host, or None if it has no fast path"""
+    host = (urlsplit(url).hostname or "").lower()
+    while host:
+        platform = PLATFORM_HOSTS.get(host)
+        if platform is not None:
+            return platform
+        host = host.partition(".")[2]
+    return None
+
+
+class _HeadParser(HTMLParser):
+    """Collects OpenGraph/Twitter card meta tags from a page head"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.done = False
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag == "meta":
+            values = dict(attrs)
+            key = (values.get("property") or values.get("name") or "").lower()
+            if key and values.get("content") and key not in self.meta:
+                self.meta[key] = values["content"]
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "head":
+            self.done = True
+
+
+class MetadataResolver:
+    """Resolves platform, title and thumbnail from oEmbed or OpenGraph"""
+
+    def __init__(self, timeout: float, ttl: float, max_entries: int, instagram_token: str = ""):
+        """
+        Args:
+            timeout: Seconds for the oEmbed or page request
+            ttl: Seconds to reuse a resolved result
+            max_entries: Results kept in the LRU cache
+            instagram_token: Facebook app token enabling Instagram oEmbed
+        """
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.instagram_token = instagram_token
+        # Only touched from the event loop
+        self._cache: "OrderedDict[str, Tuple[float, Metadata]]" = OrderedDict()
+
+    async def resolve(self, url: str) -> Optional[Metadata]:
+        """
+        Get analyze metadata for a URL without yt-dlp
+
+        Args:
+            url: The media URL
+
+        Returns:
+            Dict with platform, title and thumbnail_url, or None when the
+            URL has no fast path or it failed
+        """
+        platform = platform_for(url)
+        if platform is None:
+            return None
+
+        key = normalize_url(url)
+        cached = self._cache.get(key)
+        if cached is not None and time.time() - cached[0] <= self.ttl:
+            self._cache.move_to_end(key)
+            metrics.inc("fast_metadata_total", source="cache", result="hit")
+            return cached[1]
+
+        started = time.monotonic()
+        source = "oembed" if self._oembed_url(platform, url) else "opengraph"
+        try:
+            if source == "oembed":
+                metadata = await self._from_oembed(platform, url)
+                if metadata is not None and not metadata["thumbnail_url"]:
+                    # Twitter/X oEmbed has no thumbnail; try the page head, then yt-dlp
+                    source = "opengraph"
+                    metadata = await self._from_opengraph(platform, url)
+            else:
+                metadata = await self._from_opengraph(platform, url)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.info(f"Fast metadata failed for {url}, falling back to yt-dlp: {e}")
+            metadata = None
+
+        metrics.observe("fast_metadata_seconds", time.monotonic() - started, source=source)
+        metrics.inc("fast_metadata_total", source=source, result="hit" if metadata else "miss")
+        if metadata is None:
+            return None
+
+        self._cache[key] = (time.time(), metadata)
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return metadata
+
+    def _oembed_url(self, platform: str, url: str) -> Optional[str]:
+        endpoint = OEMBED_ENDPOINTS.get(platform)
+        if endpoint is None:
+            return None
+        oembed_url = endpoint + quote(url, safe="")
+        if platform == "instagram":
+            if not self.instagram_token:
+                return None
+            oembed_url += "&access_token=" + quote(self.instagram_token, safe="")
+        return oembed_url
+
+    async def _from_oembed(self, platform: str, url: str) -> Optional[Metadata]:
+        """oEmbed lookup; 401/403/404 mean private or removed, left to yt-dlp"""
+        response = await get_http_client().get(
+            self._oembed_url(platform, url), timeout=self.timeout  # type: ignore[arg-type]
+        )
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if not isinstance(data, dict):
+            return None
+
+        title = data.get("title")
+        if not title and isinstance(data.get("html"), str):
+            # Twitter embeds carry the post text in the blockquote markup
+            title = html.unescape(_TAG_RE.sub(" ", data["html"]))
+            title = " ".join(title.split())[:200]
+        if not title and data.get("author_name"):
+            title = f"Post by {data['author_name']}"
+        if not title:
+            return None
+        thumbnail = data.get("thumbnail_url")
+        return {
+            "platform": platform,
+            "title": str(title),
+            "thumbnail_url": thumbnail if isinstance(thumbnail, str) else None,
+        }
+
+    async def _from_opengraph(self, platform: str, url: str) -> Optional[Metadata]:
+        """Read the page head and take og:title / og:image"""
+        parser = _HeadParser()
+        read = 0
+        async with get_http_client().stream(
+            "GET", url, timeout=self.timeout, headers={"Accept": "text/html"}
+        ) as response:
+            if response.status_code != 200:
+                return None
+            if "html" not in response.headers.get("content-type", ""):
+                return None
+            async for text in response.aiter_text():
+                parser.feed(text)
+                read += len(text)
+                if parser.done or read >= _MAX_HEAD_BYTES:
+                    break
+
+        meta = parser.meta
+        title = meta.get("og:title") or meta.get("twitter:title")
+        thumbnail = meta.get("og:image") or meta.get("twitter:image")
+        # Pages without both tags are usually login walls or error pages
+        if not title or not thumbnail:
+            return None
+        return {"platform": platform, "title": title.strip(), "thumbnail_url": thumbnail}
+
+
+# Global instance
+metadata_resolver = MetadataResolver(
+    timeout=settings.FAST_METADATA_TIMEOUT,
+    ttl=settings.INFO_CACHE_TTL,
+    max_entries=settings.INFO_CACHE_MAX_ENTRIES,
+    instagram_token=settings.INSTAGRAM_OEMBED_TOKEN,
+)
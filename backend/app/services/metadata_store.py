@@ -0,0 +1,237 @@
+"""Shared extraction store backed by SQLite in WAL mode
+
+Every uvicorn worker keeps its own in-memory ``InfoCache``; this store sits
+behind it so an extraction done by one worker (or before a restart) is
+reused by the others. Entries are compact projections of the yt-dlp info
+dict, zlib-compressed JSON, keyed by normalized URL and tagged with the
+yt-dlp version so an upgrade invalidates them.
+"""
+
+import asyncio
+import importlib.metadata
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.core.logger import logger
+from app.services.format_table import url_expiry
+from app.services.info_cache import normalize_url
+
+# Bump when the projection below changes shape
+PROJECTION_VERSION = 2
+
+_INFO_KEYS = (
+    "id", "title", "thumbnail", "duration", "uploader", "extractor",
+    "extractor_key", "webpage_url", "original_url", "http_headers",
+)
+_FORMAT_KEYS = (
+    "format_id", "format_note", "url", "manifest_url", "ext", "container",
+    "protocol", "width", "height", "fps", "vcodec", "acodec", "abr", "vbr",
+    "tbr", "asr", "audio_channels", "dynamic_range", "filesize",
+    "filesize_approx", "language", "http_headers", "fragments",
+    "fragment_base_url", "downloader_options", "has_drm",
+    # Read by yt-dlp's format sorting, so merges pick the same formats
+    "quality", "preference", "source_preference", "language_preference",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS format_records (
+    record_id BLOB PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS extractions_expires ON extractions (expires_at);
+CREATE INDEX IF NOT EXISTS format_records_expires ON format_records (expires_at);
+"""
+
+
+def project_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the parts of an info dict the API and yt-dlp re-processing need"""
+    projected = {key: info[key] for key in _INFO_KEYS if info.get(key) is not None}
+    projected["formats"] = [
+        {key: fmt[key] for key in _FORMAT_KEYS if fmt.get(key) is not None}
+        for fmt in info.get("formats") or []
+    ]
+    return projected
+
+
+def _encode(value: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _decode(payload: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(payload))
+
+
+class MetadataStore:
+    """Process-shared key/value store for extraction results and token records"""
+
+    def __init__(self, path: str, ttl: int, expiry_margin: int):
+        """Open (or create) the database file"""
+        self.path = path
+        self.ttl = ttl
+        self.expiry_margin = expiry_margin
+        self.version = f"{_ytdlp_version()}/{PROJECTION_VERSION}"
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _key(self, url: str) -> str:
+        return f"{self.version}:{normalize_url(url)}"
+
+    def get_info(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return a stored projection for a URL, or None if missing or stale"""
+        try:
+            row = self._connect().execute(
+                "SELECT payload FROM extractions WHERE key = ? AND expires_at > ?",
+                (self._key(url), time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata store read failed: {e}")
+            return None
+        return _decode(row[0]) if row else None
+
+    def put_info(self, url: str, info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store the projection of an info dict
+
+        Entries expire after the configured TTL or shortly before the
+        earliest signed format URL expires, whichever comes first.
+
+        Returns:
+            The stored projection
+        """
+        projected = project_info(info)
+        expires_at = time.time() + self.ttl
+        expiries = [url_expiry(fmt["url"]) for fmt in projected["formats"] if fmt.get("url")]
+        expiries = [e for e in expiries if e]
+        if expiries:
+            expires_at = min(expires_at, min(expiries) - self.expiry_margin)
+
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO extractions (key, version, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (self._key(url), self.version, expires_at, _encode(projected)),
+            )
+        except (TypeError, ValueError) as e:
+            # Values json cannot encode, e.g. callable DASH fragment generators
+            logger.warning(f"Metadata store cannot encode {url}: {e}")
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata store write failed: {e}")
+        return projected
+
+    def delete_info(self, url: str) -> None:
+        """Remove the stored entry for a URL"""
+        try:
+            self._connect().execute("DELETE FROM extractions WHERE key = ?", (self._key(url),))
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata store delete failed: {e}")
+
+    def get_record(self, record_id: bytes) -> Optional[Dict[str, Any]]:
+        """Return a stored download token record"""
+        try:
+            row = self._connect().execute(
+                "SELECT payload FROM format_records WHERE record_id = ? AND expires_at > ?",
+                (record_id, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata store read failed: {e}")
+            return None
+        return _decode(row[0]) if row else None
+
+    def put_record(self, record_id: bytes, expires_at: float, record: Dict[str, Any]) -> None:
+        """Store a download token record"""
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO format_records (record_id, expires_at, payload) VALUES (?, ?, ?)",
+                (record_id, expires_at, _encode(record)),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata store write failed: {e}")
+
+    def compact(self) -> int:
+        """
+        Delete expired and other-version entries and checkpoint the WAL
+
+        Returns:
+            Number of rows removed
+        """
+        now = time.time()
+        conn = self._connect()
+        removed = conn.execute(
+            "DELETE FROM extractions WHERE expires_at <= ? OR version != ?",
+            (now, self.version),
+        ).rowcount
+        removed += conn.execute(
+            "DELETE FROM format_records WHERE expires_at <= ?", (now,)
+        ).rowcount
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+
+def _ytdlp_version() -> str:
+    """Installed yt-dlp version, read without importing yt_dlp"""
+    try:
+        return importlib.metadata.version("yt-dlp")
+    except importlib.metadata.PackageNotFoundError:
+        # Frozen builds may not ship package metadata
+        from yt_dlp.version import __version__
+
+        return __version__
+
+
+async def run_compaction(store: MetadataStore, interval: float) -> None:
+    """Background task: compact the store every ``interval`` seconds"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await loop.run_in_executor(None, store.compact)
+            if removed:
+                logger.info(f"Metadata store compaction removed {removed} row(s)")
+        except sqlite3.Error as e:
+            logger.warning(f"Metadata store compaction failed: {e}")
+
+
+def create_metadata_store() -> Optional[MetadataStore]:
+    """Open the configured store, or return None if disabled or unavailable"""
+    if not settings.METADATA_STORE_ENABLED:
+        return None
+    path = settings.METADATA_STORE_PATH or os.path.join(
+        tempfile.gettempdir(), "urlens-metadata.sqlite3"
+    )
+    try:
+        return MetadataStore(
+            path,
+            ttl=settings.METADATA_STORE_TTL,
+            expiry_margin=settings.URL_EXPIRY_MARGIN,
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"Metadata store disabled, cannot open {path}: {e}")
+        return None
+
+
+# Global instance (None when disabled)
+metadata_store = create_metadata_store()
@@ -0,0 +1,369 @@
+"""Segment-aware downloads of HLS and DASH formats
+
+Formats with protocol ``m3u8_native`` or ``http_dash_segments`` have no
+single media URL: their ``url`` is a playlist, or the media is split into
+yt-dlp ``fragments``. Relaying that URL byte-for-byte hands the client a
+playlist file. Instead the segment list is resolved into a ``SegmentPlan``
+and the segments are fetched over the pooled client, several at a time,
+and yielded strictly in order so the concatenation is the media itself
+(MPEG-TS for plain HLS, fragmented MP4/WebM for DASH and fMP4 HLS).
+
+At most ``window`` segments are in flight or buffered, so memory stays
+bounded by ``window`` segment sizes however long the media is, and a slow
+client stops new fetches once the window is full.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import httpx
+
+from app.config import settings
+from app.core.exceptions import NetworkException
+from app.core.http_client import get_http_client
+from app.core.logger import logger
+from app.core.metrics import THROUGHPUT_BUCKETS, metrics
+
+HLS_PROTOCOLS = frozenset({"m3u8", "m3u8_native"})
+DASH_PROTOCOLS = frozenset({"http_dash_segments", "http_dash_segments_generator"})
+
+# Origin statuses worth retrying a segment for
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+_ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+def is_segmented(protocol: Optional[str]) -> bool:
+    """Whether a yt-dlp protocol needs the segment path instead of a plain relay"""
+    return protocol in HLS_PROTOCOLS or protocol in DASH_PROTOCOLS
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One media segment: a URL and, for byte-range playlists, an inclusive range"""
+
+    url: str
+    byte_range: Optional[Tuple[int, int]] = None
+
+
+@dataclass(frozen=True)
+class SegmentPlan:
+    """Ordered segments of a format and how to request them"""
+
+    segments: List[Segment]
+    headers: Dict[str, str]
+    kind: str  # "hls" or "dash"
+    fragmented: bool  # fMP4/WebM fragments rather than MPEG-TS
+
+    @property
+    def media_type(self) -> str:
+        return "video/mp4" if self.fragmented else "video/mp2t"
+
+
+@dataclass
+class M3U8:
+    """Parsed HLS playlist: either variants (master) or segments (media)"""
+
+    variants: List[Tuple[int, str]]
+    segments: List[Segment]
+    fragmented: bool
+    ended: bool
+
+
+def _attributes(value: str) -> Dict[str, str]:
+    return {key: val.strip('"') for key, val in _ATTRIBUTE_RE.findall(value)}
+
+
+def _byte_range(value: str, previous_end: Optional[int]) -> Tuple[int, int]:
+    """Parse ``<length>[@<offset>]``; without an offset the range follows the previous one"""
+    length, _, offset = value.partition("@")
+    if offset:
+        start = int(offset)
+    elif previous_end is not None:
+        start = previous_end + 1
+    else:
+        raise ValueError("BYTERANGE without offset has no previous range")
+    return start, start + int(length) - 1
+
+
+def parse_m3u8(text: str, base_url: str) -> M3U8:
+    """
+    Parse an HLS master or media playlist
+
+    Args:
+        text: Playlist body
+        base_url: URL the playlist was fetched from, for relative URIs
+
+    Returns:
+        M3U8 with absolute variant and segment URLs
+
+    Raises:
+        ValueError: If the playlist is malformed or encrypted
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise ValueError("Not an HLS playlist")
+
+    playlist = M3U8(variants=[], segments=[], fragmented=False, ended=False)
+    bandwidth: Optional[int] = None
+    pending_range: Optional[str] = None
+    last_end: Dict[str, int] = {}
+    current_map: Optional[Segment] = None
+
+    for line in lines[1:]:
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            bandwidth = int(_attributes(line.split(":", 1)[1]).get("BANDWIDTH", 0))
+        elif line.startswith("#EXT-X-KEY:"):
+            method = _attributes(line.split(":", 1)[1]).get("METHOD", "NONE")
+            if method != "NONE":
+                raise ValueError(f"Encrypted HLS ({method})")
+        elif line.startswith("#EXT-X-MAP:"):
+            attrs = _attributes(line.split(":", 1)[1])
+            url = urljoin(base_url, attrs["URI"])
+            byte_range = _byte_range(attrs["BYTERANGE"], None) if "BYTERANGE" in attrs else None
+            segment = Segment(url, byte_range)
+            if segment != current_map:
+                # The init segment precedes the media segments it applies to
+                playlist.segments.append(segment)
+                current_map = segment
+            playlist.fragmented = True
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            pending_range = line.split(":", 1)[1]
+        elif line == "#EXT-X-ENDLIST":
+            playlist.ended = True
+        elif line.startswith("#"):
+            continue
+        elif bandwidth is not None:
+            playlist.variants.append((bandwidth, urljoin(base_url, line)))
+            bandwidth = None
+        else:
+            url = urljoin(base_url, line)
+            byte_range = None
+            if pending_range is not None:
+                byte_range = _byte_range(pending_range, last_end.get(url))
+                last_end[url] = byte_range[1]
+                pending_range = None
+            playlist.segments.append(Segment(url, byte_range))
+
+    return playlist
+
+
+class SegmentService:
+    """Builds segment plans and streams them with a bounded in-order window"""
+
+    def __init__(self, window: int, max_retries: int, timeout: float):
+        """
+        Args:
+            window: Segments fetched ahead of the one being sent
+            max_retries: Retries per segment after transport errors or 5xx
+            timeout: Per-request timeout in seconds
+        """
+        self.window = max(1, window)
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+    async def plan(self, fmt: Dict[str, Any]) -> SegmentPlan:
+        """
+        Resolve the segments of a yt-dlp format dict
+
+        Args:
+            fmt: Format dict with ``fragments`` (DASH) or an HLS ``url``
+
+        Returns:
+            SegmentPlan listing every segment in playback order
+
+        Raises:
+            ValueError: If the format cannot be fetched segment by segment
+                (encrypted, live or not segmented); yt-dlp should handle it
+            httpx.HTTPError: If the playlist cannot be fetched
+        """
+        headers = dict(fmt.get("http_headers") or {})
+        fragments = fmt.get("fragments")
+        if callable(fragments):
+            # http_dash_segments_generator: fragments are produced while a
+            # live stream is downloaded, there is no list to plan
+            raise ValueError("DASH fragments are generated on the fly")
+        if fragments:
+            base = fmt.get("fragment_base_url") or fmt.get("url") or ""
+            segments = [
+                Segment(fragment.get("url") or urljoin(base, fragment["path"]))
+                for fragment in fragments
+            ]
+            return SegmentPlan(segments, headers, kind="dash", fragmented=True)
+
+        if fmt.get("protocol") not in HLS_PROTOCOLS:
+            raise ValueError(f"Protocol {fmt.get('protocol')} is not segmented")
+
+        url = fmt["url"]
+        playlist = await self._fetch_playlist(url, headers)
+        if playlist.variants:
+            # Master playlist: take the highest bandwidth rendition
+            url = max(playlist.variants)[1]
+            playlist = await self._fetch_playlist(url, headers)
+            if playlist.variants:
+                raise ValueError("Nested HLS master playlists")
+        if not playlist.ended:
+            raise ValueError("Live HLS playlists cannot be downloaded as a file")
+        if not playlist.segments:
+            raise ValueError("HLS playlist has no segments")
+        return SegmentPlan(playlist.segments, headers, kind="hls", fragmented=playlist.fragmented)
+
+    async def _fetch_playlist(self, url: str, headers: Dict[str, str]) -> M3U8:
+        response = await get_http_client().get(url, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_m3u8(response.text, str(response.url))
+
+    async def iter_bytes(self, plan: SegmentPlan) -> AsyncIterator[bytes]:
+        """
+        Yield the segments of a plan in order, fetching ahead in parallel
+
+        Outstanding fetches are cancelled when the consumer stops early.
+
+        Raises:
+            NetworkException: If a segment still fails after its retries
+        """
+        client = get_http_client()
+        pending: Deque["asyncio.Task[bytes]"] = deque()
+        upcoming = iter(enumerate(plan.segments))
+        started = time.monotonic()
+        sent = 0
+
+        def schedule() -> None:
+            for index, segment in upcoming:
+                pending.append(asyncio.create_task(self._fetch(client, plan, index, segment)))
+                if len(pending) >= self.window:
+                    return
+
+        try:
+            schedule()
+            while pending:
+                head = pending.popleft()
+                waited = time.monotonic()
+                data = await head
+                metrics.observe("segment_window_wait_seconds", time.monotonic() - waited)
+                schedule()
+                sent += len(data)
+                yield data
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            elapsed = time.monotonic() - started
+            if sent and elapsed > 0:
+                metrics.observe(
+                    "segmented_download_bytes_per_second",
+                    sent / elapsed,
+                    THROUGHPUT_BUCKETS,
+                    kind=plan.kind,
+                )
+
+    async def _fetch(
+        self, client: httpx.AsyncClient, plan: SegmentPlan, index: int, segment: Segment
+    ) -> bytes:
+        """Download one segment, retrying transient failures with backoff"""
+        headers = dict(plan.headers)
+        if segment.byte_range is not None:
+            start, end = segment.byte_range
+            headers["Range"] = f"bytes={start}-{end}"
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.inc("segment_retries_total", kind=plan.kind)
+                await asyncio.sleep(min(0.25 * 2 ** (attempt - 1), 4.0))
+            started = time.monotonic()
+            try:
+                response = await client.get(segment.url, headers=headers, timeout=self.timeout)
+            except httpx.TransportError as e:
+                logger.warning(f"Segment {index} attempt {attempt + 1} failed: {e}")
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                logger.warning(
+                    f"Segment {index} attempt {attempt + 1} got status {response.status_code}"
+                )
+                continue
+            if response.status_code not in (200, 206):
+                metrics.inc("segment_failures_total", kind=plan.kind)
+                raise NetworkException(
+                    f"Segment {index} failed with status {response.status_code}"
+                )
+
+            data = response.content
+            if segment.byte_range is not None and response.status_code == 200:
+                # Origin ignored the Range header
+                start, end = segment.byte_range
+                data = data[start:end + 1]
+            metrics.inc("segments_fetched_total", kind=plan.kind)
+            metrics.inc("segment_bytes_total", len(data), kind=plan.kind)
+            metrics.observe("segment_fetch_seconds", time.monotonic() - started, kind=plan.kind)
+            return data
+
+        metrics.inc("segment_failures_total", kind=plan.kind)
+        raise NetworkException(f"Segment {index} failed after {self.max_retries} retries")
+
+
+class SegmentStream:
+    """A segmented download whose first segment has already been fetched"""
+
+    def __init__(self, plan: SegmentPlan, segments: AsyncIterator[bytes]):
+        self.plan = plan
+        self._segments = segments
+        self._first = b""
+
+    async def open(self) -> "SegmentStream":
+        """Fetch the first segment, so an unusable plan fails before any byte is sent"""
+        try:
+            self._first = await self._segments.__anext__()
+        except StopAsyncIteration:
+            pass
+        return self
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        try:
+            if self._first:
+                yield self._first
+                self._first = b""
+            async for chunk in self._segments:
+                yield chunk
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._segments.aclose()  # type: ignore[attr-defined]
+
+
+# Global instance
+segment_service = SegmentService(
+    window=settings.SEGMENT_FETCH_WINDOW,
+    max_retries=settings.SEGMENT_MAX_RETRIES,
+    timeout=settings.SEGMENT_TIMEOUT,
+)
+
+
+async def open_segments(fmt: Dict[str, Any]) -> SegmentStream:
+    """
+    Plan a segmented format and start fetching it
+
+    Args:
+        fmt: yt-dlp format dict (``url``, ``protocol``, ``fragments``, ...)
+
+    Returns:
+        SegmentStream whose iter_bytes() yields the media
+
+    Raises:
+        ValueError: If the format cannot be fetched segment by segment
+        httpx.HTTPError: If the playlist cannot be fetched
+        NetworkException: If the first segment cannot be fetched
+    """
+    plan = await segment_service.plan(fmt)
+    stream = SegmentStream(plan, segment_service.iter_bytes(plan))
+    try:
+        return await stream.open()
+    except BaseException:
+        await stream.aclose()
+        raise
@@ -0,0 +1,169 @@
+"""Upstream media streams with transparent URL re-resolution
+
+Signed media URLs (googlevideo ``expire=``, Meta CDN ``oe=``, ...) stop
+working after a while. When the page URL and format id behind a stream are
+known, an expiring or rejected URL is re-resolved through yt-dlp and the
+stream continues from the bytes already sent using a Range request, so the
+client never sees the origin's 403.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.config import settings
+from app.core.exceptions import NetworkException
+from app.core.http_client import get_http_client
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.services.format_table import url_expiry
+from app.services.ytdlp_service import ytdlp_service
+
+# Origin statuses that mean "this signed URL is no longer valid"
+REFRESH_STATUSES = frozenset({403, 410})
+
+
+@dataclass(frozen=True)
+class FormatSource:
+    """Where an upstream URL came from, so it can be resolved again"""
+
+    source_url: str
+    format_id: str
+
+
+class UpstreamStream:
+    """A streaming upstream GET that can resume after drops and URL refreshes"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        source: Optional[FormatSource] = None,
+        timeout: float = 300.0,
+        start: int = 0,
+    ):
+        self.client = client
+        self.url = url
+        self.source = source
+        self.timeout = timeout
+        self.start = start
+        self.response: Optional[httpx.Response] = None
+        self._refreshes = 0
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code if self.response is not None else 0
+
+    @property
+    def headers(self) -> httpx.Headers:
+        return self.response.headers if self.response is not None else httpx.Headers()
+
+    async def open(self) -> "UpstreamStream":
+        """Send the initial request, refreshing the URL first if it is about to expire"""
+        if self.source is not None:
+            expires_at = url_expiry(self.url)
+            if expires_at is not None and expires_at - time.time() <= settings.URL_EXPIRY_MARGIN:
+                await self._refresh("expiring")
+
+        self.response = await self._send(offset=self.start)
+        if self.response.status_code in REFRESH_STATUSES and self._can_refresh():
+            await self.response.aclose()
+            await self._refresh(f"origin_{self.response.status_code}")
+            self.response = await self._send(offset=self.start)
+        return self
+
+    async def iter_bytes(self, chunk_size: int = 8192) -> AsyncIterator[bytes]:
+        """Yield the body, resuming with Range if the upstream connection drops"""
+        # Resumes are relative to the origin's body: all of it after a 200 to a ranged open
+        base = self.start if self.status_code == 206 else 0
+        sent = 0
+        skip = 0
+        resumed_at = -1
+        while True:
+            try:
+                async for chunk in self.response.aiter_bytes(chunk_size):  # type: ignore[union-attr]
+                    if skip:
+                        # Origin ignored our Range header; drop what was already sent
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+                        chunk = chunk[skip:]
+                        skip = 0
+                    sent += len(chunk)
+                    yield chunk
+                return
+            except httpx.TransportError as e:
+                # Only resume known formats, and only if the last resume made progress
+                if self.source is None or sent == resumed_at:
+                    raise
+                logger.warning(f"Upstream dropped after {sent} bytes, resuming: {e}")
+
+            resumed_at = sent
+            await self.response.aclose()  # type: ignore[union-attr]
+            metrics.inc("upstream_resumes_total")
+            self.response = await self._send(offset=base + sent)
+            if self.response.status_code in REFRESH_STATUSES and self._can_refresh():
+                await self.response.aclose()
+                await self._refresh(f"origin_{self.response.status_code}")
+                self.response = await self._send(offset=base + sent)
+
+            if self.response.status_code == 200:
+                skip = base + sent
+            elif self.response.status_code != 206:
+                status = self.response.status_code
+                await self.response.aclose()
+                raise NetworkException(f"Upstream resume failed with status {status}")
+
+    async def aclose(self) -> None:
+        if self.response is not None:
+            await self.response.aclose()
+
+    def _can_refresh(self) -> bool:
+        return self.source is not None and self._refreshes < settings.MAX_URL_REFRESHES
+
+    async def _send(self, offset: int) -> httpx.Response:
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        request = self.client.build_request(
+            "GET", self.url, headers=headers, timeout=self.timeout
+        )
+        return await self.client.send(request, stream=True)
+
+    async def _refresh(self, reason: str) -> None:
+        """Swap in a freshly resolved URL for the same format"""
+        assert self.source is not None
+        self._refreshes += 1
+        metrics.inc("upstream_url_refreshes_total", reason=reason)
+        logger.info(f"Refreshing upstream URL ({reason}) for format {self.source.format_id}")
+        self.url = await ytdlp_service.run(
+            ytdlp_service.resolve_format_url,
+            self.source.source_url,
+            self.source.format_id,
+            self.url,
+        )
+
+
+async def open_upstream(
+    url: str, source: Optional[FormatSource] = None, timeout: float = 300.0, start: int = 0
+) -> UpstreamStream:
+    """
+    Open a streaming GET to a media URL
+
+    Args:
+        url: Upstream media URL
+        source: Page URL and format id the URL was extracted from, enabling
+            re-resolution; None relays the URL as-is
+        timeout: httpx timeout in seconds
+        start: Byte offset to request from (a 206 continues there, a 200
+            means the origin ignored the Range and sends the whole body)
+
+    Returns:
+        UpstreamStream whose response status the caller must check
+    """
+    stream = UpstreamStream(get_http_client(), url, source, timeout=timeout, start=start)
+    try:
+        return await stream.open()
+    except BaseException:
+        await stream.aclose()
+        raise
@@ -0,0 +1,210 @@
+"""Signed download tokens
+
+``/download-info`` issues a short opaque token per download option instead
+of making clients send multi-KB upstream URLs back in query strings. The
+token is ``base64url(record_id | expires) . base64url(hmac)``; the record it
+points to lives server-side and holds everything needed to start the
+download. Records are mirrored to the shared metadata store so a token
+issued by one worker resolves on any other.
+
+Issuance is deterministic: the record id is an HMAC of the record, whose
+expiry is rounded up to EXPIRY_BUCKET. Every worker (and every re-render
+after a cache eviction) therefore issues the same token for the same
+download, so response bodies and their ETags stay stable.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import struct
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from app.config import settings
+from app.core.exceptions import InvalidTokenException, TokenExpiredException
+from app.core.logger import logger
+from app.services.format_table import url_expiry
+from app.services.metadata_store import MetadataStore, metadata_store
+
+_RECORD_ID_BYTES = 12
+_SIGNATURE_BYTES = 16
+_PAYLOAD = struct.Struct(f">{_RECORD_ID_BYTES}sI")
+
+# Prune expired records every N issued tokens
+_PRUNE_INTERVAL = 256
+
+# TTL-based expiries are rounded up to this many seconds so tokens are reproducible
+EXPIRY_BUCKET = 600
+
+# Example values that must never sign real tokens
+PLACEHOLDER_SECRETS = frozenset({"change-me", "changeme", "change_me", "secret", "your-secret-here"})
+
+
+@dataclass(frozen=True)
+class FormatRecord:
+    """Server-side record a download token refers to"""
+
+    source_url: str
+    format_id: str
+    filename: str
+    expires_at: int
+    direct_url: Optional[str] = None
+    protocol: str = "https"
+
+    @property
+    def is_merge(self) -> bool:
+        return self.direct_url is None
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenService:
+    """Issues and verifies HMAC-signed download tokens"""
+
+    def __init__(self, secret: str, ttl: int, store: Optional[MetadataStore] = None):
+        """
+        Initialize the signing key and record store
+
+        Raises:
+            ValueError: If the secret is a well-known placeholder
+        """
+        if secret.strip().lower() in PLACEHOLDER_SECRETS:
+            raise ValueError(
+                f"DOWNLOAD_TOKEN_SECRET is set to the placeholder '{secret}'; anyone could "
+                "forge download tokens with it. Set a random value or leave it empty."
+            )
+        if not secret:
+            secret = secrets.token_hex(32)
+            logger.warning(
+                "DOWNLOAD_TOKEN_SECRET is not set; using a per-process secret. "
+                "Tokens will not verify across workers or restarts."
+            )
+        self._key = secret.encode("utf-8")
+        self.ttl = ttl
+        self._records: Dict[bytes, FormatRecord] = {}
+        self.store = store
+        self._lock = threading.Lock()
+        self._issued = 0
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._key, payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+    def _record_id(self, record: FormatRecord) -> bytes:
+        """Keyed hash of the record: reproducible, but not guessable without the secret"""
+        content = json.dumps(asdict(record), sort_keys=True).encode("utf-8")
+        return hmac.new(self._key, b"record:" + content, hashlib.sha256).digest()[:_RECORD_ID_BYTES]
+
+    def issue(
+        self,
+        source_url: str,
+        format_id: str,
+        filename: str,
+        direct_url: Optional[str] = None,
+        upstream_expiry: Optional[int] = None,
+        protocol: str = "https",
+    ) -> str:
+        """
+        Store a format record and return a signed token for it
+
+        The token expires with the upstream URL when it carries an expiry,
+        and after DOWNLOAD_TOKEN_TTL (rounded up to EXPIRY_BUCKET) otherwise.
+        The same record issued within one bucket yields the same token.
+
+        Args:
+            source_url: The original page URL
+            format_id: yt-dlp format id or merge selector ("137+140")
+            filename: Filename to serve the download as
+            direct_url: Upstream media URL, or None for merged formats
+            upstream_expiry: Expiry of the underlying media URLs, if known
+                (defaults to the one encoded in ``direct_url``)
+            protocol: yt-dlp protocol of ``direct_url`` (HLS/DASH formats
+                are fetched segment by segment)
+
+        Returns:
+            Opaque URL-safe token
+        """
+        expires_at = -(-(int(time.time()) + self.ttl) // EXPIRY_BUCKET) * EXPIRY_BUCKET
+        if upstream_expiry is None and direct_url:
+            upstream_expiry = url_expiry(direct_url)
+        if upstream_expiry:
+            expires_at = min(expires_at, upstream_expiry)
+
+        record = FormatRecord(
+            source_url=source_url,
+            format_id=format_id,
+            filename=filename,
+            expires_at=expires_at,
+            direct_url=direct_url,
+            protocol=protocol,
+        )
+        record_id = self._record_id(record)
+
+        with self._lock:
+            known = record_id in self._records
+            self._records[record_id] = record
+            self._issued += 1
+            if self._issued % _PRUNE_INTERVAL == 0:
+                self._prune()
+        if self.store is not None and not known:
+            self.store.put_record(record_id, expires_at, asdict(record))
+
+        payload = _PAYLOAD.pack(record_id, expires_at)
+        return f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+
+    def resolve(self, token: str) -> FormatRecord:
+        """
+        Verify a token and return the record it refers to
+
+        Raises:
+            InvalidTokenException: If the token is malformed, forged or unknown
+            TokenExpiredException: If the token has expired
+        """
+        try:
+            encoded_payload, encoded_signature = token.split(".", 1)
+            payload = _b64decode(encoded_payload)
+            signature = _b64decode(encoded_signature)
+            record_id, expires_at = _PAYLOAD.unpack(payload)
+        except (ValueError, struct.error):
+            raise InvalidTokenException("malformed token")
+
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidTokenException("signature mismatch")
+        if expires_at < time.time():
+            raise TokenExpiredException("token expired")
+
+        record = self._records.get(record_id)
+        if record is None and self.store is not None:
+            # Issued by another worker or before a restart
+            stored = self.store.get_record(record_id)
+            if stored is not None:
+                record = FormatRecord(**stored)
+                with self._lock:
+                    self._records[record_id] = record
+        if record is None:
+            raise InvalidTokenException("unknown token")
+        return record
+
+    def _prune(self) -> None:
+        """Drop expired records (caller holds the lock)"""
+        now = time.time()
+        expired = [key for key, record in self._records.items() if record.expires_at < now]
+        for key in expired:
+            del self._records[key]
+
+
+# Global instance
+token_service = TokenService(
+    secret=settings.DOWNLOAD_TOKEN_SECRET,
+    ttl=settings.DOWNLOAD_TOKEN_TTL,
+    store=metadata_store,
+)
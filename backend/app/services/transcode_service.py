@@ -0,0 +1,219 @@
+"""Streaming audio transcoding and remuxing through ffmpeg
+
+The source audio is piped into ffmpeg's stdin and the encoded output read
+from its stdout as the client consumes it, so nothing is staged on disk.
+Backpressure runs end to end: a slow client stops stdout reads, ffmpeg
+blocks on its full stdout pipe and stops reading stdin, the stdin writer
+blocks in ``drain()`` and the upstream body is no longer read.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict
+
+from app.config import settings
+from app.core.exceptions import TranscodeException, TranscoderBusyException
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+_CHUNK = 64 * 1024
+_STDERR_TAIL = 2048
+
+
+@dataclass(frozen=True)
+class AudioCodec:
+    """ffmpeg encoder settings for one output format"""
+
+    encoder: str
+    muxer: str
+    ext: str
+    media_type: str
+
+
+AUDIO_CODECS: Dict[str, AudioCodec] = {
+    "mp3": AudioCodec("libmp3lame", "mp3", "mp3", "audio/mpeg"),
+    "aac": AudioCodec("aac", "adts", "aac", "audio/aac"),
+}
+
+BITRATES = (64, 96, 128, 160, 192, 256, 320)
+
+
+class Transcoder:
+    """One ffmpeg process fed from an async byte stream"""
+
+    def __init__(
+        self,
+        process: asyncio.subprocess.Process,
+        source: AsyncIterator[bytes],
+        release: Callable[[], None],
+    ):
+        self.process = process
+        self.source = source
+        self._release = release
+        self._stderr = b""
+        self._feeder = asyncio.create_task(self._feed())
+        self._stderr_reader = asyncio.create_task(self._read_stderr())
+        self._closed = False
+
+    async def _feed(self) -> None:
+        """Copy the source into ffmpeg's stdin, pausing while its pipe is full"""
+        stdin = self.process.stdin
+        assert stdin is not None
+        try:
+            async for chunk in self.source:
+                stdin.write(chunk)
+                await stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg exited early; its exit status is reported by iter_bytes
+            pass
+        finally:
+            if not stdin.is_closing():
+                stdin.close()
+            aclose = getattr(self.source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _read_stderr(self) -> None:
+        """Keep the last bytes of ffmpeg's log (an unread pipe would stall it)"""
+        stderr = self.process.stderr
+        assert stderr is not None
+        while chunk := await stderr.read(_CHUNK):
+            self._stderr = (self._stderr + chunk)[-_STDERR_TAIL:]
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """Yield encoded output; ffmpeg is killed if the consumer goes away"""
+        stdout = self.process.stdout
+        assert stdout is not None
+        try:
+            while chunk := await stdout.read(_CHUNK):
+                yield chunk
+
+            returncode = await self.process.wait()
+            await self._feeder
+            if returncode != 0:
+                metrics.inc("transcode_failures_total")
+                message = self._stderr.decode("utf-8", "replace").strip()
+                logger.error(f"ffmpeg exited with {returncode}: {message}")
+                raise TranscodeException(f"ffmpeg exited with status {returncode}")
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Stop ffmpeg and the feeder and free the transcoder slot"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self.process.returncode is None:
+                self.process.kill()
+                metrics.inc("transcodes_cancelled_total")
+            self._feeder.cancel()
+            await self.process.wait()
+            await asyncio.gather(self._feeder, self._stderr_reader, return_exceptions=True)
+        finally:
+            self._release()
+
+
+class TranscodeService:
+    """Runs ffmpeg transcoders and remuxers, at most one per CPU by default"""
+
+    def __init__(self, ffmpeg_path: str, max_concurrent: int, queue_timeout: float):
+        """
+        Args:
+            ffmpeg_path: ffmpeg executable
+            max_concurrent: Concurrent ffmpeg processes (0 = CPU count)
+            queue_timeout: Seconds to wait for a free slot before rejecting
+        """
+        self.ffmpeg_path = ffmpeg_path
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+
+    async def open(
+        self, source: AsyncIterator[bytes], codec: str, bitrate: int
+    ) -> Transcoder:
+        """
+        Start transcoding a byte stream
+
+        Args:
+            source: Async iterator of the input media bytes; closed when done
+            codec: Key of AUDIO_CODECS
+            bitrate: Output bitrate in kbit/s
+
+        Returns:
+            Transcoder whose iter_bytes() yields the encoded audio
+
+        Raises:
+            TranscoderBusyException: If no slot frees up within the queue timeout
+            TranscodeException: If ffmpeg cannot be started
+        """
+        target = AUDIO_CODECS[codec]
+        transcoder = await self._start(
+            source,
+            "-vn",
+            "-c:a", target.encoder,
+            "-b:a", f"{bitrate}k",
+            "-f", target.muxer,
+        )
+        metrics.inc("transcodes_total", codec=codec)
+        return transcoder
+
+    async def remux(self, source: AsyncIterator[bytes]) -> Transcoder:
+        """
+        Rewrap a byte stream (e.g. concatenated MPEG-TS segments) as MP4
+
+        Streams are copied, not re-encoded. The output is fragmented MP4,
+        the only MP4 layout that can be written to a pipe.
+
+        Raises:
+            TranscoderBusyException: If no slot frees up within the queue timeout
+            TranscodeException: If ffmpeg cannot be started
+        """
+        transcoder = await self._start(
+            source,
+            "-c", "copy",
+            "-f", "mp4",
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+        )
+        metrics.inc("transcodes_total", codec="remux")
+        return transcoder
+
+    async def _start(self, source: AsyncIterator[bytes], *output_args: str) -> Transcoder:
+        """Wait for a slot and start ffmpeg reading stdin and writing stdout"""
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            metrics.inc("transcodes_rejected_total")
+            raise TranscoderBusyException(
+                f"All {self.max_concurrent} transcoders are busy, try again shortly"
+            )
+        metrics.observe("transcode_queue_wait_seconds", time.monotonic() - started)
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.ffmpeg_path,
+                "-hide_banner", "-loglevel", "error",
+                "-i", "pipe:0",
+                *output_args,
+                "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            self._slots.release()
+            logger.error(f"Cannot start ffmpeg ({self.ffmpeg_path}): {e}")
+            raise TranscodeException("Media conversion is not available on this server")
+
+        return Transcoder(process, source, self._slots.release)
+
+
+# Global instance
+transcode_service = TranscodeService(
+    ffmpeg_path=settings.FFMPEG_PATH,
+    max_concurrent=settings.MAX_TRANSCODERS,
+    queue_timeout=settings.TRANSCODE_QUEUE_TIMEOUT,
+)
@@ -1,10 +1,25 @@
-"""yt-dlp service wrapper"""
+"""yt-dlp service wrapper
 
-import yt_dlp
+yt_dlp and its extractor registry take seconds to import in the frozen
+build, so they are loaded on first use (or by the warm-up task started at
+startup) rather than when this module is imported.
+"""
+
+import copy
+import functools
+import os
 import random
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Callable, Dict, List, Any, Optional, TypeVar
 from app.core.logger import logger
+from app.core.metrics import metrics
+from app.core.profiling import bind_profile
 from app.core.exceptions import (
+    URLensException,
+    AuthenticationRequiredException,
     UnsupportedURLException,
     PrivateContentException,
     DRMProtectedException,
@@ -12,6 +27,54 @@ from app.core.exceptions import (
     NetworkException,
 )
 from app.config import settings
+from app.services.extraction_scheduler import (
+    DOWNLOAD,
+    FORMATS,
+    INTERACTIVE,
+    ExtractionScheduler,
+)
+from app.services.format_table import FormatEntry, FormatTable
+from app.services.info_cache import CachedInfo, InfoCache, NegativeCache
+from app.services.metadata_store import metadata_store
+
+T = TypeVar("T")
+
+# get_info() callers only read top-level fields and formats, never playlist
+# entries, so stop enumerating a playlist after its first entry. Extraction
+# errors must raise (not yield None) so they map to a specific exception.
+_SUMMARY_OPTIONS = {
+    "lazy_playlist": True,
+    "playlist_items": "1",
+    "ignoreerrors": "only_download",
+}
+
+_yt_dlp: Optional[ModuleType] = None
+_yt_dlp_lock = threading.Lock()
+
+
+def load_ytdlp() -> ModuleType:
+    """
+    Import yt_dlp and build its extractor registry, once per process
+
+    Thread-safe: concurrent callers block until the first import finishes.
+
+    Returns:
+        The yt_dlp module
+    """
+    global _yt_dlp
+    if _yt_dlp is None:
+        with _yt_dlp_lock:
+            if _yt_dlp is None:
+                started = time.perf_counter()
+                import yt_dlp
+                from yt_dlp.extractor import gen_extractor_classes
+
+                gen_extractor_classes()
+                elapsed = time.perf_counter() - started
+                metrics.observe("ytdlp_load_seconds", elapsed)
+                logger.info(f"yt-dlp {yt_dlp.version.__version__} loaded in {elapsed:.2f}s")
+                _yt_dlp = yt_dlp
+    return _yt_dlp
 
 
 class YTDLPService:
@@ -47,6 +110,10 @@ class YTDLPService:
             "format": "bestvideo+bestaudio/best",
             "merge_output_format": "mp4",
             
+            # List playlist/channel entries instead of resolving each one;
+            # single videos are unaffected
+            "extract_flat": "in_playlist",
+            
             # YouTube specific options
             "extractor_args": {
                 "youtube": {
@@ -56,10 +123,68 @@ class YTDLPService:
             },
         }
 
+        self.cache = InfoCache(
+            ttl=settings.INFO_CACHE_TTL, max_entries=settings.INFO_CACHE_MAX_ENTRIES
+        )
+        self.store = metadata_store
+        self.failures = NegativeCache(
+            ttls={
+                UnsupportedURLException: settings.NEGATIVE_CACHE_TTL_UNSUPPORTED,
+                DRMProtectedException: settings.NEGATIVE_CACHE_TTL_DRM,
+                PrivateContentException: settings.NEGATIVE_CACHE_TTL_PRIVATE,
+                AuthenticationRequiredException: settings.NEGATIVE_CACHE_TTL_AUTH,
+                ExtractionException: settings.NEGATIVE_CACHE_TTL_EXTRACTION,
+                NetworkException: settings.NEGATIVE_CACHE_TTL_NETWORK,
+            },
+            max_entries=settings.NEGATIVE_CACHE_MAX_ENTRIES,
+        )
+        self.playlist_cache = InfoCache(
+            ttl=settings.INFO_CACHE_TTL, max_entries=settings.INFO_CACHE_MAX_ENTRIES
+        )
+
+        # Blocking yt-dlp work runs here instead of on the event loop,
+        # admitted by priority so downloads cannot crowd out /analyze
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.EXTRACTION_WORKERS, thread_name_prefix="ytdlp"
+        )
+        self.scheduler = ExtractionScheduler(
+            self.executor,
+            workers=settings.EXTRACTION_WORKERS,
+            reserved={
+                INTERACTIVE: settings.EXTRACTION_RESERVED_INTERACTIVE,
+                FORMATS: settings.EXTRACTION_RESERVED_FORMATS,
+            },
+            limits={DOWNLOAD: settings.EXTRACTION_MAX_DOWNLOADS},
+            aging=settings.EXTRACTION_AGING_SECONDS,
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any, priority: str = FORMATS) -> T:
+        """
+        Run a blocking yt-dlp call on the extraction executor
+
+        Args:
+            func: Blocking callable
+            *args: Its arguments
+            priority: Scheduling class: INTERACTIVE, FORMATS or DOWNLOAD
+        """
+        return await self.scheduler.submit(
+            priority, functools.partial(bind_profile(func), *args)
+        )
+
+    async def warm_up(self) -> None:
+        """Load yt-dlp in the background so the first extraction doesn't pay for it"""
+        await self.run(load_ytdlp, priority=INTERACTIVE)
+
+    def shutdown(self) -> None:
+        """Fail queued extraction jobs, reject new ones and stop the executor"""
+        self.scheduler.shutdown()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
     def _get_browser_cookies(self):
         """Try to get cookies from available browsers"""
         # Try a wider range of browsers and profiles
         browsers = ["chrome", "firefox", "edge", "opera", "brave", "vivaldi", "safari"]
+        yt_dlp = load_ytdlp()
 
         for browser in browsers:
             try:
@@ -79,13 +204,36 @@ class YTDLPService:
         logger.warning("No browser cookies available for retry")
         return None
 
-    def extract_info(self, url: str, download: bool = False) -> Dict[str, Any]:
+    def is_supported(self, url: str) -> bool:
+        """
+        Whether a site-specific yt-dlp extractor handles the URL
+
+        The generic extractor, which accepts any page or media file, does
+        not count.
+
+        Args:
+            url: The URL to check
+
+        Returns:
+            True if a dedicated extractor matches the URL
+        """
+        yt_dlp = load_ytdlp()
+        return any(
+            ie.suitable(url)
+            for ie in yt_dlp.extractor.gen_extractor_classes()
+            if ie.ie_key() != "Generic"
+        )
+
+    def extract_info(
+        self, url: str, download: bool = False, options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Extract information from URL using yt-dlp
 
         Args:
             url: The URL to extract information from
             download: Whether to download the file
+            options: Extra yt-dlp options for this call
 
         Returns:
             Dictionary containing extracted information
@@ -98,8 +246,10 @@ class YTDLPService:
         """
         options = {
             **self.base_options,
+            **(options or {}),
             "skip_download": not download,
         }
+        yt_dlp = load_ytdlp()
 
         try:
             with yt_dlp.YoutubeDL(options) as ydl:  # type: ignore
@@ -153,8 +303,7 @@ class YTDLPService:
                 if browser_cookies:
                     try:
                         options_with_cookies = {
-                            **self.base_options,
-                            "skip_download": not download,
+                            **options,
                             "cookiesfrombrowser": browser_cookies,
                         }
                         with yt_dlp.YoutubeDL(options_with_cookies) as ydl:  # type: ignore
@@ -163,11 +312,11 @@ class YTDLPService:
                             return info  # type: ignore
                     except Exception as retry_error:
                         logger.error(f"Retry with cookies failed: {retry_error}")
-                        raise ExtractionException(
+                        raise AuthenticationRequiredException(
                             "YouTube requires authentication. Please make sure you are signed into YouTube in your Chrome, Firefox, or Edge browser, then restart the backend server."
                         )
                 else:
-                    raise ExtractionException(
+                    raise AuthenticationRequiredException(
                         "YouTube requires authentication. Please make sure you are signed into YouTube in your Chrome, Firefox, or Edge browser, then restart the backend server."
                     )
             else:
@@ -188,17 +337,235 @@ class YTDLPService:
                 logger.error(f"Unexpected error: {e}")
                 raise ExtractionException(f"Failed to extract information: {str(e)}")
 
-    def get_metadata(self, url: str) -> Dict[str, Any]:
+    def get_info(
+        self, url: str, refresh: bool = False, authenticated: bool = False
+    ) -> CachedInfo:
+        """
+        Get the extraction result for a URL, reusing a cached one if fresh
+
+        Looks in this worker's cache first, then in the shared metadata
+        store, and only then runs yt-dlp. A failed extraction is remembered
+        for a TTL that depends on the error, and replayed without running
+        yt-dlp.
+
+        Args:
+            url: The URL to extract
+            refresh: Skip the cache and extract again
+            authenticated: Retry with browser cookies, ignoring a cached failure
+
+        Returns:
+            CachedInfo with the info dict and its FormatTable
+
+        Raises:
+            URLensException: The extraction error, possibly replayed from cache
+        """
+        if not refresh:
+            cached = self.cache.get(url)
+            if cached is not None:
+                logger.debug(f"Extraction cache hit: {url}")
+                return cached
+            if self.store is not None:
+                stored = self.store.get_info(url)
+                if stored is not None:
+                    logger.debug(f"Metadata store hit: {url}")
+                    return self.cache.put(url, stored)
+
+        options = dict(_SUMMARY_OPTIONS)
+        if authenticated:
+            browser_cookies = self._get_browser_cookies()
+            if browser_cookies:
+                options["cookiesfrombrowser"] = browser_cookies
+        else:
+            failure = self.failures.get(url)
+            if failure is not None:
+                logger.info(f"Replaying cached {type(failure).__name__} for: {url}")
+                metrics.inc("negative_cache_hits_total", error=type(failure).__name__)
+                raise failure
+
+        try:
+            info = self.extract_info(url, download=False, options=options)
+            if not info:
+                raise ExtractionException("No information could be extracted from this URL")
+        except URLensException as e:
+            self.failures.put(url, e)
+            raise
+
+        self.failures.invalidate(url)
+        if self.store is not None:
+            self.store.put_info(url, info)
+        return self.cache.put(url, info)
+
+    def get_playlist_page(
+        self, url: str, start: int, count: int, authenticated: bool = False
+    ) -> Dict[str, Any]:
+        """
+        List one page of a playlist or channel without resolving its entries
+
+        Only the requested slice is enumerated (``playlist_items``) and the
+        entries are returned as yt-dlp lists them (``extract_flat``), so a
+        page of a large channel costs a few listing requests instead of a
+        full extraction per video. A video URL yields a single entry.
+
+        Args:
+            url: Playlist, channel or video URL
+            start: 1-based index of the first entry
+            count: Maximum number of entries
+            authenticated: List with browser cookies (uncached)
+
+        Returns:
+            Dict with title, id, uploader, entry_count (None if unknown),
+            entries (lightweight dicts) and has_more
+        """
+        key = _page_key(url, start, count)
+        cached = self.playlist_cache.get(key)
+        if cached is not None and not authenticated:
+            return cached.info
+
+        # One extra item tells whether another page follows
+        options = {
+            "extract_flat": "in_playlist",
+            "lazy_playlist": True,
+            "playlist_items": f"{start}-{start + count}",
+        }
+        if authenticated:
+            browser_cookies = self._get_browser_cookies()
+            if browser_cookies:
+                options["cookiesfrombrowser"] = browser_cookies
+        info = self.extract_info(url, options=options)
+        if not info:
+            raise ExtractionException("No information could be extracted from this URL")
+
+        if info.get("_type") == "playlist":
+            listed = list(info.get("entries") or [])
+            entries = [_playlist_entry(e) for e in listed[:count] if e]
+            has_more = len(listed) > count
+            entry_count = info.get("playlist_count")
+        else:
+            entries = [_playlist_entry(info)]
+            has_more = False
+            entry_count = 1
+
+        page = {
+            "id": info.get("id"),
+            "title": info.get("title") or "Unknown Title",
+            "uploader": info.get("uploader") or info.get("channel"),
+            "entry_count": entry_count,
+            "entries": [e for e in entries if e["url"]],
+            "has_more": has_more,
+        }
+        self.playlist_cache.put(key, page)
+        return page
+
+    def resolve_format_url(self, source_url: str, format_id: str, stale_url: str) -> str:
+        """
+        Get a fresh upstream URL for a format whose URL expired or was rejected
+
+        Uses the cached extraction when it already holds a different, still
+        valid URL for the format; otherwise extracts the source URL again.
+
+        Args:
+            source_url: The original page URL
+            format_id: yt-dlp format id
+            stale_url: The URL that expired or was rejected
+
+        Returns:
+            The new upstream URL
+
+        Raises:
+            ExtractionException: If the format is no longer offered
+        """
+        cached = self.cache.get(source_url)
+        if cached is not None:
+            entry = cached.table.get(format_id)
+            if (
+                entry is not None
+                and entry.url != stale_url
+                and not entry.expires_within(settings.URL_EXPIRY_MARGIN)
+            ):
+                return entry.url
+
+        logger.info(f"Re-resolving format {format_id} of: {source_url}")
+        entry = self.get_info(source_url, refresh=True).table.get(format_id)
+        if entry is None:
+            raise ExtractionException(f"Format {format_id} is no longer available")
+        return entry.url
+
+    def get_format(self, source_url: str, format_id: str) -> Dict[str, Any]:
+        """
+        Get the yt-dlp format dict of one format, re-extracting if its URL is expiring
+
+        Args:
+            source_url: The original page URL
+            format_id: yt-dlp format id
+
+        Returns:
+            Format dict (with ``http_headers``, ``fragments``, ...)
+
+        Raises:
+            ExtractionException: If the format is not offered
+        """
+        cached = self.get_info(source_url)
+        entry = cached.table.get(format_id)
+        if entry is not None and entry.expires_within(settings.URL_EXPIRY_MARGIN):
+            cached = self.get_info(source_url, refresh=True)
+
+        for fmt in cached.info.get("formats") or []:
+            if str(fmt.get("format_id")) == format_id:
+                return fmt
+        raise ExtractionException(f"Format {format_id} is no longer available")
+
+    def download_formats(
+        self, info: Dict[str, Any], format_selector: str, output_dir: str
+    ) -> str:
+        """
+        Download (and merge) formats of an already extracted info dict
+
+        Runs yt-dlp's format processing on the cached info dict, so no second
+        extraction round-trip is made.
+
+        Args:
+            info: Info dict returned by extract_info
+            format_selector: yt-dlp format selector (e.g. "137+140")
+            output_dir: Directory to write the output file to
+
+        Returns:
+            Path of the downloaded file
+
+        Raises:
+            ExtractionException: If yt-dlp produced no output file
+        """
+        ydl_opts = {
+            "format": format_selector,
+            "outtmpl": os.path.join(output_dir, "download.%(ext)s"),
+            "merge_output_format": "mp4",
+            "quiet": True,
+            "no_warnings": True,
+            "noprogress": True,
+        }
+
+        yt_dlp = load_ytdlp()
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:  # type: ignore
+            ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+        # Find the output file (the extension depends on the merge)
+        for file in os.listdir(output_dir):
+            if file.startswith("download") and not file.endswith(".part"):
+                return os.path.join(output_dir, file)
+
+        raise ExtractionException("Failed to create merged file")
+
+    def get_metadata(self, url: str, authenticated: bool = False) -> Dict[str, Any]:
         """
         Get basic metadata from URL without downloading
 
         Args:
             url: The URL to get metadata from
+            authenticated: Retry with browser cookies, ignoring a cached failure
 
         Returns:
             Dictionary with platform, title, and thumbnail_url
         """
-        info = self.extract_info(url, download=False)
+        info = self.get_info(url, authenticated=authenticated).info
 
         # Extract platform name
         platform = info.get("extractor_key", "unknown").lower()
@@ -236,149 +603,105 @@ class YTDLPService:
             "thumbnail_url": info.get("thumbnail", None),
         }
 
+    def has_cached_result(self, url: str) -> bool:
+        """Whether an extraction result or failure for the URL is cached in memory"""
+        return self.cache.get(url) is not None or self.failures.get(url) is not None
+
+    def get_format_table(self, url: str) -> FormatTable:
+        """
+        Extract a URL and index its formats
+
+        Args:
+            url: The URL to get formats for
+
+        Returns:
+            FormatTable shared by the download and merge paths
+        """
+        return self.get_info(url).table
+
     def get_download_options(self, url: str) -> List[Dict[str, Any]]:
         """
         Get available download options for URL, categorized and limited
         Prioritizes merged video+audio formats for best user experience
         """
-        info = self.extract_info(url, download=False)
-        formats = info.get("formats", [])
+        cached = self.get_info(url)
+        return self.build_download_options(cached.info, cached.table)
 
-        if not formats:
-            raise ExtractionException("No formats available for this URL")
+    def build_download_options(
+        self, info: Dict[str, Any], table: Optional[FormatTable] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the client-facing option list from an extracted info dict
 
-        video_audio = []
-        audio_only = []
-        video_only = []
-        seen_combos = set()
+        Args:
+            info: Info dict returned by extract_info
+            table: FormatTable already built for ``info``, if any
 
-        # Track best video and audio for creating merged options
-        best_video_by_height = {}  # height -> format
-        best_audio = None
+        Returns:
+            List of option dicts, merged video+audio first
+        """
+        formats = info.get("formats") or []
 
-        for fmt in formats:
-            if not fmt.get("url"):
-                continue
+        if not formats:
+            raise ExtractionException("No formats available for this URL")
 
-            ext = fmt.get("ext", "mp4")
-            height = fmt.get("height")
-            vcodec = fmt.get("vcodec", "none")
-            acodec = fmt.get("acodec", "none")
-            filesize = fmt.get("filesize") or fmt.get("filesize_approx")
-            format_id = fmt.get("format_id", "")
-
-            # Helper to create option dict
-            def create_option(label, type_name, fmt_id=format_id, size=filesize):
-                combo = (label, ext, type_name)
-                if combo in seen_combos:
-                    return None
-                seen_combos.add(combo)
-                return {
-                    "quality_label": label,
-                    "extension": ext,
-                    "file_size_approx": size,
-                    "download_url": fmt["url"],
-                    "type": type_name,
-                    "format_id": fmt_id,
-                }
+        if table is None:
+            table = FormatTable.build(formats)
 
-            # Track best audio for merging
-            if acodec != "none" and (
-                best_audio is None
-                or (fmt.get("abr", 0) or 0) > (best_audio.get("abr", 0) or 0)
-            ):
-                best_audio = fmt
-
-            # Track best video by resolution for merging
-            if height and vcodec != "none":
-                if height not in best_video_by_height:
-                    best_video_by_height[height] = fmt
-
-            # 1. Video + Audio (Pre-merged formats)
-            if height and vcodec != "none" and acodec != "none":
-                label = f"{height}p"
-                opt = create_option(label, "video_audio")
-                if opt:
-                    video_audio.append(opt)
-
-            # 2. Audio Only
-            elif acodec != "none" and vcodec == "none":
-                label = "Audio Only"
-                if ext not in ["mp3", "m4a", "webm", "opus"]:
-                    continue
-                opt = create_option(label, "audio")
-                if opt:
-                    audio_only.append(opt)
-
-            # 3. Video Only (for reference, but we'll create merged options)
-            elif height and vcodec != "none" and acodec == "none":
-                if height not in best_video_by_height:
-                    best_video_by_height[height] = fmt
+        # 1. Video + Audio (pre-merged formats), best per (height, container)
+        video_audio = [
+            _option(entry, f"{entry.height}p", "video_audio")
+            for entry in sorted(
+                table.best_muxed.values(),
+                key=lambda e: (e.height, e.rank),
+                reverse=True,
+            )
+        ]
 
         # If no pre-merged formats found, create virtual merged options
         # This happens with Instagram, Twitter, etc.
-        if not video_audio and best_audio and best_video_by_height:
+        if not video_audio and table.best_audio and table.best_video:
             logger.info(
-                f"No pre-merged formats found. Creating virtual merged options using format selector."
+                "No pre-merged formats found. Creating virtual merged options using format selector."
             )
-            for height, vid_fmt in best_video_by_height.items():
-                # Create a virtual merged option that yt-dlp will merge on download
-                vid_id = vid_fmt.get("format_id", "")
-                aud_id = best_audio.get("format_id", "")
-
-                # Estimate combined size
-                vid_size = (
-                    vid_fmt.get("filesize") or vid_fmt.get("filesize_approx") or 0
-                )
-                aud_size = (
-                    best_audio.get("filesize") or best_audio.get("filesize_approx") or 0
+            for height in table.heights:
+                video, audio = table.merge_pair(height)  # type: ignore[misc]
+                combined_size = (
+                    video.filesize + audio.filesize
+                    if video.filesize and audio.filesize
+                    else None
                 )
-                combined_size = vid_size + aud_size if vid_size and aud_size else None
-
-                label = f"{height}p"
-                combo = (label, "mp4", "video_audio")
-                if combo not in seen_combos:
-                    seen_combos.add(combo)
-                    video_audio.append(
-                        {
-                            "quality_label": label,
-                            "extension": "mp4",
-                            "file_size_approx": combined_size,
-                            "download_url": f"MERGE:{vid_id}+{aud_id}",  # Special marker for backend
-                            "type": "video_audio",
-                            "format_id": f"{vid_id}+{aud_id}",
-                        }
-                    )
-
-        # Add video-only options (with clear warning)
-        for height, vid_fmt in best_video_by_height.items():
-            label = f"{height}p (Video Only - No Audio)"
-            ext = vid_fmt.get("ext", "mp4")
-            combo = (label, ext, "video_only")
-            if combo not in seen_combos:
-                seen_combos.add(combo)
-                video_only.append(
+                merged_id = f"{video.format_id}+{audio.format_id}"
+                video_audio.append(
                     {
-                        "quality_label": label,
-                        "extension": ext,
-                        "file_size_approx": vid_fmt.get("filesize")
-                        or vid_fmt.get("filesize_approx"),
-                        "download_url": vid_fmt["url"],
-                        "type": "video_only",
-                        "format_id": vid_fmt.get("format_id", ""),
+                        "quality_label": f"{height}p",
+                        "extension": "mp4",
+                        "file_size_approx": combined_size,
+                        "download_url": f"MERGE:{merged_id}",  # Special marker for backend
+                        "type": "video_audio",
+                        "format_id": merged_id,
                     }
                 )
 
-        # Sort by resolution
-        def resolution_key(o):
-            try:
-                return int(o["quality_label"].split("p")[0])
-            except:
-                return 0
-
-        video_audio.sort(key=resolution_key, reverse=True)
-        video_only.sort(key=resolution_key, reverse=True)
-        audio_only.sort(key=lambda x: x["file_size_approx"] or 0, reverse=True)
+        # 2. Audio only, best per container, largest first
+        audio_only = sorted(
+            (
+                _option(entry, "Audio Only", "audio")
+                for entry in table.best_audio_by_ext.values()
+            ),
+            key=lambda o: o["file_size_approx"] or 0,
+            reverse=True,
+        )
+
+        # 3. Video only (with clear warning)
+        video_only = [
+            _option(
+                table.best_video[height],
+                f"{height}p (Video Only - No Audio)",
+                "video_only",
+            )
+            for height in table.heights
+        ]
 
         # Prioritize video+audio formats
         final_options = []
@@ -403,5 +726,36 @@ class YTDLPService:
         return final_options
 
 
+def _page_key(url: str, start: int, count: int) -> str:
+    """Playlist cache key: the URL with the requested slice as a query parameter"""
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}playlist_items={start}-{start + count}"
+
+
+def _playlist_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Lightweight view of a flat (or fully extracted) playlist entry"""
+    thumbnails = entry.get("thumbnails") or []
+    return {
+        "id": entry.get("id"),
+        "title": entry.get("title") or "Unknown Title",
+        "url": entry.get("webpage_url") or entry.get("url"),
+        "thumbnail_url": entry.get("thumbnail")
+        or (thumbnails[-1].get("url") if thumbnails else None),
+        "duration": entry.get("duration"),
+    }
+
+
+def _option(entry: FormatEntry, label: str, type_name: str) -> Dict[str, Any]:
+    """Client-facing option dict for a single format"""
+    return {
+        "quality_label": label,
+        "extension": entry.ext,
+        "file_size_approx": entry.filesize,
+        "download_url": entry.url,
+        "type": type_name,
+        "format_id": entry.format_id,
+    }
+
+
 # Global instance
 ytdlp_service = YTDLPService()
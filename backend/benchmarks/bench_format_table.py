@@ -0,0 +1,175 @@
+"""Microbenchmarks for format indexing and download option selection
+
+Times the FormatTable path next to the selection it replaced (a verbatim
+copy of the pre-FormatTable ``get_download_options`` loop, without the
+extraction call) and reports the ratios:
+
+- ``cold``: FormatTable.build + build_download_options, paid once per
+  extraction (the table is cached with the info dict)
+- ``warm``: build_download_options on the cached table, paid per request
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_format_table
+"""
+
+import json
+import logging
+import timeit
+from typing import Any, Callable, Dict, List
+
+from app.services.format_table import FormatTable
+from app.services.ytdlp_service import ytdlp_service
+from benchmarks.fixtures import instagram_info, youtube_info
+
+
+def _measure(fn: Callable[[], Any], number: int, repeat: int = 5) -> Dict[str, float]:
+    timings = timeit.repeat(fn, number=number, repeat=repeat)
+    per_call = [t / number * 1e6 for t in timings]
+    return {"best_us": round(min(per_call), 2), "mean_us": round(sum(per_call) / len(per_call), 2)}
+
+
+def legacy_download_options(info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Option selection as it was before FormatTable (baseline for the ratios)"""
+    formats = info.get("formats", [])
+
+    video_audio = []
+    audio_only = []
+    video_only = []
+    seen_combos = set()
+
+    best_video_by_height = {}
+    best_audio = None
+
+    for fmt in formats:
+        if not fmt.get("url"):
+            continue
+
+        ext = fmt.get("ext", "mp4")
+        height = fmt.get("height")
+        vcodec = fmt.get("vcodec", "none")
+        acodec = fmt.get("acodec", "none")
+        filesize = fmt.get("filesize") or fmt.get("filesize_approx")
+        format_id = fmt.get("format_id", "")
+
+        def create_option(label, type_name, fmt_id=format_id, size=filesize):
+            combo = (label, ext, type_name)
+            if combo in seen_combos:
+                return None
+            seen_combos.add(combo)
+            return {
+                "quality_label": label,
+                "extension": ext,
+                "file_size_approx": size,
+                "download_url": fmt["url"],
+                "type": type_name,
+                "format_id": fmt_id,
+            }
+
+        if acodec != "none" and (
+            best_audio is None
+            or (fmt.get("abr", 0) or 0) > (best_audio.get("abr", 0) or 0)
+        ):
+            best_audio = fmt
+
+        if height and vcodec != "none":
+            if height not in best_video_by_height:
+                best_video_by_height[height] = fmt
+
+        if height and vcodec != "none" and acodec != "none":
+            opt = create_option(f"{height}p", "video_audio")
+            if opt:
+                video_audio.append(opt)
+        elif acodec != "none" and vcodec == "none":
+            if ext not in ["mp3", "m4a", "webm", "opus"]:
+                continue
+            opt = create_option("Audio Only", "audio")
+            if opt:
+                audio_only.append(opt)
+        elif height and vcodec != "none" and acodec == "none":
+            if height not in best_video_by_height:
+                best_video_by_height[height] = fmt
+
+    if not video_audio and best_audio and best_video_by_height:
+        for height, vid_fmt in best_video_by_height.items():
+            vid_id = vid_fmt.get("format_id", "")
+            aud_id = best_audio.get("format_id", "")
+            vid_size = vid_fmt.get("filesize") or vid_fmt.get("filesize_approx") or 0
+            aud_size = best_audio.get("filesize") or best_audio.get("filesize_approx") or 0
+            combined_size = vid_size + aud_size if vid_size and aud_size else None
+            label = f"{height}p"
+            combo = (label, "mp4", "video_audio")
+            if combo not in seen_combos:
+                seen_combos.add(combo)
+                video_audio.append(
+                    {
+                        "quality_label": label,
+                        "extension": "mp4",
+                        "file_size_approx": combined_size,
+                        "download_url": f"MERGE:{vid_id}+{aud_id}",
+                        "type": "video_audio",
+                        "format_id": f"{vid_id}+{aud_id}",
+                    }
+                )
+
+    for height, vid_fmt in best_video_by_height.items():
+        label = f"{height}p (Video Only - No Audio)"
+        ext = vid_fmt.get("ext", "mp4")
+        combo = (label, ext, "video_only")
+        if combo not in seen_combos:
+            seen_combos.add(combo)
+            video_only.append(
+                {
+                    "quality_label": label,
+                    "extension": ext,
+                    "file_size_approx": vid_fmt.get("filesize") or vid_fmt.get("filesize_approx"),
+                    "download_url": vid_fmt["url"],
+                    "type": "video_only",
+                    "format_id": vid_fmt.get("format_id", ""),
+                }
+            )
+
+    def resolution_key(o):
+        try:
+            return int(o["quality_label"].split("p")[0])
+        except ValueError:
+            return 0
+
+    video_audio.sort(key=resolution_key, reverse=True)
+    video_only.sort(key=resolution_key, reverse=True)
+    audio_only.sort(key=lambda x: x["file_size_approx"] or 0, reverse=True)
+
+    final_options = []
+    final_options.extend(video_audio[:8])
+    final_options.extend(audio_only[:3])
+    final_options.extend(video_only[:3])
+    return final_options
+
+
+def run(number: int = 200) -> Dict[str, Any]:
+    """Run all format selection benchmarks and return the results"""
+    # Keep per-call log lines out of the timings
+    logging.getLogger("urlens").setLevel(logging.WARNING)
+    results: Dict[str, Any] = {}
+    for name, info in (("youtube", youtube_info()), ("instagram", instagram_info())):
+        formats = info["formats"]
+        table = FormatTable.build(formats)
+        legacy = _measure(lambda: legacy_download_options(info), number)
+        build = _measure(lambda: FormatTable.build(formats), number)
+        cold = _measure(lambda: ytdlp_service.build_download_options(info), number)
+        warm = _measure(lambda: ytdlp_service.build_download_options(info, table), number)
+        results[name] = {
+            "formats": len(formats),
+            "legacy_download_options": legacy,
+            "format_table_build": build,
+            "cold_download_options": cold,
+            "warm_download_options": warm,
+            # > 1 means the FormatTable path is slower than the legacy loop
+            "cold_vs_legacy": round(cold["best_us"] / legacy["best_us"], 2),
+            "warm_vs_legacy": round(warm["best_us"] / legacy["best_us"], 2),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,117 @@
+"""Cold-start benchmark for the source and frozen (PyInstaller) backends
+
+Launches the backend repeatedly and measures, from process spawn, how long
+until ``/health`` answers (socket bound, app serving) and until ``/ready``
+answers (yt-dlp warm-up finished). Prints JSON.
+
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --frozen dist/urlens-backend.exe
+
+The frozen target defaults to ``dist/urlens-backend[.exe]`` as produced by
+``pyinstaller urlens-backend.spec`` and is skipped if not built.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FROZEN = os.path.join(
+    BACKEND_DIR, "dist", "urlens-backend.exe" if os.name == "nt" else "urlens-backend"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(client: httpx.Client, url: str, process: subprocess.Popen, timeout: float) -> Optional[float]:
+    """Poll until ``url`` returns 200; return the time it did, or None"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and process.poll() is None:
+        try:
+            if client.get(url).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def measure(command: List[str], timeout: float) -> Dict[str, Optional[float]]:
+    """Start the backend once and time /health and /ready"""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "DEBUG": "False",
+        "SHUTDOWN_READINESS_DELAY": "0",
+    }
+    base = f"http://127.0.0.1:{port}"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1.0) as client:
+            health = _wait_for(client, f"{base}/health", process, timeout)
+            ready = _wait_for(client, f"{base}/ready", process, timeout) if health else None
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    return {
+        "health_s": round(health - started, 3) if health else None,
+        "ready_s": round(ready - started, 3) if ready else None,
+    }
+
+
+def bench(command: List[str], runs: int, timeout: float) -> Dict[str, object]:
+    samples = [measure(command, timeout) for _ in range(runs)]
+    summary: Dict[str, object] = {"command": command, "runs": samples}
+    for key in ("health_s", "ready_s"):
+        values = [s[key] for s in samples if s[key] is not None]
+        summary[key] = (
+            {"median": round(statistics.median(values), 3), "min": min(values), "max": max(values)}
+            if values
+            else None
+        )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backend cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds per phase")
+    parser.add_argument("--frozen", default=DEFAULT_FROZEN, help="path to the PyInstaller build")
+    parser.add_argument("--skip-source", action="store_true")
+    args = parser.parse_args()
+
+    results: Dict[str, object] = {}
+    if not args.skip_source:
+        results["source"] = bench([sys.executable, "main.py"], args.runs, args.timeout)
+    if os.path.exists(args.frozen):
+        results["frozen"] = bench([args.frozen], args.runs, args.timeout)
+    else:
+        results["frozen"] = f"skipped: {args.frozen} not found"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare two load-test result files
+
+    python -m benchmarks.compare before.json after.json
+
+Prints p50/p99 latency and throughput per scenario with the relative change.
+"""
+
+import json
+import sys
+from typing import Any, Dict
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)["scenarios"]
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main() -> None:
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    before, after = _load(sys.argv[1]), _load(sys.argv[2])
+
+    rows = [("scenario", "metric", "before", "after", "change")]
+    for name in before:
+        if name not in after:
+            continue
+        for label, getter in (
+            ("p50 ms", lambda r: r["latency_ms"]["p50"]),
+            ("p99 ms", lambda r: r["latency_ms"]["p99"]),
+            ("req/s", lambda r: r["throughput_rps"]),
+            ("MB/s", lambda r: r["throughput_mb_s"]),
+            ("RSS MiB", lambda r: r["rss_mb"]["after"]),
+        ):
+            b, a = getter(before[name]), getter(after[name])
+            rows.append((name, label, str(b), str(a), _delta(b, a)))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
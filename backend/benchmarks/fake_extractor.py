@@ -0,0 +1,96 @@
+"""Stub yt-dlp backend serving recorded info dicts
+
+``StubYTDLPService`` behaves like ``YTDLPService`` but answers
+``extract_info`` from the fixtures in ``benchmarks.fixtures`` (with an
+optional simulated extraction delay) and rewrites every media URL to point
+at a ``LocalOrigin``. Merges download the component formats from the origin
+and concatenate them, so the merge path does real I/O without ffmpeg.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.core.exceptions import UnsupportedURLException
+from app.services.ytdlp_service import YTDLPService
+from benchmarks.fixtures import instagram_info, youtube_info
+
+# Recorded info dicts by URL substring
+FIXTURES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "youtube.com": youtube_info,
+    "instagram.com": instagram_info,
+}
+
+
+def _size_hint(fmt: Dict[str, Any], scale: float) -> int:
+    size = fmt.get("filesize") or fmt.get("filesize_approx") or 1024 * 1024
+    return max(64 * 1024, int(size * scale))
+
+
+class StubYTDLPService(YTDLPService):
+    """YTDLPService whose extraction and merging never touch the network"""
+
+    def __init__(self, origin_url: str, extract_delay: float = 0.0, size_scale: float = 0.002):
+        """
+        Args:
+            origin_url: Base URL of the LocalOrigin serving media
+            extract_delay: Seconds each extraction sleeps, simulating yt-dlp
+            size_scale: Fraction of the recorded filesize the origin serves
+        """
+        super().__init__()
+        self.origin_url = origin_url
+        self.extract_delay = extract_delay
+        self.size_scale = size_scale
+        self.extractions = 0
+
+    def extract_info(
+        self, url: str, download: bool = False, options: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        for needle, fixture in FIXTURES.items():
+            if needle in url:
+                break
+        else:
+            raise UnsupportedURLException(f"No fixture for {url}")
+
+        self.extractions += 1
+        if self.extract_delay:
+            time.sleep(self.extract_delay)
+
+        info = fixture()
+        expire = int(time.time()) + 6 * 3600
+        for fmt in info["formats"]:
+            name = quote(fmt["format_id"], safe="")
+            fmt["url"] = (
+                f"{self.origin_url}/media/{name}?expire={expire}"
+                f"&size={_size_hint(fmt, self.size_scale)}"
+            )
+        info["thumbnail"] = f"{self.origin_url}/thumb/{info['id']}.jpg"
+        return info
+
+    def download_formats(
+        self, info: Dict[str, Any], format_selector: str, output_dir: str
+    ) -> str:
+        formats = {fmt["format_id"]: fmt for fmt in info.get("formats", [])}
+        output = os.path.join(output_dir, "download.mp4")
+        with httpx.Client(timeout=60.0) as client, open(output, "wb") as f:
+            for format_id in format_selector.split("+"):
+                with client.stream("GET", formats[format_id]["url"]) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes(64 * 1024):
+                        f.write(chunk)
+        return output
+
+
+def install_stub(target: YTDLPService, stub: StubYTDLPService) -> None:
+    """
+    Route the global service's extraction and merging through a stub
+
+    Endpoints and MediaService hold a reference to the global
+    ``ytdlp_service`` instance, so the stub's behaviour is grafted onto that
+    instance rather than replacing it.
+    """
+    target.extract_info = stub.extract_info  # type: ignore[method-assign]
+    target.download_formats = stub.download_formats  # type: ignore[method-assign]
@@ -0,0 +1,180 @@
+"""Recorded-shape yt-dlp info dicts used by the benchmarks
+
+The YouTube fixture mirrors what ``extract_info`` returns for a long video
+when several player clients are rotated: DASH video in three codecs for
+every height, DRC and regular audio tracks, HLS variants and storyboards,
+repeated per client. That lands well above 200 formats, which is what the
+format selection code sees in production.
+"""
+
+import random
+from typing import Any, Dict, List
+
+HEIGHTS = (144, 240, 360, 480, 720, 1080, 1440, 2160)
+VIDEO_CODECS = (
+    ("avc1.4d401e", "mp4", 1.0),
+    ("vp09.00.40.08", "webm", 0.8),
+    ("av01.0.08M.08", "mp4", 0.7),
+)
+AUDIO_FORMATS = (
+    ("139", "mp4a.40.5", "m4a", 48),
+    ("140", "mp4a.40.2", "m4a", 129),
+    ("249", "opus", "webm", 53),
+    ("250", "opus", "webm", 70),
+    ("251", "opus", "webm", 135),
+)
+PLAYER_CLIENTS = ("android", "web", "ios", "tv")
+DURATION = 3600
+
+
+def _googlevideo_url(itag: str, client: str, expire: int) -> str:
+    sig = "".join(random.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=600))
+    return (
+        f"https://rr3---sn-fixture.googlevideo.com/videoplayback?expire={expire}"
+        f"&ei=fixture&ip=203.0.113.7&id=o-fixture&itag={itag}&source=youtube"
+        f"&c={client.upper()}&mime=video%2Fmp4&sig={sig}"
+    )
+
+
+def youtube_formats(seed: int = 7, expire: int = 1_900_000_000) -> List[Dict[str, Any]]:
+    """Deterministic YouTube-sized format list (200+ entries)"""
+    random.seed(seed)
+    formats: List[Dict[str, Any]] = []
+
+    for client in PLAYER_CLIENTS:
+        for i in range(4):
+            formats.append(
+                {
+                    "format_id": f"sb{i}-{client}",
+                    "format_note": "storyboard",
+                    "ext": "mhtml",
+                    "protocol": "mhtml",
+                    "vcodec": "none",
+                    "acodec": "none",
+                    "url": f"https://i.ytimg.com/sb/fixture/storyboard3_L{i}/M$M.jpg",
+                }
+            )
+
+        for itag, acodec, ext, abr in AUDIO_FORMATS:
+            for drc in (False, True):
+                fid = f"{itag}-drc" if drc else itag
+                formats.append(
+                    {
+                        "format_id": f"{fid}-{client}",
+                        "ext": ext,
+                        "protocol": "https",
+                        "vcodec": "none",
+                        "acodec": acodec,
+                        "abr": abr + random.random(),
+                        "tbr": abr + random.random(),
+                        "asr": 48000 if acodec == "opus" else 44100,
+                        "filesize": int(abr * 125 * DURATION),
+                        "url": _googlevideo_url(fid, client, expire),
+                    }
+                )
+
+        for height in HEIGHTS:
+            for vcodec, ext, factor in VIDEO_CODECS:
+                for fps in (30, 60) if height >= 720 else (30,):
+                    vbr = height * 2.1 * factor * (1.5 if fps == 60 else 1.0)
+                    fid = f"{height}{vcodec[:4]}{fps}"
+                    formats.append(
+                        {
+                            "format_id": f"{fid}-{client}",
+                            "ext": ext,
+                            "protocol": "https",
+                            "width": height * 16 // 9,
+                            "height": height,
+                            "fps": fps,
+                            "vcodec": vcodec,
+                            "acodec": "none",
+                            "vbr": vbr + random.random(),
+                            "tbr": vbr + random.random(),
+                            "filesize_approx": int(vbr * 125 * DURATION),
+                            "url": _googlevideo_url(fid, client, expire),
+                        }
+                    )
+
+        for itag, height in (("91", 144), ("92", 240), ("93", 360), ("94", 480), ("95", 720), ("96", 1080)):
+            formats.append(
+                {
+                    "format_id": f"{itag}-{client}",
+                    "ext": "mp4",
+                    "protocol": "m3u8_native",
+                    "height": height,
+                    "vcodec": "avc1.4d401f",
+                    "acodec": "mp4a.40.2",
+                    "tbr": height * 2.5 + random.random(),
+                    "url": f"https://manifest.googlevideo.com/api/manifest/hls_playlist/itag/{itag}/index.m3u8",
+                }
+            )
+
+    # Progressive 360p, the only muxed https format YouTube still serves
+    formats.append(
+        {
+            "format_id": "18",
+            "ext": "mp4",
+            "protocol": "https",
+            "height": 360,
+            "vcodec": "avc1.42001E",
+            "acodec": "mp4a.40.2",
+            "tbr": 600.0,
+            "filesize_approx": 600 * 125 * DURATION,
+            "url": _googlevideo_url("18", "web", expire),
+        }
+    )
+    return formats
+
+
+def youtube_info(seed: int = 7, expire: int = 1_900_000_000) -> Dict[str, Any]:
+    """Info dict for a long YouTube video with a 200+ entry format list"""
+    return {
+        "id": "fixture0001",
+        "title": "URLens benchmark fixture",
+        "thumbnail": "https://i.ytimg.com/vi/fixture0001/maxresdefault.jpg",
+        "duration": DURATION,
+        "extractor": "youtube",
+        "extractor_key": "Youtube",
+        "webpage_url": "https://www.youtube.com/watch?v=fixture0001",
+        "formats": youtube_formats(seed=seed, expire=expire),
+    }
+
+
+def instagram_info(expire: int = 1_900_000_000) -> Dict[str, Any]:
+    """Info dict for a short clip with separate video and audio streams"""
+    formats: List[Dict[str, Any]] = [
+        {
+            "format_id": "dash-audio",
+            "ext": "m4a",
+            "protocol": "https",
+            "vcodec": "none",
+            "acodec": "mp4a.40.2",
+            "abr": 96.0,
+            "filesize": 360_000,
+            "url": f"https://scontent.cdninstagram.com/audio.mp4?oe={expire:x}",
+        }
+    ]
+    for height in (360, 540, 720, 1080):
+        formats.append(
+            {
+                "format_id": f"dash-{height}",
+                "ext": "mp4",
+                "protocol": "https",
+                "height": height,
+                "vcodec": "avc1.64001f",
+                "acodec": "none",
+                "tbr": height * 3.0,
+                "filesize": height * 9_000,
+                "url": f"https://scontent.cdninstagram.com/{height}.mp4?oe={expire:x}",
+            }
+        )
+    return {
+        "id": "Cfixture",
+        "title": "Instagram fixture",
+        "thumbnail": "https://scontent.cdninstagram.com/thumb.jpg",
+        "duration": 30,
+        "extractor": "Instagram",
+        "extractor_key": "Instagram",
+        "webpage_url": "https://www.instagram.com/reel/Cfixture/",
+        "formats": formats,
+    }
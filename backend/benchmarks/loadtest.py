@@ -0,0 +1,264 @@
+"""Offline load scenarios for the URLens API
+
+Starts the real FastAPI app under uvicorn on a background thread, with
+extraction served by ``StubYTDLPService`` and media by ``LocalOrigin``,
+then drives each endpoint with a fixed number of requests at a given
+concurrency. Results (latency percentiles, throughput, RSS) are printed or
+written as JSON so runs can be compared with ``benchmarks.compare``.
+
+Run from the backend directory:
+
+    python -m benchmarks.loadtest --requests 200 --concurrency 16 --output before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Isolate the benchmark from any local configuration and shared store
+_WORKDIR = tempfile.mkdtemp(prefix="urlens-bench-")
+os.environ.setdefault("METADATA_STORE_PATH", os.path.join(_WORKDIR, "metadata.sqlite3"))
+os.environ.setdefault("DOWNLOAD_TOKEN_SECRET", "benchmark-secret")
+os.environ.setdefault("DEBUG", "False")
+# /analyze must hit the stub extractor, not YouTube's oEmbed endpoint
+os.environ.setdefault("FAST_METADATA_ENABLED", "False")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from benchmarks.fake_extractor import StubYTDLPService, install_stub  # noqa: E402
+from benchmarks.origin import LocalOrigin  # noqa: E402
+
+YOUTUBE_URL = "https://www.youtube.com/watch?v=fixture0001"
+INSTAGRAM_URL = "https://www.instagram.com/reel/Cfixture/"
+
+Scenario = Callable[[httpx.AsyncClient, Dict[str, Any]], Awaitable[int]]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        import resource
+
+        # Peak RSS where /proc is unavailable (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ServerThread:
+    """uvicorn serving the app on an ephemeral port in a daemon thread"""
+
+    def __init__(self, app: Any):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, log_level="warning", access_log=False, lifespan="on")
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "ServerThread":
+        threading.Thread(
+            target=self.server.run, kwargs={"sockets": [self.sock]}, daemon=True
+        ).start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+
+
+async def _consume(response: httpx.Response) -> int:
+    total = 0
+    async for chunk in response.aiter_raw():
+        total += len(chunk)
+    if response.status_code >= 400:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    return total
+
+
+async def analyze(client: httpx.AsyncClient, ctx: Dict[str, Any]) -> int:
+    async with client.stream("POST", "/api/v1/analyze", json={"url": YOUTUBE_URL}) as r:
+        return await _consume(r)
+
+
+async def download_info(client: httpx.AsyncClient, ctx: Dict[str, Any]) -> int:
+    async with client.stream("POST", "/api/v1/download-info", json={"url": YOUTUBE_URL}) as r:
+        return await _consume(r)
+
+
+async def proxy(client: httpx.AsyncClient, ctx: Dict[str, Any]) -> int:
+    async with client.stream("GET", "/api/v1/proxy", params={"url": ctx["thumbnail"]}) as r:
+        return await _consume(r)
+
+
+async def proxy_download(client: httpx.AsyncClient, ctx: Dict[str, Any]) -> int:
+    params = {"token": ctx["direct_token"]}
+    async with client.stream("GET", "/api/v1/proxy-download", params=params) as r:
+        return await _consume(r)
+
+
+async def download_merged(client: httpx.AsyncClient, ctx: Dict[str, Any]) -> int:
+    params = {"token": ctx["merge_token"]}
+    async with client.stream("GET", "/api/v1/download-merged", params=params) as r:
+        return await _consume(r)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "analyze": analyze,
+    "download-info": download_info,
+    "proxy": proxy,
+    "proxy-download": proxy_download,
+    "download-merged": download_merged,
+}
+
+
+async def prepare(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """Warm the caches and collect the tokens the download scenarios use"""
+    youtube = (await client.post("/api/v1/download-info", json={"url": YOUTUBE_URL})).json()
+    instagram = (await client.post("/api/v1/download-info", json={"url": INSTAGRAM_URL})).json()
+    analyzed = (await client.post("/api/v1/analyze", json={"url": YOUTUBE_URL})).json()
+
+    direct = next(o for o in youtube["download_options"] if o["quality_label"] == "Audio Only")
+    merged = next(
+        o for o in instagram["download_options"] if o["download_url"].startswith("MERGE:")
+    )
+    return {
+        "thumbnail": analyzed["thumbnail_url"],
+        "direct_token": direct["download_token"],
+        "merge_token": merged["download_token"],
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: Dict[str, Any],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Issue ``requests`` calls with ``concurrency`` in flight and summarize"""
+    latencies: List[float] = []
+    errors = 0
+    transferred = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors, transferred
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                transferred += await scenario(client, ctx)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "throughput_mb_s": round(transferred / elapsed / 2**20, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p90": round(percentile(latencies, 90) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+        "rss_mb": {"before": rss_before, "after": rss_mb()},
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    from main import app
+    from app.services.ytdlp_service import ytdlp_service
+
+    # Per-request INFO logging would dominate the hot paths being measured
+    logging.getLogger("urlens").setLevel(logging.WARNING)
+
+    origin = LocalOrigin(throttle_bps=args.throttle).start()
+    stub = StubYTDLPService(
+        origin.base_url, extract_delay=args.extract_delay, size_scale=args.size_scale
+    )
+    install_stub(ytdlp_service, stub)
+    server = ServerThread(app).start()
+
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=120.0, limits=limits) as client:
+        ctx = await prepare(client)
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], ctx, args.requests, args.concurrency
+            )
+            print(f"{name}: {results[name]['latency_ms']}", file=sys.stderr)
+
+    # The origin's daemon thread exits with the process; stopping it here
+    # would cancel its idle keep-alive handlers mid-read
+    server.stop()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "extractions": stub.extractions,
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--extract-delay", type=float, default=0.0, help="simulated yt-dlp seconds")
+    parser.add_argument("--size-scale", type=float, default=0.002, help="fraction of fixture filesize served")
+    parser.add_argument("--throttle", type=int, default=0, help="origin bytes/second per connection")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Local HTTP origin for offline download benchmarks
+
+Serves deterministic media bodies of any size with Range support and an
+optional per-connection throttle, standing in for googlevideo and other
+CDNs. Paths:
+
+    /media/<name>?size=<bytes>   octet body of ``size`` bytes (default 8 MiB)
+    /thumb/<name>                small JPEG-typed body (64 KiB)
+
+Any ``expire=`` query parameter in the past yields 403, like a real signed
+URL would.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_SIZE = 8 * 1024 * 1024
+THUMB_SIZE = 64 * 1024
+_CHUNK = 64 * 1024
+_PATTERN = bytes(range(256)) * (_CHUNK // 256)
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    if not header or not header.startswith("bytes="):
+        return None
+    start_s, _, end_s = header[6:].partition("-")
+    start = int(start_s) if start_s else 0
+    end = int(end_s) if end_s else size - 1
+    return start, min(end, size - 1)
+
+
+class LocalOrigin:
+    """Asyncio HTTP/1.1 server running on its own thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, throttle_bps: int = 0):
+        self.host = host
+        self.port = port
+        self.throttle_bps = throttle_bps
+        self.requests = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "LocalOrigin":
+        threading.Thread(target=self._run, name="bench-origin", daemon=True).start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(self._server.serve_forever())
+        except asyncio.CancelledError:
+            # serve_forever() is cancelled when stop() closes the server
+            pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while await self._serve_one(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_one(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Serve one request; return whether the connection stays open"""
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        self.requests += 1
+
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        if "expire" in query and int(query["expire"][0]) < time.time():
+            writer.write(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return True
+
+        if parts.path.startswith("/media/"):
+            size = int(query.get("size", [DEFAULT_SIZE])[0])
+            content_type = "video/mp4"
+        elif parts.path.startswith("/thumb/"):
+            size = THUMB_SIZE
+            content_type = "image/jpeg"
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return True
+
+        byte_range = _parse_range(headers.get("range"), size)
+        start, end = byte_range if byte_range else (0, size - 1)
+        status = "206 Partial Content" if byte_range else "200 OK"
+        response = [
+            f"HTTP/1.1 {status}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {end - start + 1}",
+            "Accept-Ranges: bytes",
+        ]
+        if byte_range:
+            response.append(f"Content-Range: bytes {start}-{end}/{size}")
+        writer.write(("\r\n".join(response) + "\r\n\r\n").encode("latin-1"))
+
+        if method != "HEAD":
+            await self._send_body(writer, start, end + 1)
+        await writer.drain()
+        return headers.get("connection", "").lower() != "close"
+
+    async def _send_body(self, writer: asyncio.StreamWriter, start: int, stop: int) -> None:
+        position = start
+        began = time.monotonic()
+        while position < stop:
+            offset = position % len(_PATTERN)
+            chunk = _PATTERN[offset:offset + min(_CHUNK, stop - position)]
+            writer.write(chunk)
+            await writer.drain()
+            position += len(chunk)
+            if self.throttle_bps:
+                # Sleep until the bytes sent so far fit the configured rate
+                ahead = (position - start) / self.throttle_bps - (time.monotonic() - began)
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the benchmark origin standalone")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--throttle", type=int, default=0, help="bytes/second per connection")
+    args = parser.parse_args()
+    origin = LocalOrigin(port=args.port, throttle_bps=args.throttle).start()
+    print(f"Serving on {origin.base_url}")
+    threading.Event().wait()
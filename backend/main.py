@@ -1,9 +1,71 @@
 """URLens Backend API - Main Application Entry Point"""
-from fastapi import FastAPI
+import asyncio
+import signal
+from contextlib import asynccontextmanager
+from types import FrameType
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.config import settings
-from app.core.middleware import setup_cors, setup_exception_handlers
+from app.core.http_client import close_http_client
+from app.core.lifecycle import lifecycle
+from app.core.middleware import (
+    setup_admission,
+    setup_bandwidth,
+    setup_cors,
+    setup_exception_handlers,
+    setup_profiling,
+)
 from app.core.logger import logger
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics
 from app.api.v1.routes import router as api_v1_router
+from app.services.metadata_store import metadata_store, run_compaction
+from app.services.ytdlp_service import ytdlp_service
+
+
+async def warm_up() -> None:
+    """Load yt-dlp off the event loop, then report ready"""
+    try:
+        await ytdlp_service.warm_up()
+    except Exception as e:
+        # Extraction will retry the import and surface the error per request
+        logger.error(f"yt-dlp warm-up failed: {e}")
+    lifecycle.start()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup and graceful shutdown
+
+    Startup returns immediately so /health answers as soon as the socket is
+    bound; /ready stays 503 until the yt-dlp warm-up task finishes.
+    """
+    background = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(loop_monitor.run()),
+    ]
+    if metadata_store is not None:
+        background.append(
+            asyncio.create_task(
+                run_compaction(metadata_store, settings.METADATA_STORE_COMPACT_INTERVAL)
+            )
+        )
+    yield
+
+    # Normally already draining via DrainingServer; covers plain `uvicorn main:app`
+    lifecycle.begin_shutdown()
+    await lifecycle.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    for task in background:
+        task.cancel()
+    ytdlp_service.shutdown()
+    await close_http_client()
+    lifecycle.cleanup_temp_dirs()
+    logger.info("Shutdown complete")
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -11,10 +73,16 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="URLens API for universal web media downloading",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-# Setup middleware
+# Setup middleware (the last one added is the outermost)
+setup_admission(app)
+setup_bandwidth(app)
+setup_profiling(app)
+# Outermost, so the 503s AdmissionMiddleware sends while draining carry CORS headers
 setup_cors(app)
 setup_exception_handlers(app)
 
@@ -35,16 +103,86 @@ async def root():
 
 @app.get("/health", tags=["root"])
 async def health_check():
-    """Health check endpoint"""
+    """Liveness check: the process is up and serving"""
     return {"status": "healthy"}
 
 
+@app.get("/ready", tags=["root"])
+async def readiness_check():
+    """Readiness check: 503 while starting up or draining for shutdown"""
+    if not lifecycle.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "draining" if lifecycle.draining else "starting"},
+        )
+    return {
+        "status": "ready",
+        "active_streams": lifecycle.active_streams,
+        "extraction": ytdlp_service.scheduler.snapshot(),
+    }
+
+
+@app.get("/metrics", tags=["root"])
+async def get_metrics():
+    """Per-worker counters and histograms"""
+    return metrics.snapshot()
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that drains before it stops
+
+    On the first SIGTERM/SIGINT the worker reports not-ready and rejects new
+    API work, waits SHUTDOWN_READINESS_DELAY for the load balancer to route
+    away and up to SHUTDOWN_DRAIN_TIMEOUT for in-flight streams, and only
+    then lets uvicorn shut down. A second SIGINT exits immediately.
+    """
+
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def serve(self, sockets=None) -> None:
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets)
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if lifecycle.draining or self._loop is None:
+            super().handle_exit(sig, frame)
+            if sig == signal.SIGINT:
+                self.force_exit = True
+            return
+        lifecycle.begin_shutdown()
+        self._loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self._drain_then_exit(sig, frame))
+        )
+
+    async def _drain_then_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        await asyncio.sleep(settings.SHUTDOWN_READINESS_DELAY)
+        await lifecycle.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+        super().handle_exit(sig, frame)
+
+
 if __name__ == "__main__":
-    import uvicorn
     logger.info(f"Starting {settings.APP_NAME} on {settings.HOST}:{settings.PORT}")
-    uvicorn.run(
-        "main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG
-    )
+    if settings.DEBUG:
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True,
+            proxy_headers=True,
+            forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+        )
+    else:
+        DrainingServer(
+            uvicorn.Config(
+                app,
+                host=settings.HOST,
+                port=settings.PORT,
+                # The client address (bandwidth fair share, logs) comes from
+                # X-Forwarded-For when the request arrives through a trusted proxy
+                proxy_headers=True,
+                forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+                # Streams still open after the drain deadline are cancelled
+                timeout_graceful_shutdown=1,
+            )
+        ).run()
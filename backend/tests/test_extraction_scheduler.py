@@ -0,0 +1,159 @@
+"""Priority classes, aging and shutdown of the extraction scheduler"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.exceptions import ServiceShuttingDownException
+from app.services.extraction_scheduler import (
+    DOWNLOAD,
+    FORMATS,
+    INTERACTIVE,
+    ExtractionScheduler,
+)
+
+
+def _scheduler(workers=1, reserved=None, limits=None, aging=0.0):
+    executor = ThreadPoolExecutor(max_workers=workers + 1)
+    return ExtractionScheduler(executor, workers, reserved or {}, limits or {}, aging)
+
+
+async def _occupy(scheduler, priority=DOWNLOAD):
+    """Start a job that holds its slot until the returned event is set"""
+    gate = threading.Event()
+    task = asyncio.create_task(scheduler.submit(priority, gate.wait))
+    await asyncio.sleep(0.01)
+    return gate, task
+
+
+async def _queue(scheduler, order, priority):
+    task = asyncio.create_task(scheduler.submit(priority, lambda: order.append(priority)))
+    await asyncio.sleep(0)
+    return task
+
+
+def test_waiting_jobs_start_by_class():
+    async def run():
+        scheduler = _scheduler()
+        order = []
+        gate, blocker = await _occupy(scheduler)
+        tasks = [
+            await _queue(scheduler, order, priority)
+            for priority in (DOWNLOAD, FORMATS, INTERACTIVE, DOWNLOAD)
+        ]
+        assert scheduler.snapshot()[DOWNLOAD]["queued"] == 2
+
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+        return order, scheduler.snapshot()
+
+    order, snapshot = asyncio.run(run())
+    assert order == [INTERACTIVE, FORMATS, DOWNLOAD, DOWNLOAD]
+    assert all(counts == {"running": 0, "queued": 0} for counts in snapshot.values())
+
+
+def test_reserved_slot_admits_interactive_behind_downloads():
+    async def run():
+        scheduler = _scheduler(workers=2, reserved={INTERACTIVE: 1})
+        order = []
+        gate, blocker = await _occupy(scheduler)
+        download = await _queue(scheduler, order, DOWNLOAD)
+        # The only shared slot is taken: the download waits, interactive does not
+        await asyncio.wait_for(
+            scheduler.submit(INTERACTIVE, lambda: order.append(INTERACTIVE)), timeout=1
+        )
+        assert order == [INTERACTIVE]
+        gate.set()
+        await asyncio.gather(blocker, download)
+        return order
+
+    assert asyncio.run(run()) == [INTERACTIVE, DOWNLOAD]
+
+
+def test_aging_promotes_long_waiting_jobs():
+    async def run():
+        scheduler = _scheduler(aging=0.05)
+        order = []
+        gate, blocker = await _occupy(scheduler)
+        download = await _queue(scheduler, order, DOWNLOAD)
+        # Waited three aging periods: ranks above a fresh interactive job
+        await asyncio.sleep(0.15)
+        interactive = await _queue(scheduler, order, INTERACTIVE)
+
+        gate.set()
+        await asyncio.gather(blocker, download, interactive)
+        return order
+
+    assert asyncio.run(run()) == [DOWNLOAD, INTERACTIVE]
+
+
+def test_without_aging_classes_are_strict():
+    async def run():
+        scheduler = _scheduler(aging=0.0)
+        order = []
+        gate, blocker = await _occupy(scheduler)
+        download = await _queue(scheduler, order, DOWNLOAD)
+        await asyncio.sleep(0.05)
+        interactive = await _queue(scheduler, order, INTERACTIVE)
+
+        gate.set()
+        await asyncio.gather(blocker, download, interactive)
+        return order
+
+    assert asyncio.run(run()) == [INTERACTIVE, DOWNLOAD]
+
+
+def test_cancelled_waiting_job_never_runs():
+    async def run():
+        scheduler = _scheduler()
+        order = []
+        gate, blocker = await _occupy(scheduler)
+        cancelled = await _queue(scheduler, order, INTERACTIVE)
+        kept = await _queue(scheduler, order, DOWNLOAD)
+
+        cancelled.cancel()
+        gate.set()
+        await asyncio.gather(blocker, kept)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return order, scheduler.snapshot()
+
+    order, snapshot = asyncio.run(run())
+    assert order == [DOWNLOAD]
+    assert all(counts == {"running": 0, "queued": 0} for counts in snapshot.values())
+
+
+def test_shutdown_fails_queued_jobs_and_lets_running_ones_finish():
+    async def run():
+        scheduler = _scheduler()
+        order = []
+        gate, blocker = await _occupy(scheduler)
+        queued = [await _queue(scheduler, order, p) for p in (INTERACTIVE, DOWNLOAD)]
+
+        scheduler.shutdown()
+        results = await asyncio.gather(*queued, return_exceptions=True)
+        assert all(isinstance(r, ServiceShuttingDownException) for r in results)
+        with pytest.raises(ServiceShuttingDownException):
+            await scheduler.submit(INTERACTIVE, lambda: order.append("late"))
+
+        gate.set()
+        assert await blocker is True
+        return order, scheduler.snapshot()
+
+    order, snapshot = asyncio.run(run())
+    assert order == []
+    assert all(counts == {"running": 0, "queued": 0} for counts in snapshot.values())
+
+
+def test_executor_shutdown_is_reported_as_shutting_down():
+    async def run():
+        scheduler = _scheduler()
+        scheduler.executor.shutdown()
+        with pytest.raises(ServiceShuttingDownException):
+            await scheduler.submit(INTERACTIVE, lambda: None)
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(run())
+    assert snapshot[INTERACTIVE]["running"] == 0
@@ -0,0 +1,74 @@
+"""Fast analyze metadata from oEmbed and OpenGraph"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import http_client
+from app.services.metadata_resolver import MetadataResolver
+
+TWEET = "https://x.com/someone/status/1234567890"
+OEMBED = {
+    "author_name": "someone",
+    "html": "<blockquote><p>Launch day &amp; more</p></blockquote>",
+}
+
+
+def _resolve(url, routes):
+    """Resolve ``url`` with the shared client answering from ``routes`` by host"""
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.host)
+        status, body = routes[request.url.host]
+        if isinstance(body, str):
+            return httpx.Response(status, text=body, headers={"content-type": "text/html"})
+        return httpx.Response(status, json=body)
+
+    async def run():
+        http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await MetadataResolver(timeout=1, ttl=60, max_entries=8).resolve(url)
+        finally:
+            await http_client.close_http_client()
+
+    return asyncio.run(run()), requested
+
+
+def test_oembed_with_thumbnail_is_used_directly():
+    oembed = {"title": "A video", "thumbnail_url": "https://i.ytimg.com/t.jpg"}
+    routes = {"www.youtube.com": (200, oembed)}
+    metadata, requested = _resolve("https://www.youtube.com/watch?v=abc", routes)
+    assert metadata == {
+        "platform": "youtube",
+        "title": "A video",
+        "thumbnail_url": "https://i.ytimg.com/t.jpg",
+    }
+    assert requested == ["www.youtube.com"]
+
+
+def test_oembed_without_thumbnail_falls_back_to_opengraph():
+    page = (
+        '<html><head><meta property="og:title" content="someone on X">'
+        '<meta property="og:image" content="https://pbs.twimg.com/media/a.jpg"></head></html>'
+    )
+    routes = {"publish.twitter.com": (200, OEMBED), "x.com": (200, page)}
+    metadata, requested = _resolve(TWEET, routes)
+    assert metadata == {
+        "platform": "twitter",
+        "title": "someone on X",
+        "thumbnail_url": "https://pbs.twimg.com/media/a.jpg",
+    }
+    assert requested == ["publish.twitter.com", "x.com"]
+
+
+@pytest.mark.parametrize("page", [(200, "<html><head></head></html>"), (403, "")])
+def test_oembed_without_thumbnail_is_left_to_ytdlp(page):
+    metadata, _ = _resolve(TWEET, {"publish.twitter.com": (200, OEMBED), "x.com": page})
+    assert metadata is None
+
+
+def test_non_object_oembed_is_left_to_ytdlp():
+    metadata, _ = _resolve(TWEET, {"publish.twitter.com": (200, ["not", "an", "object"])})
+    assert metadata is None
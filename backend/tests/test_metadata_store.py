@@ -0,0 +1,85 @@
+"""Round trip of extractions through the shared metadata store"""
+
+import copy
+
+import pytest
+import yt_dlp
+
+from app.services.metadata_store import MetadataStore, _decode, _encode, project_info
+from app.services.ytdlp_service import ytdlp_service
+from benchmarks.fixtures import instagram_info, youtube_info
+
+
+def _youtube_dash_info():
+    """YouTube fixture with the DASH-only keys yt-dlp relies on for downloads"""
+    info = youtube_info()
+    for fmt in info["formats"]:
+        if fmt.get("protocol") == "https" and fmt["format_id"] != "18":
+            fmt["container"] = f"{fmt['ext']}_dash"
+            fmt["downloader_options"] = {"http_chunk_size": 10485760}
+            fmt["has_drm"] = False
+    # Tallest, highest bitrate format, but unplayable: must never be picked
+    drm = dict(info["formats"][-2], format_id="drm-2160", height=2160, tbr=99999.0, has_drm=True)
+    info["formats"].append(drm)
+    return info
+
+
+def _stored(info):
+    return _decode(_encode(project_info(info)))
+
+
+def _selected(info, selector):
+    params = {"format": selector, "quiet": True, "no_warnings": True, "simulate": True}
+    with yt_dlp.YoutubeDL(params) as ydl:
+        result = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    requested = result.get("requested_formats") or [result]
+    return [
+        (f["format_id"], f["url"], f.get("container"), f.get("downloader_options"))
+        for f in requested
+    ]
+
+
+@pytest.mark.parametrize("make_info", [_youtube_dash_info, instagram_info])
+def test_projection_builds_same_download_options(make_info):
+    info = make_info()
+    assert ytdlp_service.build_download_options(_stored(info)) == (
+        ytdlp_service.build_download_options(info)
+    )
+
+
+@pytest.mark.parametrize("make_info", [_youtube_dash_info, instagram_info])
+def test_projection_selects_same_merge_formats(make_info):
+    info = make_info()
+    stored = _stored(info)
+    selectors = ["bestvideo+bestaudio/best"] + [
+        option["format_id"]
+        for option in ytdlp_service.build_download_options(info)
+        if "+" in option["format_id"]
+    ]
+    for selector in selectors:
+        assert _selected(stored, selector) == _selected(info, selector)
+
+
+def test_projection_keeps_drm_flag():
+    stored = _stored(_youtube_dash_info())
+    drm = next(f for f in stored["formats"] if f["format_id"] == "drm-2160")
+    assert drm["has_drm"] is True
+    assert "drm-2160" not in _selected(stored, "bestvideo+bestaudio/best")[0][0]
+
+
+def test_put_info_skips_unencodable_values(tmp_path):
+    store = MetadataStore(str(tmp_path / "store.sqlite3"), ttl=60, expiry_margin=0)
+    info = instagram_info()
+    info["formats"][0]["fragments"] = lambda ctx: iter(())
+
+    projected = store.put_info(info["webpage_url"], info)
+
+    assert projected["title"] == info["title"]
+    assert store.get_info(info["webpage_url"]) is None
+
+
+def test_put_info_round_trip(tmp_path):
+    store = MetadataStore(str(tmp_path / "store.sqlite3"), ttl=60, expiry_margin=0)
+    info = instagram_info()
+    store.put_info(info["webpage_url"], info)
+    assert store.get_info(info["webpage_url"]) == _stored(info)
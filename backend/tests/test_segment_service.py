@@ -0,0 +1,139 @@
+"""HLS playlist parsing and DASH segment planning"""
+
+import asyncio
+
+import pytest
+
+from app.services.segment_service import Segment, parse_m3u8, segment_service
+
+BASE = "https://cdn.example.com/hls/v1/index.m3u8"
+
+
+def test_master_playlist_lists_variants():
+    playlist = parse_m3u8(
+        "#EXTM3U\n"
+        '#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"\n'
+        "360p/index.m3u8\n"
+        "#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720\n"
+        "https://other.example.com/720p.m3u8\n",
+        BASE,
+    )
+    assert playlist.variants == [
+        (800000, "https://cdn.example.com/hls/v1/360p/index.m3u8"),
+        (2500000, "https://other.example.com/720p.m3u8"),
+    ]
+    assert playlist.segments == []
+
+
+def test_media_playlist_resolves_relative_uris():
+    playlist = parse_m3u8(
+        "#EXTM3U\n#EXT-X-TARGETDURATION:6\n"
+        "#EXTINF:6.0,\nseg0.ts\n"
+        "#EXTINF:6.0,\n../shared/seg1.ts\n"
+        "#EXTINF:6.0,\n/abs/seg2.ts\n"
+        "#EXT-X-ENDLIST\n",
+        BASE,
+    )
+    assert playlist.variants == []
+    assert [s.url for s in playlist.segments] == [
+        "https://cdn.example.com/hls/v1/seg0.ts",
+        "https://cdn.example.com/hls/shared/seg1.ts",
+        "https://cdn.example.com/abs/seg2.ts",
+    ]
+    assert playlist.ended
+    assert not playlist.fragmented
+
+
+def test_media_playlist_without_endlist_is_live():
+    playlist = parse_m3u8("#EXTM3U\n#EXTINF:6.0,\nseg0.ts\n", BASE)
+    assert not playlist.ended
+
+
+def test_byte_ranges_with_and_without_offsets():
+    playlist = parse_m3u8(
+        "#EXTM3U\n"
+        '#EXT-X-MAP:URI="media.mp4",BYTERANGE="720@0"\n'
+        "#EXTINF:4.0,\n#EXT-X-BYTERANGE:1000@720\nmedia.mp4\n"
+        "#EXTINF:4.0,\n#EXT-X-BYTERANGE:500\nmedia.mp4\n"
+        "#EXTINF:4.0,\n#EXT-X-BYTERANGE:300\nmedia.mp4\n"
+        "#EXT-X-ENDLIST\n",
+        BASE,
+    )
+    url = "https://cdn.example.com/hls/v1/media.mp4"
+    assert playlist.segments == [
+        Segment(url, (0, 719)),
+        Segment(url, (720, 1719)),
+        Segment(url, (1720, 2219)),
+        Segment(url, (2220, 2519)),
+    ]
+    assert playlist.fragmented
+
+
+def test_byte_range_without_offset_needs_a_previous_range():
+    with pytest.raises(ValueError):
+        parse_m3u8("#EXTM3U\n#EXT-X-BYTERANGE:500\nmedia.mp4\n", BASE)
+
+
+def test_init_segment_is_emitted_once_per_map():
+    playlist = parse_m3u8(
+        "#EXTM3U\n"
+        '#EXT-X-MAP:URI="init.mp4"\n#EXTINF:4.0,\na.m4s\n'
+        '#EXT-X-MAP:URI="init.mp4"\n#EXTINF:4.0,\nb.m4s\n'
+        '#EXT-X-MAP:URI="init2.mp4"\n#EXTINF:4.0,\nc.m4s\n'
+        "#EXT-X-ENDLIST\n",
+        BASE,
+    )
+    assert [s.url.rsplit("/", 1)[1] for s in playlist.segments] == [
+        "init.mp4", "a.m4s", "b.m4s", "init2.mp4", "c.m4s",
+    ]
+
+
+@pytest.mark.parametrize("method", ["AES-128", "SAMPLE-AES"])
+def test_encrypted_playlists_are_unsupported(method):
+    with pytest.raises(ValueError, match=method):
+        parse_m3u8(
+            f'#EXTM3U\n#EXT-X-KEY:METHOD={method},URI="key.bin"\n#EXTINF:6.0,\nseg0.ts\n',
+            BASE,
+        )
+
+
+def test_key_method_none_is_allowed():
+    playlist = parse_m3u8(
+        "#EXTM3U\n#EXT-X-KEY:METHOD=NONE\n#EXTINF:6.0,\nseg0.ts\n#EXT-X-ENDLIST\n", BASE
+    )
+    assert len(playlist.segments) == 1
+
+
+def test_non_playlist_is_rejected():
+    with pytest.raises(ValueError):
+        parse_m3u8("<html></html>", BASE)
+
+
+def test_dash_fragments_are_planned_against_the_base_url():
+    plan = asyncio.run(
+        segment_service.plan(
+            {
+                "protocol": "http_dash_segments",
+                "fragment_base_url": "https://cdn.example.com/dash/",
+                "fragments": [{"path": "init.mp4"}, {"url": "https://edge.example.com/1.m4s"}],
+            }
+        )
+    )
+    assert [s.url for s in plan.segments] == [
+        "https://cdn.example.com/dash/init.mp4",
+        "https://edge.example.com/1.m4s",
+    ]
+    assert plan.kind == "dash"
+    assert plan.fragmented
+
+
+def test_generated_dash_fragments_are_unsupported():
+    def fragments(ctx):
+        yield {"url": "https://cdn.example.com/live/1.m4s"}
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            segment_service.plan(
+                {"protocol": "http_dash_segments_generator", "fragments": fragments}
+            )
+        )
@@ -0,0 +1,83 @@
+"""Streaming responses release their resources when the client goes away"""
+
+import asyncio
+
+from app.api.v1.endpoints.proxy import _stream_response
+from app.core.lifecycle import lifecycle
+
+_SCOPE = {"type": "http", "method": "GET", "path": "/api/v1/proxy-download", "headers": []}
+
+
+class _Resource:
+    """Stands in for ffmpeg, a segment window or an upstream connection"""
+
+    def __init__(self):
+        self.body_finished = False
+        self.closed = 0
+
+    async def body(self):
+        try:
+            for _ in range(100):
+                yield b"x" * 1024
+        finally:
+            self.body_finished = True
+
+    async def close(self):
+        self.closed += 1
+
+
+def test_disconnect_before_first_chunk_releases_resources():
+    resource = _Resource()
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        # A client already gone: never let the body start
+        await asyncio.sleep(3600)
+
+    asyncio.run(_stream_response(resource.body(), resource.close)(_SCOPE, receive, send))
+
+    assert resource.closed == 1
+    assert lifecycle.active_streams == 0
+
+
+def test_disconnect_mid_stream_releases_resources():
+    resource = _Resource()
+    first_chunk = asyncio.Event()
+
+    async def receive():
+        await first_chunk.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            first_chunk.set()
+            # Slow client: the body stays paused at its yield
+            await asyncio.sleep(3600)
+
+    async def run():
+        await _stream_response(resource.body(), resource.close)(_SCOPE, receive, send)
+
+    asyncio.run(run())
+
+    assert resource.closed == 1
+    assert resource.body_finished
+    assert lifecycle.active_streams == 0
+
+
+def test_completed_stream_closes_once():
+    resource = _Resource()
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(_stream_response(resource.body(), resource.close)(_SCOPE, receive, send))
+
+    assert sum(len(m.get("body", b"")) for m in sent) == 100 * 1024
+    assert resource.closed == 1
+    assert lifecycle.active_streams == 0
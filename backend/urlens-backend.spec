@@ -1,4 +1,5 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import copy_metadata
 
 a = Analysis(
     ['main.py'],
@@ -6,6 +7,8 @@ a = Analysis(
     binaries=[],
     datas=[
         ('app', 'app'),
+        # Lets the metadata store read the yt-dlp version without importing it
+        *copy_metadata('yt-dlp'),
     ],
     hiddenimports=[
         'uvicorn.logging',